@@ -0,0 +1,253 @@
+"""
+Control de admisión por worker: límite de peticiones en curso, cola de espera
+acotada con plazo y rechazo inmediato (503 + Retry-After) cuando el plazo no
+se va a cumplir.
+
+Una petición que llega con todos los huecos ocupados espera en la cola como
+mucho Config.ADMISSION_TIMEOUT_MS. Si la cola está llena, o si la espera
+estimada (posición en la cola por el tiempo medio de servicio) ya supera el
+plazo, se rechaza sin esperar: bajo sobrecarga es mejor responder 503 al
+momento que dejar que la latencia crezca para todos.
+
+Para que la espera ocurra aquí y no en la cola del socket, gunicorn.conf.py
+usa workers gthread con un hilo por petición en curso y por plaza de la cola
+(más unos pocos para rechazar al momento). Con un solo hilo por worker la
+cola está en el socket; si el proxy añade la hora de llegada
+(Config.QUEUE_START_HEADER, p. ej. X-Request-Start) también se rechazan las
+peticiones que ya han esperado más que el plazo antes de llegar al worker.
+
+ready() alimenta la comprobación de /health: un worker saturado, o que ha
+rechazado peticiones hace poco, deja de estar listo para que el balanceador
+le envíe menos tráfico.
+"""
+
+import asyncio
+import collections
+import math
+import threading
+import time
+
+# Peticiones en curso por worker si no se configura MAX_IN_FLIGHT (la inferencia usa CPU y el GIL)
+DEFAULT_MAX_IN_FLIGHT = 2
+# Hilos de más por worker para responder 503 al momento cuando la cola está llena
+SPARE_THREADS = 2
+# Segundos tras un rechazo durante los que el worker no se anuncia como listo
+READY_COOLDOWN = 1.0
+# Peso de cada nueva muestra en la media móvil del tiempo de servicio
+SERVICE_TIME_WEIGHT = 0.1
+
+
+class Rejected(Exception):
+    """La petición no se admite; `retry_after` son los segundos sugeridos al cliente"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def queued_seconds(header_value, now=None):
+    """
+    Segundos que la petición lleva esperando según la cabecera de hora de
+    llegada del proxy ("t=<época>" en s, ms o µs); None si no se puede leer.
+    """
+    if not header_value:
+        return None
+    try:
+        started = float(header_value.strip().removeprefix('t='))
+    except ValueError:
+        return None
+    # La unidad se deduce de la magnitud
+    if started > 1e14:
+        started /= 1e6
+    elif started > 1e11:
+        started /= 1e3
+    return max(0.0, (now if now is not None else time.time()) - started)
+
+
+class AdmissionState:
+    """Contadores, estimación de la espera y decisión de admitir (sin bloqueo)"""
+
+    def __init__(self, max_in_flight, max_queue, timeout):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+        self.timeout = timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = collections.Counter()
+        self.service_time = None
+        self.last_rejected_at = None
+
+    def estimated_wait(self, position):
+        """Espera estimada de la petición en la posición `position` de la cola"""
+        if self.service_time is None:
+            return 0.0
+        return position * self.service_time / self.max_in_flight
+
+    def retry_after(self):
+        """Segundos hasta que se espera poder atender (al menos 1, como entero para la cabecera)"""
+        drain = self.estimated_wait(self.waiting + self.in_flight)
+        return max(1, math.ceil(max(drain, self.timeout)))
+
+    def reject(self, reason):
+        self.rejected[reason] += 1
+        self.last_rejected_at = time.monotonic()
+        return Rejected(reason, self.retry_after())
+
+    def check_queue(self):
+        """Rechazo inmediato si la cola está llena o la espera estimada supera el plazo"""
+        if self.waiting >= self.max_queue:
+            return self.reject('queue_full')
+        if self.estimated_wait(self.waiting + 1) > self.timeout:
+            return self.reject('deadline')
+        return None
+
+    def finished(self, seconds):
+        self.in_flight -= 1
+        if self.service_time is None:
+            self.service_time = seconds
+        else:
+            self.service_time += SERVICE_TIME_WEIGHT * (seconds - self.service_time)
+
+    def ready(self):
+        """False si una petición nueva tendría que esperar o se ha rechazado alguna hace poco"""
+        if self.last_rejected_at is not None and time.monotonic() - self.last_rejected_at < READY_COOLDOWN:
+            return False
+        return self.in_flight < self.max_in_flight or self.waiting < self.max_queue
+
+    def stats(self):
+        return {
+            'max_in_flight': self.max_in_flight,
+            'max_queue': self.max_queue,
+            'timeout_ms': self.timeout * 1000.0,
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'admitted': self.admitted,
+            'rejected': dict(self.rejected),
+            'mean_service_ms': self.service_time * 1000.0 if self.service_time is not None else None
+        }
+
+
+class AdmissionController:
+    """Control de admisión para servidores con hilos (Flask bajo gunicorn)"""
+
+    def __init__(self, max_in_flight, max_queue=16, timeout=1.0):
+        self.state = AdmissionState(max_in_flight, max_queue, timeout)
+        self._condition = threading.Condition()
+
+    def acquire(self, queued=0.0):
+        """
+        Reserva un hueco o lanza Rejected. `queued` son los segundos que la
+        petición ya esperó antes de llegar al worker (cuentan para el plazo).
+        """
+        state = self.state
+        with self._condition:
+            if queued > state.timeout:
+                raise state.reject('expired')
+            if state.in_flight < state.max_in_flight and not state.waiting:
+                state.in_flight += 1
+                state.admitted += 1
+                return time.perf_counter()
+            rejected = state.check_queue()
+            if rejected is not None:
+                raise rejected
+            state.waiting += 1
+            try:
+                deadline = time.monotonic() + state.timeout - queued
+                while state.in_flight >= state.max_in_flight:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise state.reject('timeout')
+                    self._condition.wait(remaining)
+            finally:
+                state.waiting -= 1
+            state.in_flight += 1
+            state.admitted += 1
+            return time.perf_counter()
+
+    def release(self, started):
+        """Libera el hueco reservado por acquire (que devolvió `started`)"""
+        with self._condition:
+            self.state.finished(time.perf_counter() - started)
+            self._condition.notify()
+
+    def ready(self):
+        return self.state.ready()
+
+    def stats(self):
+        with self._condition:
+            return self.state.stats()
+
+
+class _Expired(Exception):
+    """Venció el plazo de una petición en la cola de AsyncAdmissionController"""
+
+
+def _expire(waiter):
+    if not waiter.done():
+        waiter.set_exception(_Expired())
+
+
+class AsyncAdmissionController:
+    """Control de admisión para el modo ASGI; todo ocurre en el bucle de eventos"""
+
+    def __init__(self, max_in_flight, max_queue=16, timeout=1.0):
+        self.state = AdmissionState(max_in_flight, max_queue, timeout)
+        self._waiters = collections.deque()
+
+    async def acquire(self, queued=0.0):
+        state = self.state
+        if queued > state.timeout:
+            raise state.reject('expired')
+        if state.in_flight < state.max_in_flight and not self._waiters:
+            state.in_flight += 1
+            state.admitted += 1
+            return time.perf_counter()
+        rejected = state.check_queue()
+        if rejected is not None:
+            raise rejected
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        state.waiting += 1
+        # release() pasa el hueco directamente al primero de la cola; si vence
+        # el plazo antes, el futuro termina con _Expired
+        expiry = loop.call_later(max(0.0, state.timeout - queued), _expire, waiter)
+        try:
+            await waiter
+        except _Expired:
+            raise state.reject('timeout')
+        except BaseException:
+            # Cancelada (p. ej. el cliente se desconectó) después de que release()
+            # le pasara el hueco: se devuelve para no perderlo para siempre
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                state.in_flight -= 1
+                self._wake_next()
+            raise
+        finally:
+            expiry.cancel()
+            state.waiting -= 1
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        state.admitted += 1
+        return time.perf_counter()
+
+    def release(self, started):
+        self.state.finished(time.perf_counter() - started)
+        self._wake_next()
+
+    def _wake_next(self):
+        """Pasa el hueco libre al primero de la cola que siga esperando"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.state.in_flight += 1
+                waiter.set_result(None)
+                return
+
+    def ready(self):
+        return self.state.ready()
+
+    def stats(self):
+        return self.state.stats()
@@ -0,0 +1,409 @@
+"""
+Modo de servicio ASGI con micro-batching de predicciones concurrentes.
+
+Expone /predict, /health, /model-info y /api/data con el mismo esquema de
+respuesta que la app Flask (main.py), cuyo modelo, esquema de features y caché
+reutiliza. Las peticiones concurrentes a /predict se acumulan en una cola y se
+puntúan juntas con una única llamada vectorizada cuando vence la ventana
+(Config.ASGI_BATCH_WINDOW_MS) o se alcanza el tamaño máximo del lote
+(Config.ASGI_MAX_BATCH).
+
+El lote se puntúa en el propio bucle de eventos, a propósito: con la tabla de
+predicciones es una búsqueda vectorizada de decenas de microsegundos, menos
+que lo que costaría pasarlo a un hilo (y con varios hilos compitiendo por el
+GIL no se ganaría nada). Para modelos sin tabla y lotes grandes conviene
+reducir ASGI_MAX_BATCH.
+
+Uso:
+    uvicorn asgi:app --host 0.0.0.0 --port $PORT
+"""
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+from urllib.parse import parse_qsl
+
+import main
+from main import Config, FEATURE_SCHEMA, FeatureValidationError
+from admission import AsyncAdmissionController, Rejected, queued_seconds
+from logging_setup import log_request
+from response_cache import compact_requested, query_flag, with_explanation
+import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Agrupa los registros que llegan dentro de una ventana y los puntúa en un solo lote"""
+
+    def __init__(self, score_batch, window, max_batch):
+        self.score_batch = score_batch
+        self.window = window
+        self.max_batch = max_batch
+        self._pending = []
+        self._timer = None
+
+    async def submit(self, item):
+        """Encola un registro y espera su resultado"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self.flush)
+        return await future
+
+    def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        try:
+            results = self.score_batch([item for item, _ in pending])
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(pending, results):
+            if not future.done():
+                future.set_result(result)
+
+
+def score_batch(items):
+    """
+    Puntúa un lote de (LoadedModel, form_data, cache_key), con una llamada
+    vectorizada por versión de modelo: cada registro se puntúa con la versión
+    que tomó su petición, aunque haya habido una recarga mientras esperaba.
+    """
+    groups = {}
+    for position, (current, form_data, cache_key) in enumerate(items):
+        groups.setdefault(current, []).append(position)
+
+    responses = [None] * len(items)
+    for current, positions in groups.items():
+        group = score_model_batch(current, [items[position][1:] for position in positions])
+        for position, cached in zip(positions, group):
+            responses[position] = cached
+    return responses
+
+
+def score_model_batch(current, items):
+    """Puntúa un lote de (form_data, cache_key) con el LoadedModel `current`"""
+    name = current.name
+    # En modo ASGI encode, infer y serialize se miden por lote
+    started = time.perf_counter()
+    values = FEATURE_SCHEMA.input_values([form_data for form_data, _ in items])
+    encoded = FEATURE_SCHEMA.encode_values(values).tolist()
+    encoded_at = time.perf_counter()
+    metrics.observe_stage('encode', encoded_at - started)
+    predictions, probabilities = main.score_values(current, values)
+    inferred_at = time.perf_counter()
+    metrics.observe_stage('infer', inferred_at - encoded_at)
+
+    cache = main.response_caches.get(name)
+    responses = []
+    for i, (form_data, cache_key) in enumerate(items):
+        prob_no_attack = float(probabilities[i, 0]) if probabilities is not None else None
+        prob_attack = float(probabilities[i, 1]) if probabilities is not None else None
+        cached = main.prediction_response(
+            current, form_data, encoded[i], predictions[i], prob_no_attack, prob_attack, cache_key
+        )
+        if cache is not None:
+            cache.put(current.loaded_at, cache_key, cached)
+        responses.append(cached)
+    metrics.observe_stage('serialize', time.perf_counter() - inferred_at)
+    metrics.record_predictions('predict', len(items), model=name)
+    shadow = main.shadow_scorer(current)
+    if shadow is not None:
+        shadow.submit(values, predictions, probabilities)
+    logger.debug("Lote de %d predicciones del modelo %s puntuado", len(items), name)
+    return responses
+
+
+batcher = MicroBatcher(score_batch, Config.ASGI_BATCH_WINDOW_MS / 1000.0, Config.ASGI_MAX_BATCH)
+
+# Las peticiones en curso incluyen las que esperan en el micro-batch
+admission = AsyncAdmissionController(
+    Config.MAX_IN_FLIGHT or 4 * Config.ASGI_MAX_BATCH,
+    Config.ADMISSION_QUEUE_SIZE,
+    Config.ADMISSION_TIMEOUT_MS / 1000.0
+)
+
+
+def json_body(payload):
+    """Serializa igual que jsonify (claves ordenadas, separadores compactos)"""
+    return (json.dumps(payload, sort_keys=True, separators=(',', ':')) + '\n').encode()
+
+
+def is_json(content_type):
+    """Igual que request.is_json de Flask: solo cuenta el tipo de medio, sin parámetros como charset"""
+    mimetype = content_type.split(b';')[0].strip().lower()
+    return mimetype == b'application/json' or (mimetype.startswith(b'application/') and mimetype.endswith(b'+json'))
+
+
+async def send_response(send, status, body, headers=(), content_type=b'application/json'):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', content_type), (b'content-length', str(len(body)).encode())]
+        + list(headers),
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+async def predict(scope, receive, send):
+    """Equivalente ASGI de main.predict"""
+    headers = dict(scope['headers'])
+    body = await read_body(receive)
+    started = time.perf_counter()
+    try:
+        # Obtener datos del formulario
+        if is_json(headers.get(b'content-type', b'')):
+            data = json.loads(body or b'null')
+            if not isinstance(data, dict):
+                raise FeatureValidationError('El cuerpo debe ser un objeto JSON')
+        else:
+            data = dict(parse_qsl(body.decode()))
+        parsed = time.perf_counter()
+        metrics.observe_stage('parse', parsed - started)
+    except (ValueError, UnicodeDecodeError) as e:
+        logger.debug("Error de validación: %s", e)
+        return await send_response(send, 400, json_body({'error': str(e), 'status': 'error'}))
+
+    # Elegir el modelo por el campo `model` o la cabecera X-Model
+    name = data.get('model') if isinstance(data.get('model'), str) else None
+    name = name or headers.get(b'x-model', b'').decode('latin-1') or None
+    model_registry = main.model_pool.get(name)
+    if model_registry is None:
+        return await send_response(send, 400, json_body({
+            'error': f"Modelo desconocido: {name}. Modelos disponibles: {', '.join(main.model_pool.names)}",
+            'status': 'error'
+        }))
+    current = model_registry.current
+    if current is None:
+        logger.error("Intento de predicción con modelo no cargado")
+        return await send_response(send, 503, json_body({
+            'error': 'Modelo no disponible. Verifique que el archivo best_model.pkl exista.',
+            'status': 'error'
+        }))
+
+    try:
+        form_data = FEATURE_SCHEMA.validate(data)
+        metrics.observe_stage('validate', time.perf_counter() - parsed)
+    except ValueError as e:
+        logger.debug("Error de validación: %s", e)
+        return await send_response(send, 400, json_body({'error': str(e), 'status': 'error'}))
+
+    try:
+        cache_key = tuple(form_data[field] for field in FEATURE_SCHEMA.form_features)
+        cache = main.response_caches.get(current.name)
+        cached = None
+        if cache is not None:
+            cached = cache.get(current.loaded_at, cache_key)
+            metrics.record_cache_lookup(cached is not None)
+        from_cache = cached is not None
+        if from_cache:
+            metrics.record_predictions('predict', model=current.name)
+            shadow = main.shadow_scorer(current)
+            if shadow is not None:
+                shadow.submit(
+                    FEATURE_SCHEMA.input_values([form_data]), [cached.prediction],
+                    None if cached.probabilities is None else [cached.probabilities]
+                )
+        else:
+            cached = await batcher.submit((current, form_data, cache_key))
+        if main.audit_sink is not None:
+            main.audit_sink.record(
+                'predict', current, scope['request_id'], [form_data], [cached.prediction],
+                None if cached.probabilities is None else [cached.probabilities], block=False
+            )
+        if main.drift_monitor is not None:
+            main.drift_monitor.observe(form_data)
+    except Exception as e:
+        logger.exception("Error en predicción: %s", e)
+        return await send_response(send, 500, json_body({
+            'error': f'Error interno del servidor: {str(e)}',
+            'status': 'error',
+            'timestamp': datetime.now().isoformat()
+        }))
+
+    # Respuesta compacta (solo predicción y probabilidades): bytes ya construidos
+    query = dict(parse_qsl(scope.get('query_string', b'').decode('latin-1')))
+    compact = compact_requested(query.get('compact'), headers.get(b'accept', b'').decode('latin-1'))
+    # Con ?explain=1 se añade la explicación precalculada de esta entrada
+    explain = query_flag(query.get('explain'))
+
+    etag_headers = []
+    if Config.RESPONSE_ETAG:
+        variant = ('-c' if compact else '') + ('-e' if explain else '')
+        etag = f'W/"{cached.etag}{variant}"'.encode()
+        etag_headers.append((b'etag', etag))
+        if etag in [tag.strip() for tag in headers.get(b'if-none-match', b'').split(b',')]:
+            await send({'type': 'http.response.start', 'status': 304, 'headers': etag_headers})
+            return await send({'type': 'http.response.body', 'body': b''})
+    rendering = time.perf_counter()
+    body = cached.compact_body if compact else cached.render(datetime.now().isoformat())
+    if explain:
+        body = with_explanation(body, main.explanation_for(current, form_data))
+    if from_cache:
+        metrics.observe_stage('serialize', time.perf_counter() - rendering)
+    await send_response(send, 200, body, etag_headers)
+
+
+async def health(scope, receive, send):
+    body, status_code = main.health_body(admission)
+    await send_response(send, status_code, body)
+
+
+async def model_info(scope, receive, send):
+    query = dict(parse_qsl(scope.get('query_string', b'').decode('latin-1')))
+    body, status_code = main.model_info_body(query.get('model'))
+    await send_response(send, status_code, body)
+
+
+async def api_data(scope, receive, send):
+    await send_response(send, 200, main.system_data_body())
+
+
+async def drift_report(scope, receive, send):
+    query = dict(parse_qsl(scope.get('query_string', b'').decode('latin-1')))
+    payload, status_code = main.drift_payload(query.get('model'), query.get('window'))
+    await send_response(send, status_code, json_body(payload))
+
+
+async def scoring_bundle(scope, receive, send):
+    query = dict(parse_qsl(scope.get('query_string', b'').decode('latin-1')))
+    if_none_match = dict(scope['headers']).get(b'if-none-match', b'').decode('latin-1')
+    body, status_code, headers = main.scoring_bundle_response(query.get('model'), query.get('v'), if_none_match)
+    headers = [(name.lower().encode(), value.encode('latin-1')) for name, value in headers.items()]
+    if status_code == 304:
+        await send({'type': 'http.response.start', 'status': 304, 'headers': headers})
+        return await send({'type': 'http.response.body', 'body': b''})
+    await send_response(send, status_code, body, headers)
+
+
+async def prometheus_metrics(scope, receive, send):
+    if not metrics.PROMETHEUS_AVAILABLE:
+        return await send_response(send, 503, json_body({
+            'error': 'Métricas no disponibles: instale prometheus_client',
+            'status': 'error'
+        }))
+    await send_response(send, 200, metrics.render_metrics(), content_type=metrics.CONTENT_TYPE_LATEST.encode())
+
+
+ROUTES = {
+    '/predict': ('POST', predict),
+    '/health': ('GET', health),
+    '/model-info': ('GET', model_info),
+    '/api/data': ('GET', api_data),
+    '/monitoring/drift': ('GET', drift_report),
+    '/scoring-bundle': ('GET', scoring_bundle),
+    '/metrics': ('GET', prometheus_metrics),
+}
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            main.start_worker()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """Aplicación ASGI"""
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+
+    started = time.perf_counter()
+    request_id = main.request_id_from(dict(scope['headers']).get(b'x-request-id', b'').decode('latin-1'))
+    status = 500
+
+    async def send_with_request_id(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+            message['headers'] = list(message.get('headers', [])) + [(b'x-request-id', request_id.encode('latin-1'))]
+        await send(message)
+
+    try:
+        await dispatch(dict(scope, request_id=request_id), receive, send_with_request_id)
+    finally:
+        elapsed = time.perf_counter() - started
+        route = scope['path'] if scope['path'] in ROUTES else 'unmatched'
+        metrics.record_request(route, scope['method'], status, elapsed)
+        if Config.ACCESS_LOG:
+            current = main.registry.current
+            log_request(
+                Config.LOG_SAMPLE_RATE, request_id, scope['method'], scope['path'], status,
+                elapsed * 1000.0,
+                current.version if current is not None else None
+            )
+
+
+async def dispatch(scope, receive, send):
+    if scope['path'] in main.ADMISSION_EXEMPT:
+        return await route_request(scope, receive, send)
+
+    queued = None
+    if Config.QUEUE_START_HEADER:
+        header = dict(scope['headers']).get(Config.QUEUE_START_HEADER.lower().encode(), b'')
+        queued = queued_seconds(header.decode('latin-1'))
+    try:
+        admitted_at = await admission.acquire(queued or 0.0)
+    except Rejected as e:
+        metrics.record_rejection(e.reason)
+        logger.debug("Petición rechazada por saturación (%s)", e.reason)
+        return await send_response(
+            send, 503, json_body(main.overloaded_payload(e)), [(b'retry-after', str(e.retry_after).encode())]
+        )
+    try:
+        await route_request(scope, receive, send)
+    finally:
+        admission.release(admitted_at)
+
+
+async def route_request(scope, receive, send):
+    route = ROUTES.get(scope['path'])
+    if route is None:
+        return await send_response(send, 404, json_body({'error': 'Endpoint no encontrado', 'status': 'error'}))
+    method, handler = route
+    if scope['method'] != method:
+        return await send_response(send, 405, json_body({'error': 'Método no permitido', 'status': 'error'}))
+
+    response_started = False
+
+    async def tracked_send(message):
+        nonlocal response_started
+        if message['type'] == 'http.response.start':
+            response_started = True
+        await send(message)
+
+    try:
+        await handler(scope, receive, tracked_send)
+    except Exception as e:
+        # Igual que el errorhandler(500) de Flask: ningún error sale como un 500 sin cuerpo JSON
+        logger.exception("Error no controlado en %s: %s", scope['path'], e)
+        if response_started:
+            raise
+        await send_response(send, 500, json_body({'error': 'Error interno del servidor', 'status': 'error'}))
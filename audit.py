@@ -0,0 +1,185 @@
+"""
+Registro de auditoría de predicciones: NDJSON rotado, solo de anexado.
+
+Cada predicción servida (entrada validada, predicción, probabilidades, modelo,
+versión, id de la petición y hora) se guarda como una línea JSON. La petición
+solo encola referencias a lo que ya tiene; un hilo en segundo plano forma las
+líneas y las escribe por lotes, al juntar AUDIT_BATCH_SIZE registros o cada
+AUDIT_FLUSH_INTERVAL segundos, con un fsync por lote.
+
+Cada proceso escribe en sus propios archivos (audit-<fecha>-<pid>-<n>.ndjson)
+y abre uno nuevo al superar AUDIT_ROTATE_MB, así que los workers de gunicorn
+nunca intercalan líneas. Si la cola se llena la petición espera hasta
+AUDIT_BLOCK_MS (contrapresión) antes de descartar el registro y contarlo.
+Al terminar el proceso se vacía la cola. read_audit.py lee los archivos.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+import metrics
+from response_cache import dumps
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class AuditSink:
+    """Cola de registros de auditoría y el hilo que los escribe por lotes"""
+
+    def __init__(self, directory, batch_size=1000, flush_interval=1.0, max_pending=10000,
+                 rotate_bytes=64 * 1024 * 1024, block_timeout=1.0):
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.rotate_bytes = rotate_bytes
+        self.block_timeout = block_timeout
+        self.written = 0
+        self.dropped = 0
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._file = None
+        self._file_index = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _ensure_thread(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # Tras un fork la cola y el archivo heredados son del máster
+            self._queue = queue.Queue(self.max_pending)
+            self._file = None
+            self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+            atexit.register(self.close)
+
+    def record(self, endpoint, current, request_id, rows, predictions, probabilities, block=True):
+        """
+        Encola las predicciones de una petición: `rows` son los registros
+        validados y `predictions` / `probabilities` las salidas en el mismo orden.
+        Con block=False (bucle de eventos ASGI) no se espera a que haya sitio.
+        """
+        self._ensure_thread()
+        item = (time.time(), endpoint, current.name, current.version, request_id, rows, predictions, probabilities)
+        try:
+            self._queue.put(item, block=block, timeout=self.block_timeout)
+        except queue.Full:
+            self.dropped += len(rows)
+            metrics.record_audit(len(rows), written=False)
+            logger.error(f"Cola de auditoría llena: se descartan {len(rows)} registros")
+
+    def _run(self):
+        pending = []
+        rows = 0
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                self._flush(pending)
+                self._close_file()
+                return
+            if item is not None:
+                pending.append(item)
+                rows += len(item[5])
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            if pending and (rows >= self.batch_size or time.monotonic() >= deadline):
+                self._flush(pending)
+                pending, rows, deadline = [], 0, None
+
+    def _flush(self, items):
+        """Escribe un lote; si falla por cualquier motivo se descarta y el hilo sigue vivo"""
+        try:
+            self._write(items)
+        except Exception as e:
+            # p. ej. un valor que no se puede serializar: sin esto el hilo
+            # moriría y cada petición esperaría AUDIT_BLOCK_MS con la cola llena
+            count = sum(len(item[5]) for item in items)
+            self.dropped += count
+            metrics.record_audit(count, written=False)
+            logger.exception(f"Error al escribir el registro de auditoría: se descartan {count} registros: {e}")
+
+    def _write(self, items):
+        if not items:
+            return
+        # La hora se toma antes de encolar, así que con varios hilos los
+        # registros pueden llegar desordenados; read_audit.py espera orden
+        items.sort(key=lambda item: item[0])
+        lines = []
+        for timestamp, endpoint, model, version, request_id, rows, predictions, probabilities in items:
+            ts = datetime.fromtimestamp(timestamp).isoformat()
+            for i, form_data in enumerate(rows):
+                lines.append(dumps({
+                    'ts': ts,
+                    'request_id': request_id,
+                    'endpoint': endpoint,
+                    'model': model,
+                    'model_version': version,
+                    'input': form_data,
+                    'prediction': int(predictions[i]),
+                    'probability_no_attack': float(probabilities[i][0]) if probabilities is not None else None,
+                    'probability_attack': float(probabilities[i][1]) if probabilities is not None else None,
+                }))
+        data = b'\n'.join(lines) + b'\n'
+        try:
+            file = self._current_file(len(data))
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        except OSError as e:
+            self.dropped += len(lines)
+            metrics.record_audit(len(lines), written=False)
+            logger.error(f"No se pudo escribir el registro de auditoría: {e}")
+            self._close_file()
+            return
+        self.written += len(lines)
+        metrics.record_audit(len(lines), written=True)
+
+    def _current_file(self, incoming):
+        if self._file is not None and self._file.tell() + incoming > self.rotate_bytes:
+            self._close_file()
+        if self._file is None:
+            self._file_index += 1
+            name = f"audit-{datetime.now().strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{self._file_index}.ndjson"
+            self._file = open(os.path.join(self.directory, name), 'ab')
+        return self._file
+
+    def _close_file(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
+    def close(self):
+        """Escribe lo pendiente y detiene el hilo (al salir del proceso o del worker)"""
+        if self._pid != os.getpid() or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout=10)
+
+    def stats(self):
+        return {
+            'enabled': True,
+            'directory': self.directory,
+            'written': self.written,
+            'dropped': self.dropped,
+            'pending': self._queue.qsize() if self._pid == os.getpid() else 0
+        }
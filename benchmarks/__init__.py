@@ -0,0 +1,8 @@
+"""
+Benchmark suite for the serving stack.
+
+Run from the repository root:
+    python -m benchmarks.micro -o micro.json
+    python -m benchmarks.load -o load.json --workers 2 --concurrency 16
+    python -m benchmarks.compare micro.json --baseline baseline-micro.json
+"""
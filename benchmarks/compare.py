@@ -0,0 +1,35 @@
+"""
+Compare a benchmark report against a saved baseline.
+
+Exits with status 1 when throughput drops, or p50/p95/p99 latency grows, by
+more than the tolerance in any benchmark present in both reports.
+
+Usage:
+    python -m benchmarks.compare load.json --baseline baseline-load.json --tolerance 0.15
+"""
+
+import argparse
+import sys
+
+from benchmarks.report import compare, load_report, print_comparison
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('report', help='Report to check')
+    parser.add_argument('--baseline', required=True, help='Saved baseline report')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='Allowed relative slowdown before a metric is flagged (default: 0.10)')
+    args = parser.parse_args(argv)
+
+    report = load_report(args.report)
+    baseline = load_report(args.baseline)
+    if report.get('suite') != baseline.get('suite'):
+        print(f"Warning: comparing a '{report.get('suite')}' report with a '{baseline.get('suite')}' baseline",
+              file=sys.stderr)
+    rows = compare(report, baseline, args.tolerance)
+    return 1 if print_comparison(rows, args.tolerance) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,365 @@
+"""
+Load generator for the HTTP service.
+
+Starts the service locally (gunicorn main:app with gunicorn.conf.py, or
+uvicorn asgi:app), waits until /health answers, and drives it from a pool of
+client threads (closed loop: each thread sends its next request as soon as
+the previous one is answered). Reports throughput and p50/p95/p99 latency
+per scenario and overall.
+
+Traffic comes from a weighted mix of scenarios (see SCENARIOS), generated
+with a fixed seed, or is replayed from a request log with --replay. A replay
+file has one JSON object per line:
+    {"method": "POST", "path": "/predict", "json": {...}}
+    {"method": "POST", "path": "/predict", "body": "PhysicalActivities=1&...",
+     "headers": {"Content-Type": "application/x-www-form-urlencoded"}}
+    {"path": "/health"}
+"name" optionally sets the scenario the request is reported under.
+
+Usage:
+    python -m benchmarks.load -o load.json --workers 4 --concurrency 32 --duration 30
+    python -m benchmarks.load --replay traffic.jsonl --requests 100000
+    python -m benchmarks.load --url http://127.0.0.1:5000 --mix predict=90,health=10
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlencode, urlsplit
+
+from benchmarks.report import add_output_arguments, build_report, finish, summarize
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> weight of the default traffic mix
+DEFAULT_MIX = {
+    'predict': 70,
+    'predict_form': 10,
+    'predict_invalid': 5,
+    'predict_batch': 5,
+    'health': 5,
+    'model_info': 5,
+}
+
+BATCH_SIZE = 100
+
+
+class Request:
+    """One prepared HTTP request and the statuses that count as a success"""
+
+    __slots__ = ('name', 'method', 'path', 'body', 'headers', 'expected')
+
+    def __init__(self, name, method, path, body=None, headers=None, expected=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.body = body
+        self.headers = headers or {}
+        self.expected = expected
+
+
+def random_record(rng, form_domains):
+    return {field: str(rng.choice(values)) for field, values in form_domains}
+
+
+def json_request(name, path, payload, expected):
+    return Request(name, 'POST', path, json.dumps(payload).encode(), {'Content-Type': 'application/json'}, expected)
+
+
+def make_scenario(name, rng, form_domains):
+    """Build one request of the given scenario"""
+    if name == 'predict':
+        return json_request(name, '/predict', random_record(rng, form_domains), (200,))
+    if name == 'predict_form':
+        return Request(
+            name, 'POST', '/predict', urlencode(random_record(rng, form_domains)).encode(),
+            {'Content-Type': 'application/x-www-form-urlencoded'}, (200,)
+        )
+    if name == 'predict_invalid':
+        record = random_record(rng, form_domains)
+        field = rng.choice(sorted(record))
+        if rng.random() < 0.5:
+            del record[field]
+        else:
+            record[field] = '7'
+        return json_request(name, '/predict', record, (400,))
+    if name == 'predict_batch':
+        records = [random_record(rng, form_domains) for _ in range(BATCH_SIZE)]
+        return json_request(name, '/predict/batch', records, (200,))
+    if name == 'health':
+        return Request(name, 'GET', '/health', expected=(200,))
+    if name == 'model_info':
+        return Request(name, 'GET', '/model-info', expected=(200,))
+    raise ValueError(f'Unknown scenario: {name}')
+
+
+def generate_mix(mix, count, seed):
+    """`count` requests drawn from the weighted mix with a fixed seed"""
+    from features import FEATURE_SCHEMA
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    return [
+        make_scenario(name, rng, FEATURE_SCHEMA.form_domains)
+        for name in rng.choices(names, weights, k=count)
+    ]
+
+
+def read_replay(path):
+    """Requests from a replay file, in file order"""
+    requests = []
+    with open(path, encoding='utf-8') as file:
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                headers = dict(entry.get('headers') or {})
+                body = None
+                if 'json' in entry:
+                    body = json.dumps(entry['json']).encode()
+                    headers.setdefault('Content-Type', 'application/json')
+                elif entry.get('body') is not None:
+                    body = entry['body'].encode()
+                method = entry.get('method') or ('POST' if body is not None else 'GET')
+                requests.append(Request(
+                    entry.get('name') or f"{method} {entry['path']}", method, entry['path'], body, headers
+                ))
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                raise ValueError(f'{path}:{line_number}: invalid replay entry ({e})')
+    if not requests:
+        raise ValueError(f'{path}: no requests to replay')
+    return requests
+
+
+def parse_mix(text):
+    """'predict=80,health=20' -> {'predict': 80.0, 'health': 20.0}"""
+    mix = {}
+    for item in text.split(','):
+        name, _, weight = item.partition('=')
+        if name.strip() not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown scenario '{name}' (choose from {', '.join(DEFAULT_MIX)})")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(kind, port, workers, threads, log_path):
+    """Start the service in a subprocess; returns the Popen"""
+    env = dict(os.environ, PORT=str(port), WEB_CONCURRENCY=str(workers))
+    if threads is not None:
+        # Otherwise gunicorn.conf.py sizes the gthread pool from the admission settings
+        env['GUNICORN_THREADS'] = str(threads)
+    env.setdefault('LOG_LEVEL', 'WARNING')
+    if kind == 'gunicorn':
+        command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'main:app']
+    else:
+        command = [sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1', '--port', str(port),
+                   '--workers', str(workers), '--no-access-log']
+    log = open(log_path, 'ab') if log_path else subprocess.DEVNULL
+    return subprocess.Popen(command, cwd=REPO_ROOT, env=env, stdout=log, stderr=log, start_new_session=True)
+
+
+def stop_server(process):
+    if process.poll() is None:
+        os.killpg(process.pid, signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
+
+
+def wait_until_ready(host, port, timeout, process=None):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f'The server exited with status {process.returncode}')
+        try:
+            connection = http.client.HTTPConnection(host, port, timeout=2)
+            connection.request('GET', '/health')
+            if connection.getresponse().status == 200:
+                connection.close()
+                return
+            connection.close()
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'The server at {host}:{port} was not ready after {timeout}s')
+
+
+class LoadRun:
+    """Client threads sharing one request sequence and one stop condition"""
+
+    def __init__(self, host, port, requests, concurrency, timeout):
+        self.host = host
+        self.port = port
+        self.requests = requests
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._sequence = itertools.count()
+
+    def _worker(self, stop_at, limit, recording, results):
+        latencies = {}
+        errors = Counter()
+        statuses = Counter()
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        clock = time.perf_counter
+        requests = self.requests
+        while True:
+            index = next(self._sequence)
+            if (limit is not None and index >= limit) or (stop_at is not None and clock() >= stop_at):
+                break
+            request = requests[index % len(requests)]
+            start = clock()
+            try:
+                connection.request(request.method, request.path, request.body, request.headers)
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                status = None
+            elapsed = clock() - start
+            if not recording:
+                continue
+            latencies.setdefault(request.name, []).append(elapsed)
+            statuses[(request.name, status)] += 1
+            expected = request.expected
+            if status is None or (status not in expected if expected else status >= 500):
+                errors[request.name] += 1
+        connection.close()
+        results.append((latencies, errors, statuses))
+
+    def run(self, duration=None, limit=None, recording=True):
+        """Run until `duration` seconds pass or `limit` requests are sent; returns merged results"""
+        self._sequence = itertools.count()
+        stop_at = time.perf_counter() + duration if duration is not None else None
+        results = []
+        threads = [
+            threading.Thread(target=self._worker, args=(stop_at, limit, recording, results), daemon=True)
+            for _ in range(self.concurrency)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        latencies = {}
+        errors = Counter()
+        statuses = Counter()
+        for thread_latencies, thread_errors, thread_statuses in results:
+            for name, values in thread_latencies.items():
+                latencies.setdefault(name, []).extend(values)
+            errors.update(thread_errors)
+            statuses.update(thread_statuses)
+        return latencies, errors, statuses, elapsed
+
+
+def summarize_run(latencies, errors, statuses, elapsed):
+    results = {}
+    for name in sorted(latencies):
+        summary = summarize(latencies[name], elapsed, errors[name])
+        summary['status_counts'] = {
+            str(status): count for (scenario, status), count in sorted(statuses.items(), key=str)
+            if scenario == name
+        }
+        results[name] = summary
+    results['all'] = summarize(
+        [value for values in latencies.values() for value in values], elapsed, sum(errors.values())
+    )
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_argument_group('target')
+    target.add_argument('--url', help='Drive an already running server instead of starting one')
+    target.add_argument('--server', choices=['gunicorn', 'uvicorn'], default='gunicorn',
+                        help='Server to start locally (default: gunicorn)')
+    target.add_argument('--workers', type=int, default=2, help='Server worker processes (default: 2)')
+    target.add_argument('--threads', type=int, default=None,
+                        help='Threads per gunicorn worker (default: sized by gunicorn.conf.py)')
+    target.add_argument('--server-log', help='Append the server output to this file')
+    target.add_argument('--startup-timeout', type=float, default=60)
+
+    traffic = parser.add_argument_group('traffic')
+    traffic.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                         help='Scenario weights, e.g. predict=80,predict_batch=5,health=15')
+    traffic.add_argument('--replay', help='Replay requests from this JSON-lines file instead of the mix')
+    traffic.add_argument('--pool', type=int, default=20000, help='Distinct mix requests generated (default: 20000)')
+    traffic.add_argument('--seed', type=int, default=42)
+    traffic.add_argument('--concurrency', type=int, default=8, help='Client threads (default: 8)')
+    traffic.add_argument('--duration', type=float, default=20, help='Seconds to run (default: 20)')
+    traffic.add_argument('--requests', type=int, help='Send exactly this many requests instead of running for --duration')
+    traffic.add_argument('--warmup', type=float, default=2, help='Untimed warm-up seconds (default: 2)')
+    traffic.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds')
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    requests = read_replay(args.replay) if args.replay else generate_mix(args.mix, args.pool, args.seed)
+
+    process = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+    else:
+        host, port = '127.0.0.1', free_port()
+        process = start_server(args.server, port, args.workers, args.threads, args.server_log)
+    try:
+        wait_until_ready(host, port, args.startup_timeout, process)
+        run = LoadRun(host, port, requests, args.concurrency, args.timeout)
+        if args.warmup > 0:
+            run.run(duration=args.warmup, recording=False)
+        if args.requests:
+            latencies, errors, statuses, elapsed = run.run(limit=args.requests)
+        else:
+            latencies, errors, statuses, elapsed = run.run(duration=args.duration)
+    finally:
+        if process is not None:
+            stop_server(process)
+
+    results = summarize_run(latencies, errors, statuses, elapsed)
+    overall = results['all']
+    print(
+        f"{overall['count']} requests in {elapsed:.1f}s: {overall['throughput_per_s']:.0f} req/s, "
+        f"p50 {overall['latency_ms']['p50']:.2f} ms, p99 {overall['latency_ms']['p99']:.2f} ms, "
+        f"{overall['errors']} errors",
+        file=sys.stderr
+    )
+
+    config = {
+        'target': args.url or args.server,
+        'workers': None if args.url else args.workers,
+        'threads': None if args.url or args.server != 'gunicorn' else args.threads,
+        'concurrency': args.concurrency,
+        'duration': None if args.requests else args.duration,
+        'requests': args.requests,
+        'warmup': args.warmup,
+        'traffic': {'replay': os.path.basename(args.replay)} if args.replay else {'mix': args.mix, 'seed': args.seed},
+    }
+    return finish(build_report('load', config, results), args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
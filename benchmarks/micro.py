@@ -0,0 +1,178 @@
+"""
+Micro-benchmarks of the /predict stages, each timed in isolation.
+
+Stages: validation, one-hot encoding, the original estimator's predict and
+predict_proba, the serving scorer (compiled kernel when available), the
+prediction table lookup, jsonify of the response dict and rendering of a
+cached response. The full request is also timed through Flask's test client,
+with and without the response cache.
+
+Inputs are drawn from the schema domains with a fixed seed, so two runs on
+the same machine time the same work. Logging defaults to WARNING (set
+LOG_LEVEL=INFO to include the access log in the request timings).
+
+Usage:
+    python -m benchmarks.micro -o micro.json
+    python -m benchmarks.micro --iterations 50000 --baseline baseline-micro.json
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import warnings
+
+from benchmarks.report import add_output_arguments, build_report, finish, summarize
+
+
+def make_inputs(schema, count, seed):
+    """Valid raw form payloads (string values, as the web form sends them)"""
+    rng = random.Random(seed)
+    return [
+        {field: str(rng.choice(values)) for field, values in schema.form_domains}
+        for _ in range(count)
+    ]
+
+
+def time_calls(func, args, iterations, warmup):
+    """Per-call latencies of func(arg) cycling over args"""
+    n = len(args)
+    for i in range(warmup):
+        func(args[i % n])
+    latencies = [0.0] * iterations
+    clock = time.perf_counter
+    for i in range(iterations):
+        arg = args[i % n]
+        start = clock()
+        func(arg)
+        latencies[i] = clock() - start
+    return latencies
+
+
+def stage_benchmarks(service, inputs):
+    """name -> (function, arguments) for every stage measured in isolation"""
+    schema = service.FEATURE_SCHEMA
+    current = service.registry.current
+    forms = [schema.validate(data) for data in inputs]
+    # Copies: encode() returns a buffer reused by every call in the thread
+    arrays = [schema.encode(form).copy() for form in forms]
+    keys = [tuple(form[field] for field in schema.form_features) for form in forms]
+    responses = [
+        service.build_prediction_response(current, form, key) for form, key in zip(forms, keys)
+    ]
+    bodies = []
+    for form, array in zip(forms, arrays):
+        prediction, probabilities = current.scorer.score(array)
+        bodies.append({
+            'prediction': int(prediction[0]),
+            'result': service.describe_prediction(prediction[0]),
+            'probability_no_attack': float(probabilities[0, 0]) if probabilities is not None else None,
+            'probability_attack': float(probabilities[0, 1]) if probabilities is not None else None,
+            'status': 'success',
+            'input_features': form,
+            'model_features': dict(zip(schema.model_features, array[0].tolist())),
+            'model_version': current.version,
+            'timestamp': '2024-01-01T00:00:00.000000',
+        })
+
+    def jsonify_body(body):
+        with service.app.app_context():
+            service.jsonify(body)
+
+    benchmarks = {
+        'validate': (schema.validate, inputs),
+        'encode': (schema.encode, forms),
+        'model.predict': (current.model.predict, arrays),
+        'scorer.score': (current.scorer.score, arrays),
+        'jsonify': (jsonify_body, bodies),
+        'cached_response.render': (lambda cached: cached.render('2024-01-01T00:00:00.000000'), responses),
+    }
+    if hasattr(current.model, 'predict_proba'):
+        benchmarks['model.predict_proba'] = (current.model.predict_proba, arrays)
+    if current.table is not None:
+        benchmarks['table.lookup'] = (current.table.lookup, forms)
+    return benchmarks
+
+
+def request_benchmarks(service, inputs):
+    """name -> (function, arguments) for full /predict requests through the test client"""
+    client = service.app.test_client()
+
+    def post(data, path='/predict'):
+        response = client.post(path, json=data)
+        if response.status_code != 200:
+            raise RuntimeError(f'{path} answered {response.status_code}')
+
+    def post_compact(data):
+        post(data, '/predict?compact=1')
+
+    def post_explain(data):
+        post(data, '/predict?explain=1')
+
+    def post_uncached(data):
+        caches, service.response_caches = service.response_caches, {}
+        try:
+            post(data)
+        finally:
+            service.response_caches = caches
+
+    return {
+        'request.predict': (post, inputs),
+        'request.predict_uncached': (post_uncached, inputs),
+        'request.predict_compact': (post_compact, inputs),
+        'request.predict_explain': (post_explain, inputs),
+        'request.health': (lambda _: client.get('/health'), inputs),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=20000, help='Timed calls per stage (default: 20000)')
+    parser.add_argument('--requests', type=int, default=3000,
+                        help='Timed test-client requests per request benchmark (default: 3000)')
+    parser.add_argument('--warmup', type=float, default=0.1, help='Untimed warm-up calls, as a fraction (default: 0.1)')
+    parser.add_argument('--inputs', type=int, default=512, help='Distinct random inputs to cycle over (default: 512)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--only', nargs='+', metavar='NAME', help='Run only these benchmarks')
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+    import main as service
+    if service.registry.current is None:
+        print('The model could not be loaded; check MODEL_PATH', file=sys.stderr)
+        return 2
+
+    inputs = make_inputs(service.FEATURE_SCHEMA, args.inputs, args.seed)
+    plans = [(name, func, call_args, args.iterations) for name, (func, call_args) in
+             stage_benchmarks(service, inputs).items()]
+    plans += [(name, func, call_args, args.requests) for name, (func, call_args) in
+              request_benchmarks(service, inputs).items()]
+
+    results = {}
+    for name, func, call_args, iterations in plans:
+        if args.only and name not in args.only:
+            continue
+        latencies = time_calls(func, call_args, iterations, int(iterations * args.warmup))
+        results[name] = summarize(latencies)
+        print(f"{name:<28} p50 {results[name]['latency_ms']['p50'] * 1000:9.2f} us", file=sys.stderr)
+
+    current = service.registry.current
+    config = {
+        'iterations': args.iterations,
+        'requests': args.requests,
+        'inputs': args.inputs,
+        'seed': args.seed,
+        'model_version': current.version,
+        'model_type': type(current.model).__name__,
+        'compiled_kernel': getattr(current.scorer.model, 'kernel', None),
+        'prediction_table': current.table is not None,
+        'response_cache': bool(service.response_caches),
+    }
+    return finish(build_report('micro', config, results), args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""
+Result format shared by the benchmark runners, and baseline comparison.
+
+A report is a JSON object:
+    {"suite": ..., "created_at": ..., "environment": {...}, "config": {...},
+     "results": {name: {"count", "errors", "duration_s", "throughput_per_s",
+                        "latency_ms": {"mean", "p50", "p95", "p99", "max"}}}}
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+import numpy as np
+
+# Metrics checked by the comparison and whether a higher value is better
+COMPARED_METRICS = (
+    ('throughput_per_s', True),
+    ('latency_ms.p50', False),
+    ('latency_ms.p95', False),
+    ('latency_ms.p99', False),
+)
+
+
+def summarize(latencies_s, duration_s=None, errors=0):
+    """Summary of a list of per-operation latencies in seconds"""
+    latencies = np.asarray(latencies_s, dtype=np.float64) * 1000.0
+    if duration_s is None:
+        duration_s = float(latencies.sum()) / 1000.0
+    summary = {
+        'count': int(latencies.size),
+        'errors': int(errors),
+        'duration_s': round(duration_s, 6),
+        'throughput_per_s': round(latencies.size / duration_s, 3) if duration_s > 0 else None,
+        'latency_ms': None,
+    }
+    if latencies.size:
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        summary['latency_ms'] = {
+            'mean': round(float(latencies.mean()), 6),
+            'p50': round(float(p50), 6),
+            'p95': round(float(p95), 6),
+            'p99': round(float(p99), 6),
+            'max': round(float(latencies.max()), 6),
+        }
+    return summary
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment():
+    """Details needed to tell whether two reports are comparable"""
+    import sklearn
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'sklearn': sklearn.__version__,
+        'git_commit': _git_commit(),
+    }
+
+
+def build_report(suite, config, results):
+    return {
+        'suite': suite,
+        'created_at': datetime.now().isoformat(),
+        'environment': environment(),
+        'config': config,
+        'results': results,
+    }
+
+
+def write_report(report, path=None):
+    """Write the report to `path`, or to stdout when no path is given"""
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if path:
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(text + '\n')
+    else:
+        sys.stdout.write(text + '\n')
+
+
+def load_report(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def _metric(result, dotted):
+    value = result
+    for key in dotted.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def compare(report, baseline, tolerance=0.10):
+    """
+    Compare every result present in both reports.
+
+    Returns a list of rows (name, metric, baseline, current, relative change,
+    regressed). A metric regresses when it is worse than the baseline by more
+    than `tolerance` (a fraction).
+    """
+    rows = []
+    for name, result in sorted(report['results'].items()):
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS:
+            current_value = _metric(result, metric)
+            base_value = _metric(base, metric)
+            if not current_value or not base_value:
+                continue
+            change = (current_value - base_value) / base_value
+            worse = -change if higher_is_better else change
+            rows.append((name, metric, base_value, current_value, change, worse > tolerance))
+    return rows
+
+
+def print_comparison(rows, tolerance, stream=sys.stderr):
+    """Print the comparison table; returns True if any metric regressed"""
+    stream.write(f"{'benchmark':<28} {'metric':<18} {'baseline':>12} {'current':>12} {'change':>9}\n")
+    regressed = False
+    for name, metric, base_value, current_value, change, is_regression in rows:
+        flag = '  REGRESSION' if is_regression else ''
+        stream.write(
+            f'{name:<28} {metric:<18} {base_value:>12.4f} {current_value:>12.4f} {change:>+8.1%}{flag}\n'
+        )
+        regressed = regressed or is_regression
+    if not rows:
+        stream.write('No benchmarks in common with the baseline\n')
+    stream.write(
+        f"{'Regressions found' if regressed else 'No regressions'} (tolerance {tolerance:.0%})\n"
+    )
+    return regressed
+
+
+def add_output_arguments(parser):
+    """--output / --baseline / --tolerance, shared by the runners"""
+    parser.add_argument('-o', '--output', help='Write the JSON report here (default: stdout)')
+    parser.add_argument('--baseline', help='Compare against this saved report and exit 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='Allowed relative slowdown before a metric is flagged (default: 0.10)')
+
+
+def finish(report, args):
+    """Write the report and run the baseline comparison if requested; returns the exit code"""
+    write_report(report, args.output)
+    if args.baseline:
+        rows = compare(report, load_report(args.baseline), args.tolerance)
+        return 1 if print_comparison(rows, args.tolerance) else 0
+    return 0
@@ -2,6 +2,9 @@ import os
 import logging
 import sys
 
+from features import FEATURE_SCHEMA, SchemaMismatchError
+from model_artifact import ArtifactError, is_artifact, load_artifact, read_manifest, verify_artifact
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -14,6 +17,8 @@ def check_model_file(model_path='best_model.pkl'):
     logger.info(f"Current working directory: {os.getcwd()}")
     
     if os.path.exists(model_path):
+        if is_artifact(model_path):
+            return check_artifact(model_path)
         file_size = os.path.getsize(model_path)
         logger.info(f"✅ Model file exists! Size: {file_size} bytes")
         return True
@@ -24,6 +29,27 @@ def check_model_file(model_path='best_model.pkl'):
         logger.info(f"Files in current directory: {files}")
         return False
 
+def check_artifact(artifact_path):
+    """Validate an exported artifact: manifest, content hash, array hashes and feature schema"""
+    try:
+        manifest = read_manifest(artifact_path)
+        logger.info(f"✅ Manifest is valid (format version {manifest['format_version']})")
+        logger.info(f"   Estimator: {manifest.get('estimator')} ({manifest['kernel']} kernel), "
+                    f"exported with scikit-learn {manifest.get('sklearn_version')}")
+        logger.info(f"   Classes: {manifest['classes']}")
+
+        verify_artifact(artifact_path, manifest)
+        logger.info(f"✅ Content hash and {len(manifest['arrays'])} array hashes match "
+                    f"(version {manifest['content_hash'][:12]})")
+
+        model, _ = load_artifact(artifact_path)
+        FEATURE_SCHEMA.check_model(model)
+        logger.info(f"✅ Features match the service schema: {manifest['feature_names']}")
+        return True
+    except (ArtifactError, SchemaMismatchError) as e:
+        logger.error(f"❌ Invalid model artifact: {e}")
+        return False
+
 if __name__ == "__main__":
     model_path = 'best_model.pkl'
     if len(sys.argv) > 1:
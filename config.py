@@ -13,6 +13,90 @@ class Config:
     
     # Logging configuration
     LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    # 'json' (one JSON object per line) or 'text'; access lines are always JSON
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')
+    # One structured line per request with request id, latency and model version
+    ACCESS_LOG = os.environ.get('ACCESS_LOG', 'True').lower() == 'true'
+    # Fraction of requests whose access line is written (5xx are always logged)
+    LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', 1.0))
+    # Records waiting for the background log writer; extra records are dropped
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+    
+    # Precompute predictions for every possible input at model load time
+    PREDICTION_TABLE = os.environ.get('PREDICTION_TABLE', 'True').lower() == 'true'
+    
+    # Maximum number of records accepted by /predict/batch
+    BATCH_MAX_ROWS = int(os.environ.get('BATCH_MAX_ROWS', 50000))
+    
+    # Probability of the positive class above which a prediction is "high risk"
+    DECISION_THRESHOLD = float(os.environ.get('DECISION_THRESHOLD', 0.5))
+    
+    # Serve supported estimators from a pure-NumPy kernel instead of sklearn
+    COMPILE_MODEL = os.environ.get('COMPILE_MODEL', 'True').lower() == 'true'
+    
+    # Hot reload: poll MODEL_PATH for changes every N seconds (0 disables it)
+    MODEL_WATCH_INTERVAL = float(os.environ.get('MODEL_WATCH_INTERVAL', 0))
+    # Token required by POST /admin/reload (the endpoint is disabled when empty)
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')
+    # How often each worker checks for reloads requested on another worker
+    # (POST /admin/reload), and how long that request waits for all of them
+    RELOAD_POLL_INTERVAL = float(os.environ.get('RELOAD_POLL_INTERVAL', 1.0))
+    RELOAD_WAIT_SECONDS = float(os.environ.get('RELOAD_WAIT_SECONDS', 10.0))
+
+    # Serve several models at once: a directory of .pkl files / artifacts or a
+    # JSON pool manifest (empty: only MODEL_PATH, served as 'default')
+    MODEL_POOL = os.environ.get('MODEL_POOL', '')
+    # Model used when a request names none (overrides the manifest's "default")
+    DEFAULT_MODEL = os.environ.get('DEFAULT_MODEL', '')
+    # Comma-separated models that score the default model's traffic in the background
+    SHADOW_MODELS = os.environ.get('SHADOW_MODELS', '')
+
+    # /predict response cache: max entries (0 disables it) and TTL in seconds
+    RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 1024))
+    RESPONSE_CACHE_TTL = float(os.environ.get('RESPONSE_CACHE_TTL', 300))
+    # Send ETag on /predict and answer 304 to a matching If-None-Match
+    RESPONSE_ETAG = os.environ.get('RESPONSE_ETAG', 'False').lower() == 'true'
+    
+    # Admission control (per worker): requests served at once (0: 2 per
+    # gunicorn worker, or 4 x ASGI_MAX_BATCH in ASGI mode), requests allowed to
+    # wait for a slot and how long they may wait before getting a 503
+    MAX_IN_FLIGHT = int(os.environ.get('MAX_IN_FLIGHT', 0))
+    ADMISSION_QUEUE_SIZE = int(os.environ.get('ADMISSION_QUEUE_SIZE', 16))
+    ADMISSION_TIMEOUT_MS = float(os.environ.get('ADMISSION_TIMEOUT_MS', 1000))
+    # Header where the proxy stores the request arrival time (e.g.
+    # X-Request-Start); requests that already waited longer are shed
+    QUEUE_START_HEADER = os.environ.get('QUEUE_START_HEADER', '')
+    
+    # Prediction audit log: rotated NDJSON files in this directory (empty
+    # disables it), written in batches of AUDIT_BATCH_SIZE records or every
+    # AUDIT_FLUSH_INTERVAL seconds by a background thread
+    AUDIT_LOG_DIR = os.environ.get('AUDIT_LOG_DIR', '')
+    AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', 1000))
+    AUDIT_FLUSH_INTERVAL = float(os.environ.get('AUDIT_FLUSH_INTERVAL', 1.0))
+    # Pending requests in memory; when full, requests wait up to AUDIT_BLOCK_MS
+    # for room before the records are dropped (and counted)
+    AUDIT_QUEUE_SIZE = int(os.environ.get('AUDIT_QUEUE_SIZE', 10000))
+    AUDIT_BLOCK_MS = float(os.environ.get('AUDIT_BLOCK_MS', 1000))
+    # Start a new file once the current one reaches this size
+    AUDIT_ROTATE_MB = float(os.environ.get('AUDIT_ROTATE_MB', 64))
+    
+    # Input drift monitoring (/monitoring/drift): live inputs are counted in
+    # DRIFT_BUCKETS time buckets of DRIFT_BUCKET_SECONDS each (the longest window)
+    DRIFT_MONITORING = os.environ.get('DRIFT_MONITORING', 'True').lower() == 'true'
+    DRIFT_BUCKET_SECONDS = float(os.environ.get('DRIFT_BUCKET_SECONDS', 60))
+    DRIFT_BUCKETS = int(os.environ.get('DRIFT_BUCKETS', 60))
+    # Directory for state shared by the workers (empty: a 'shared' directory
+    # inside PROMETHEUS_MULTIPROC_DIR, or per-process memory without it)
+    SHARED_STATE_DIR = os.environ.get('SHARED_STATE_DIR', '')
+    
+    # Cache lifetime of /scoring-bundle when requested through its versioned
+    # URL (?v=<etag>, the one the web form uses); the plain URL is revalidated
+    SCORING_BUNDLE_MAX_AGE = int(os.environ.get('SCORING_BUNDLE_MAX_AGE', 31536000))
+    
+    # ASGI mode (asgi.py): concurrent /predict calls are scored together once
+    # the window expires or the batch is full
+    ASGI_BATCH_WINDOW_MS = float(os.environ.get('ASGI_BATCH_WINDOW_MS', 2))
+    ASGI_MAX_BATCH = int(os.environ.get('ASGI_MAX_BATCH', 64))
     
     @staticmethod
     def is_production():
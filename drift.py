@@ -0,0 +1,218 @@
+"""
+Monitorización de deriva de la distribución de entrada.
+
+Todas las entradas del modelo son categóricas con pocos valores, así que la
+distribución completa cabe en un contador por combinación (el índice de
+CombinationIndex). Cada registro puntuado suma 1 en el contador de su
+combinación dentro de un cubo de tiempo (DRIFT_BUCKET_SECONDS); hay
+DRIFT_BUCKETS cubos en anillo, de modo que la memoria no crece con el
+tráfico. Los cubos viven en un SharedArray y se agregan entre workers.
+
+/monitoring/drift compara la distribución de la ventana pedida con la de
+referencia que se exporta con el artefacto del modelo (export_model.py
+--reference): PSI y chi-cuadrado por feature (marginales) y sobre la
+combinación completa.
+"""
+
+import math
+import os
+import threading
+import time
+
+import numpy as np
+
+from prediction_table import CombinationIndex
+from shared_state import SharedArray
+
+try:
+    from scipy.stats import chi2 as chi2_distribution
+except ImportError:
+    chi2_distribution = None
+
+# Umbrales habituales del PSI: < 0.1 estable, < 0.25 moderado, a partir de ahí significativo
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+# Proporción mínima de cada categoría para que el PSI no sea infinito
+PSI_EPSILON = 1e-4
+# Registros necesarios en la ventana para dar un veredicto
+MIN_OBSERVATIONS = 100
+
+
+def build_reference(domains, values, source=None):
+    """
+    Distribución de referencia para el manifiesto del artefacto: recuentos por
+    combinación de una matriz de valores de input_values en el orden de `domains`.
+    """
+    index = CombinationIndex(domains)
+    positions = index.index_values([name for name, _ in domains], values)
+    if positions is None:
+        raise ValueError('los valores de referencia no coinciden con los dominios de entrada')
+    size = int(np.prod([len(domain) for _, domain in domains]))
+    return {
+        'domains': [[name, list(domain)] for name, domain in domains],
+        'counts': np.bincount(positions, minlength=size).tolist(),
+        'rows': int(len(values)),
+        'source': source,
+    }
+
+
+def reference_counts(reference, domains):
+    """Recuentos de la referencia como array, o None si falta o sus dominios no coinciden"""
+    if not reference:
+        return None
+    if [[name, list(domain)] for name, domain in domains] != reference.get('domains'):
+        return None
+    counts = np.asarray(reference.get('counts', []), dtype=np.float64)
+    size = int(np.prod([len(domain) for _, domain in domains]))
+    if counts.shape != (size,) or counts.sum() <= 0:
+        return None
+    return counts
+
+
+def compare(live, reference):
+    """PSI y chi-cuadrado de bondad de ajuste de unos recuentos frente a los de referencia"""
+    n = live.sum()
+    expected = np.maximum(reference / reference.sum(), PSI_EPSILON)
+    expected /= expected.sum()
+    observed = np.maximum(live / n, PSI_EPSILON)
+    psi = float(np.sum((observed - expected) * np.log(observed / expected)))
+    chi2 = float(np.sum((live - n * expected) ** 2 / (n * expected)))
+    dof = len(live) - 1
+    p_value = float(chi2_distribution.sf(chi2, dof)) if chi2_distribution is not None else None
+    return {'psi': psi, 'chi2': chi2, 'dof': dof, 'p_value': p_value}
+
+
+def psi_level(psi):
+    if psi >= PSI_SIGNIFICANT:
+        return 'significant'
+    if psi >= PSI_MODERATE:
+        return 'moderate'
+    return 'stable'
+
+
+class DriftMonitor:
+    """Recuentos por combinación de entrada en cubos de tiempo, compartidos entre workers"""
+
+    def __init__(self, domains, bucket_seconds=60, buckets=60, directory=None):
+        self.index = CombinationIndex(domains)
+        self.fields = [name for name, _ in self.index.domains]
+        self.shape = tuple(len(values) for _, values in self.index.domains)
+        self.size = int(np.prod(self.shape))
+        self.bucket_seconds = bucket_seconds
+        self.buckets = max(1, buckets)
+        # Fila por cubo: [número de cubo, recuento de cada combinación...]
+        self._counts = SharedArray('drift', (self.buckets, 1 + self.size), directory)
+        self._lock = threading.Lock()
+        # Fila del cubo en curso (y proceso al que pertenece) para no buscarla en cada registro
+        self._bucket = None
+        self._current = None
+        self._pid = None
+
+    @property
+    def shared(self):
+        """True si los recuentos se agregan entre procesos"""
+        return self._counts.shared
+
+    @property
+    def span(self):
+        """Segundos cubiertos por el anillo de cubos"""
+        return self.bucket_seconds * self.buckets
+
+    def _row(self, now):
+        """Fila del cubo de `now` en la copia de este proceso (se llama con el lock tomado)"""
+        bucket = int(now // self.bucket_seconds)
+        pid = os.getpid()
+        if bucket == self._bucket and pid == self._pid:
+            return self._current
+        row = self._counts.local()[bucket % self.buckets]
+        if row[0] != bucket:
+            # El cubo era de una vuelta anterior del anillo
+            row[1:] = 0
+            row[0] = bucket
+        self._bucket, self._current, self._pid = bucket, row, pid
+        return row
+
+    def observe(self, form_data):
+        """Cuenta un registro validado"""
+        index = self.index.index_of(form_data)
+        if index is None:
+            return
+        with self._lock:
+            self._row(time.time())[1 + index] += 1
+
+    def observe_values(self, values):
+        """Cuenta una matriz de valores de input_values"""
+        index = self.index.index_values(self.fields, values)
+        if index is None or not len(index):
+            return
+        counts = np.bincount(index, minlength=self.size)
+        with self._lock:
+            self._row(time.time())[1:] += counts
+
+    def window_counts(self, seconds=None, now=None):
+        """Recuentos por combinación de los últimos `seconds` (como mucho `span`) en todos los workers"""
+        now = time.time() if now is None else now
+        seconds = min(seconds or self.span, self.span)
+        last = int(now // self.bucket_seconds)
+        first = last - max(1, math.ceil(seconds / self.bucket_seconds)) + 1
+        total = np.zeros(self.size, dtype=np.int64)
+        for counts in self._counts.copies():
+            bucket = counts[:, 0]
+            total += counts[(bucket >= first) & (bucket <= last), 1:].sum(axis=0)
+        return total
+
+    def marginals(self, joint):
+        """Recuentos de cada feature por separado a partir de los de la combinación"""
+        joint = np.asarray(joint).reshape(self.shape)
+        return {
+            field: joint.sum(axis=tuple(i for i in range(len(self.shape)) if i != axis))
+            for axis, field in enumerate(self.fields)
+        }
+
+    def report(self, reference, seconds=None):
+        """Informe de deriva de la ventana frente a la referencia (recuentos de reference_counts o None)"""
+        live = self.window_counts(seconds)
+        observations = int(live.sum())
+        live_marginals = self.marginals(live)
+        reference_marginals = self.marginals(reference) if reference is not None else None
+
+        features = {}
+        for field, domain in self.index.domains:
+            counts = live_marginals[field]
+            entry = {'live': proportions(domain, counts)}
+            if reference_marginals is not None:
+                entry['reference'] = proportions(domain, reference_marginals[field])
+                if observations:
+                    entry.update(compare(counts, reference_marginals[field]))
+                    entry['level'] = psi_level(entry['psi'])
+            features[field] = entry
+
+        # Con pocas observaciones por combinación el PSI conjunto sale inflado:
+        # el veredicto se basa en las marginales y el conjunto se da como referencia
+        joint = None
+        if reference is not None and observations:
+            joint = compare(live, reference)
+
+        if reference is None:
+            drift = 'no_reference'
+        elif observations < MIN_OBSERVATIONS:
+            drift = 'insufficient_data'
+        else:
+            drift = psi_level(max(entry['psi'] for entry in features.values()))
+        return {
+            'drift': drift,
+            'window_seconds': min(seconds or self.span, self.span),
+            'observations': observations,
+            'min_observations': MIN_OBSERVATIONS,
+            'features': features,
+            'drifted_features': sorted(
+                field for field, entry in features.items() if entry.get('psi', 0.0) >= PSI_MODERATE
+            ),
+            'joint': joint
+        }
+
+
+def proportions(domain, counts):
+    """Proporción de cada valor del dominio (claves en texto para JSON)"""
+    total = counts.sum()
+    return {str(value): float(count / total) if total else 0.0 for value, count in zip(domain, counts)}
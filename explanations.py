@@ -0,0 +1,120 @@
+"""
+Explicaciones por predicción: contribución de cada feature del modelo.
+
+Igual que la tabla de predicciones, se calculan al cargar el modelo para todas
+las combinaciones posibles de entrada, de modo que explicar una petición es
+una búsqueda por índice:
+  - árboles y bosques: atribución por camino (Saabas). Al bajar de un nodo a su
+    hijo, la variación de la probabilidad de ataque se asigna a la feature del
+    nodo; en un bosque se promedia entre árboles. Escala: probabilidad.
+  - regresión logística binaria: descomposición lineal coef * x. Escala:
+    log-odds.
+En ambos casos base_value + suma de contribuciones reproduce exactamente la
+salida del modelo (probabilidad de ataque o log-odds).
+"""
+
+import json
+import logging
+
+import numpy as np
+
+from model_compiler import CompiledLinear, CompiledTreeEnsemble
+from prediction_table import CombinationIndex
+
+logger = logging.getLogger(__name__)
+
+# Columna de predict_proba con la probabilidad de ataque (la que devuelve /predict)
+POSITIVE_COLUMN = 1
+
+
+def tree_contributions(tree, X, column=POSITIVE_COLUMN):
+    """(valor en la raíz, contribuciones (n, features)) de un TreeKernel sobre X (float32)"""
+    rows = np.arange(len(X))
+    node = np.zeros(len(X), dtype=np.intp)
+    contributions = np.zeros(X.shape, dtype=np.float64)
+    for _ in range(tree.max_depth):
+        feature = tree.feature[node]
+        go_left = X[rows, feature] <= tree.threshold[node]
+        child = np.where(go_left, tree.children_left[node], tree.children_right[node])
+        child = np.where(tree.is_leaf[node], node, child)
+        # Cada fila aparece una sola vez, así que no hay índices repetidos
+        contributions[rows, feature] += tree.value[child, column] - tree.value[node, column]
+        node = child
+    return tree.value[0, column], contributions
+
+
+def model_contributions(kernel, X):
+    """(escala, valor base, contribuciones, salida explicada) o None si el kernel no se puede explicar"""
+    if isinstance(kernel, CompiledTreeEnsemble) and len(kernel.classes_) == 2:
+        X = np.asarray(X, dtype=np.float32)
+        base_value = 0.0
+        contributions = np.zeros(X.shape, dtype=np.float64)
+        for tree in kernel.trees:
+            root_value, path_contributions = tree_contributions(tree, X)
+            base_value += root_value
+            contributions += path_contributions
+        base_value /= len(kernel.trees)
+        contributions /= len(kernel.trees)
+        return 'probability', float(base_value), contributions, kernel.predict_proba(X)[:, POSITIVE_COLUMN]
+    if isinstance(kernel, CompiledLinear) and kernel.coef.shape[0] == 1:
+        X = np.asarray(X, dtype=np.float64)
+        # + 0.0 convierte los -0.0 de features ausentes con coeficiente negativo en 0.0
+        contributions = X * kernel.coef[0] + 0.0
+        return 'log_odds', float(kernel.intercept[0]), contributions, kernel.decision_function(X)[:, 0]
+    return None
+
+
+class ExplanationTable(CombinationIndex):
+    """Contribuciones por feature indexadas por combinación de valores de entrada"""
+
+    def __init__(self, domains, feature_names, scale, base_value, contributions):
+        super().__init__(domains)
+        self.feature_names = list(feature_names)
+        self.scale = scale
+        self.base_value = base_value
+        self.contributions = contributions
+        self._explanations = [
+            {
+                'base_value': base_value,
+                'contributions': dict(zip(self.feature_names, row.tolist())),
+                'scale': scale
+            }
+            for row in contributions
+        ]
+        # Serializadas como jsonify para insertarlas sin más en el cuerpo de /predict
+        self._serialized = [
+            json.dumps(explanation, sort_keys=True, separators=(',', ':')).encode()
+            for explanation in self._explanations
+        ]
+
+    def __len__(self):
+        return len(self._explanations)
+
+    def explain(self, form_data):
+        """Explicación de un registro serializada en JSON, o None si está fuera del dominio"""
+        index = self.index_of(form_data)
+        return self._serialized[index] if index is not None else None
+
+    def explain_values(self, fields, values):
+        """Explicaciones (dicts de solo lectura) de una matriz de valores, o None si no están en la tabla"""
+        index = self.index_values(fields, values)
+        if index is None:
+            return None
+        return [self._explanations[i] for i in index]
+
+    @classmethod
+    def build(cls, kernel, domains, grid, feature_names):
+        """
+        Calcula las contribuciones de todo el dominio de entrada. `grid` es la
+        matriz de features de input_grid en el orden de `domains`. Devuelve None
+        si el modelo no es explicable o las contribuciones no suman su salida.
+        """
+        result = model_contributions(kernel, grid)
+        if result is None:
+            logger.info(f"Sin explicaciones por predicción para {type(kernel).__name__}")
+            return None
+        scale, base_value, contributions, output = result
+        if not np.allclose(base_value + contributions.sum(axis=1), output, rtol=0, atol=1e-9):
+            logger.warning("Las contribuciones no reproducen la salida del modelo; explicaciones desactivadas")
+            return None
+        return cls(domains, feature_names, scale, base_value, contributions)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Export a trained estimator to the memory-mapped model artifact format.
+
+The artifact is a directory with manifest.json (feature names, classes,
+sklearn version, per-array sha256 and a content hash) and one .npy file per
+parameter array of the compiled kernel (see model_artifact.py). Point
+MODEL_PATH at the directory to serve it; estimators without a compiled kernel
+keep being served from their pickle.
+
+With --reference, the input distribution of a CSV/NDJSON file (typically the
+training data, or rows exported with read_audit.py --format inputs) is stored
+in the manifest; /monitoring/drift compares live traffic against it.
+
+Usage:
+    python export_model.py best_model.pkl -o model_artifact
+    python export_model.py best_model.pkl -o model_artifact --reference training.csv
+    MODEL_PATH=model_artifact gunicorn -c gunicorn.conf.py main:app
+"""
+
+import argparse
+import logging
+import os
+import pickle
+import sys
+import time
+import warnings
+
+from drift import build_reference
+from features import FEATURE_SCHEMA, FeatureValidationError, SchemaMismatchError
+from model_artifact import ArtifactError, export_artifact, load_artifact
+from score_file import detect_format, read_records
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def reference_distribution(path):
+    """Input distribution of the valid rows of a CSV or NDJSON file (invalid rows are skipped)"""
+    rows = []
+    skipped = 0
+    with open(path, newline='', encoding='utf-8') as file:
+        for record in read_records(file, detect_format(path, 'ndjson')):
+            try:
+                if not isinstance(record, dict):
+                    raise FeatureValidationError('record must be a JSON object')
+                rows.append(FEATURE_SCHEMA.validate(record))
+            except FeatureValidationError:
+                skipped += 1
+    if not rows:
+        raise ValueError(f'no valid rows in {path}')
+    if skipped:
+        logger.warning(f"⚠️ Skipped {skipped} invalid reference rows")
+    return build_reference(FEATURE_SCHEMA.input_domains, FEATURE_SCHEMA.input_values(rows), os.path.basename(path))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('model', nargs='?', default=os.environ.get('MODEL_PATH', 'best_model.pkl'),
+                        help='pickled estimator to export (default: $MODEL_PATH or best_model.pkl)')
+    parser.add_argument('-o', '--output', default='model_artifact', help='artifact directory (default: model_artifact)')
+    parser.add_argument('--reference', help='CSV/NDJSON rows whose input distribution is stored for drift monitoring')
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+    with open(args.model, 'rb') as file:
+        model = pickle.load(file)
+
+    try:
+        FEATURE_SCHEMA.check_model(model)
+        grid = FEATURE_SCHEMA.encode_values(FEATURE_SCHEMA.input_grid())
+        reference = reference_distribution(args.reference) if args.reference else None
+        manifest = export_artifact(model, args.output, grid, reference)
+    except (SchemaMismatchError, ArtifactError, OSError, ValueError) as e:
+        logger.error(f"❌ Export failed: {e}")
+        return 1
+
+    started = time.perf_counter()
+    load_artifact(args.output)
+    load_ms = (time.perf_counter() - started) * 1000
+
+    logger.info(f"✅ Exported {manifest['estimator']} ({manifest['kernel']} kernel) to {os.path.abspath(args.output)}")
+    logger.info(f"   Version: {manifest['content_hash'][:12]}  (content hash {manifest['content_hash']})")
+    logger.info(f"   Arrays: {', '.join(manifest['arrays'])}")
+    if reference is not None:
+        logger.info(f"   Input reference: {reference['rows']} rows from {reference['source']}")
+    logger.info(f"   Artifact load time: {load_ms:.1f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""
+Esquema de features del formulario: dominios, validación y codificación one-hot.
+
+FEATURE_SCHEMA se construye una sola vez al importar el módulo y es la única
+definición de las features. La comparten /predict, /predict/batch, /model-info
+y el scoring offline, de modo que todos los caminos codifican igual.
+"""
+
+import itertools
+import threading
+
+import numpy as np
+
+# Valores permitidos de cada campo del formulario, en el orden del formulario.
+# HadHeartAttack se valida pero no forma parte de la entrada del modelo.
+FORM_DOMAINS = (
+    ('PhysicalActivities', (0, 1)),
+    ('AlcoholDrinkers', (0, 1)),
+    ('ageCategoryGrouped', (0, 1, 2)),
+    ('SmokerStatusGrouped', (0, 1, 2)),
+    ('HadDiabetesGrouped', (0, 1, 2)),
+    ('HadHeartAttack', (0, 1)),
+)
+
+# El modelo espera estas 7 features en este orden específico. Cada una vale 1
+# cuando el campo del formulario tiene el valor indicado y 0 en otro caso.
+MODEL_FEATURE_ENCODING = (
+    ('PhysicalActivities_Yes', 'PhysicalActivities', 1),
+    ('AlcoholDrinkers_Yes', 'AlcoholDrinkers', 1),
+    ('ageCategoryGrouped_Older adult', 'ageCategoryGrouped', 2),    # 65+
+    ('ageCategoryGrouped_Young', 'ageCategoryGrouped', 0),          # 18-44
+    ('SmokerStatusGrouped_Former smoker', 'SmokerStatusGrouped', 1),
+    ('SmokerStatusGrouped_Never smoked', 'SmokerStatusGrouped', 0),
+    ('HadDiabetesGrouped_Yes', 'HadDiabetesGrouped', 1),
+)
+
+
+class FeatureValidationError(ValueError):
+    """Error de validación con el mensaje que se devuelve al cliente"""
+
+
+class SchemaMismatchError(ValueError):
+    """El modelo cargado no espera las features definidas en el esquema"""
+
+
+def _domain_message(values):
+    """Describe los valores permitidos: 'debe ser 0, 1 o 2'"""
+    values = [str(value) for value in values]
+    return f"debe ser {', '.join(values[:-1])} o {values[-1]}"
+
+
+class FeatureSchema:
+    """Dominios, validación y codificación de las features, precompilados una sola vez"""
+
+    def __init__(self, form_domains, model_encoding):
+        self.form_domains = tuple((field, tuple(values)) for field, values in form_domains)
+        self.form_features = [field for field, _ in self.form_domains]
+        self.model_features = [name for name, _, _ in model_encoding]
+
+        # Campos que alimentan al modelo, en el orden del formulario
+        used_fields = {field for _, field, _ in model_encoding}
+        self.input_domains = tuple(
+            (field, values) for field, values in self.form_domains if field in used_fields
+        )
+        self.input_fields = [field for field, _ in self.input_domains]
+
+        # Mensaje de error y valores aceptados por campo. Las claves cubren los
+        # valores crudos más habituales (int y str) para evitar int(float(...))
+        self._messages = {field: _domain_message(values) for field, values in self.form_domains}
+        self._accepted = {}
+        for field, values in self.form_domains:
+            accepted = {}
+            for value in values:
+                accepted[value] = value
+                accepted[str(value)] = value
+                accepted[f'{value}.0'] = value
+            self._accepted[field] = accepted
+
+        # Columna one-hot que activa cada valor de cada campo de entrada
+        self._hot_columns = {field: {} for field in self.input_fields}
+        for column, (_, field, value) in enumerate(model_encoding):
+            self._hot_columns[field][value] = column
+        input_columns = {field: column for column, field in enumerate(self.input_fields)}
+        self._encoding_columns = np.array([input_columns[field] for _, field, _ in model_encoding])
+        self._encoding_values = np.array([value for _, _, value in model_encoding])
+
+        self._local = threading.local()
+
+    def validate(self, data):
+        """Valida y normaliza los campos del formulario; lanza FeatureValidationError si no son válidos"""
+        if not isinstance(data, dict):
+            # Un cuerpo JSON válido pero que no es un objeto (lista, texto, null)
+            raise FeatureValidationError('El cuerpo debe ser un objeto JSON')
+        missing_fields = []
+        form_data = {}
+
+        for field in self.form_features:
+            raw = data.get(field, '')
+            if raw == '':
+                missing_fields.append(field)
+                continue
+            try:
+                value = self._accepted[field].get(raw)
+            except TypeError:
+                value = None
+            if value is None:
+                value = self._parse(field, raw)
+            form_data[field] = value
+
+        if missing_fields:
+            raise FeatureValidationError(f'Campos faltantes: {", ".join(missing_fields)}')
+
+        return form_data
+
+    def _parse(self, field, raw):
+        """Camino lento de validate para valores con formatos poco habituales"""
+        try:
+            value = int(float(raw))
+        except (TypeError, ValueError, OverflowError) as e:
+            # OverflowError: 'inf', '-inf' o 1e400
+            raise FeatureValidationError(f'Valor inválido para {field}: {str(e)}')
+        # Validar rangos básicos
+        if value not in self._accepted[field]:
+            raise FeatureValidationError(f'Valor inválido para {field}: {self._messages[field]}')
+        return value
+
+    def encode(self, form_data):
+        """
+        Codifica un registro validado en el buffer (1, n_features) del hilo actual.
+
+        El buffer se reutiliza en la siguiente llamada del mismo hilo: copiarlo
+        si se necesita conservarlo.
+        """
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            buffer = self._local.buffer = np.zeros((1, len(self.model_features)), dtype=np.int64)
+        else:
+            buffer.fill(0)
+        row = buffer[0]
+        for field, columns in self._hot_columns.items():
+            column = columns.get(form_data[field])
+            if column is not None:
+                row[column] = 1
+        return buffer
+
+    def input_values(self, rows):
+        """Matriz (n, campos de entrada) con los valores validados en el orden de input_domains"""
+        values = np.empty((len(rows), len(self.input_fields)), dtype=np.int64)
+        for i, form_data in enumerate(rows):
+            values[i] = [form_data[field] for field in self.input_fields]
+        return values
+
+    def input_grid(self):
+        """Matriz con todas las combinaciones posibles de valores de entrada"""
+        return np.array(list(itertools.product(*(values for _, values in self.input_domains))), dtype=np.int64)
+
+    def encode_values(self, values):
+        """Codificación one-hot vectorizada de una matriz producida por input_values"""
+        return (values[:, self._encoding_columns] == self._encoding_values).astype(np.int64)
+
+    def check_model(self, model):
+        """Comprueba que el modelo espera las features del esquema; lanza SchemaMismatchError si no"""
+        feature_names = getattr(model, 'feature_names_in_', None)
+        if feature_names is not None and list(feature_names) != self.model_features:
+            raise SchemaMismatchError(
+                f'el modelo espera las features {list(feature_names)} y el esquema define {self.model_features}'
+            )
+        n_features = getattr(model, 'n_features_in_', None)
+        if n_features is not None and n_features != len(self.model_features):
+            raise SchemaMismatchError(
+                f'el modelo espera {n_features} features y el esquema define {len(self.model_features)}'
+            )
+
+
+FEATURE_SCHEMA = FeatureSchema(FORM_DOMAINS, MODEL_FEATURE_ENCODING)
@@ -0,0 +1,119 @@
+"""
+Gunicorn configuration used by start.sh, Procfile and render.yaml.
+
+The app (and the model) is loaded once in the master with preload_app, so
+forked workers share the model pages copy-on-write instead of each one
+unpickling it again.
+"""
+
+import gc
+import os
+import shutil
+import tempfile
+
+from admission import DEFAULT_MAX_IN_FLIGHT, SPARE_THREADS
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# Load main:app in the master before forking the workers
+preload_app = True
+
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Admission control (admission.py) can only shed load that waits inside the
+# worker. With gthread workers (the default) each worker gets one thread per
+# request in flight (MAX_IN_FLIGHT) and per admission queue slot
+# (ADMISSION_QUEUE_SIZE), plus a few to answer 503 at once when the queue is
+# full. It accepts no more connections than that, so overload waits where its
+# age is known instead of in the kernel's accept queue, which is kept small.
+# With GUNICORN_WORKER_CLASS=sync, requests wait in the accept queue: only
+# QUEUE_START_HEADER sheds them there.
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+if worker_class == 'gthread':
+    _max_in_flight = int(os.environ.get('MAX_IN_FLIGHT', 0)) or DEFAULT_MAX_IN_FLIGHT
+    _queue_size = int(os.environ.get('ADMISSION_QUEUE_SIZE', 16))
+    threads = int(os.environ.get('GUNICORN_THREADS', 0)) or _max_in_flight + _queue_size + SPARE_THREADS
+    # Idle keep-alive connections also count here, hence the margin over threads
+    worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 2 * threads))
+    backlog = int(os.environ.get('GUNICORN_BACKLOG', 64))
+else:
+    threads = int(os.environ.get('GUNICORN_THREADS', 1))
+    backlog = int(os.environ.get('GUNICORN_BACKLOG', 2048))
+
+# Recycle workers periodically to bound memory growth (0 disables it)
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 0))
+
+# Every process writes its Prometheus metrics to files in this directory and
+# /metrics aggregates them. It has to be set here, before the app is
+# preloaded. gunicorn executes this file again on SIGHUP, so a directory we
+# created is remembered in HEART_API_OWN_METRICS_DIR (on_exit removes it).
+if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = tempfile.mkdtemp(prefix='heart-api-metrics-')
+    os.environ['HEART_API_OWN_METRICS_DIR'] = os.environ['PROMETHEUS_MULTIPROC_DIR']
+_metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+_own_metrics_dir = os.environ.get('HEART_API_OWN_METRICS_DIR') == _metrics_dir
+os.makedirs(_metrics_dir, exist_ok=True)
+# State shared by the workers (shared_state.py) lives next to the metrics
+# unless SHARED_STATE_DIR points elsewhere
+_shared_dir = os.path.join(_metrics_dir, 'shared')
+
+
+def _file_pid(name):
+    """pid in a per-process file name (counter_123.db, models-123.npy), or None"""
+    stem = os.path.splitext(name)[0]
+    pid = stem.rsplit('_' if name.endswith('.db') else '-', 1)[-1]
+    return int(pid) if pid.isdigit() else None
+
+
+def on_starting(server):
+    # Runs once in the master, after the app is preloaded and never again on
+    # SIGHUP: remove the metrics and shared state files left by a previous run,
+    # keeping the ones the master has just written (e.g. its model load)
+    master = os.getpid()
+    for name in os.listdir(_metrics_dir):
+        if name.endswith('.db') and _file_pid(name) != master:
+            os.remove(os.path.join(_metrics_dir, name))
+    if os.path.isdir(_shared_dir):
+        for name in os.listdir(_shared_dir):
+            # Also half-written staging files (.tmp)
+            if not (name.endswith('.npy') and _file_pid(name) == master):
+                os.remove(os.path.join(_shared_dir, name))
+
+
+def pre_fork(server, worker):
+    # Move the preloaded objects out of the GC generations so that garbage
+    # collection in the workers does not touch (and copy) the shared pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Threads started in the master do not survive the fork: start the model
+    # file watcher (if enabled) in every worker, and publish the worker's model
+    # versions to the shared state (the master itself never publishes)
+    import main
+    main.start_worker()
+
+
+def worker_exit(server, worker):
+    # Write the audit records still buffered in the exiting worker
+    import main
+    if main.audit_sink is not None:
+        main.audit_sink.close()
+
+
+def child_exit(server, worker):
+    # Drop the live gauges of the dead worker from the aggregated metrics
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    if _own_metrics_dir:
+        shutil.rmtree(_metrics_dir, ignore_errors=True)
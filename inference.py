@@ -0,0 +1,77 @@
+"""
+Inferencia en una sola pasada.
+
+Hace una única llamada a predict_proba y deriva de ella tanto las
+probabilidades como la clase predicha, aplicando el umbral de decisión
+configurado (Config.DECISION_THRESHOLD) sobre la probabilidad de la clase
+positiva. Con el umbral por defecto (0.5) las clases coinciden con
+model.predict, lo que se comprueba al cargar el modelo.
+"""
+
+import logging
+import warnings
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = 0.5
+
+
+class Scorer:
+    """Envuelve el modelo y devuelve (clases, probabilidades) con una sola llamada"""
+
+    def __init__(self, model, threshold=DEFAULT_THRESHOLD, single_pass=True):
+        self.model = model
+        self.threshold = threshold
+        self.classes = np.asarray(getattr(model, 'classes_', [0, 1]))
+        self.supports_probabilities = hasattr(model, 'predict_proba')
+        # Si la autoverificación falla se vuelve a predict + predict_proba
+        self.single_pass = single_pass and self.supports_probabilities
+
+    def labels_from_probabilities(self, probabilities, threshold=None):
+        """Deriva la clase de cada fila a partir de sus probabilidades"""
+        threshold = self.threshold if threshold is None else threshold
+        if probabilities.shape[1] == 2:
+            # Empates en el umbral van a la clase negativa, igual que el argmax de sklearn
+            return self.classes[(probabilities[:, 1] > threshold).astype(np.intp)]
+        return self.classes[np.argmax(probabilities, axis=1)]
+
+    def score(self, input_array):
+        """Devuelve (clases, probabilidades); las probabilidades son None si el modelo no las soporta"""
+        if self.single_pass:
+            probabilities = np.asarray(self.model.predict_proba(input_array), dtype=np.float64)
+            return self.labels_from_probabilities(probabilities), probabilities
+
+        predictions = np.asarray(self.model.predict(input_array))
+        probabilities = None
+        if self.supports_probabilities:
+            probabilities = np.asarray(self.model.predict_proba(input_array), dtype=np.float64)
+            if self.threshold != DEFAULT_THRESHOLD and probabilities.shape[1] == 2:
+                predictions = self.labels_from_probabilities(probabilities)
+        return predictions, probabilities
+
+    def self_check(self, input_array):
+        """
+        Comprueba sobre una rejilla de entradas que las clases derivadas con el
+        umbral por defecto coinciden con model.predict. Si no coinciden, desactiva
+        la inferencia en una sola pasada.
+        """
+        if not self.supports_probabilities:
+            return True
+
+        with warnings.catch_warnings():
+            warnings.filterwarnings('ignore', message='X does not have valid feature names')
+            probabilities = np.asarray(self.model.predict_proba(input_array), dtype=np.float64)
+            expected = np.asarray(self.model.predict(input_array))
+
+        derived = self.labels_from_probabilities(probabilities, DEFAULT_THRESHOLD)
+        if not np.array_equal(derived, expected):
+            mismatches = int(np.count_nonzero(derived != expected))
+            logger.warning(
+                f"Las clases derivadas de predict_proba no coinciden con predict en {mismatches} de "
+                f"{len(expected)} entradas; se usará predict + predict_proba"
+            )
+            self.single_pass = False
+            return False
+        return True
@@ -0,0 +1,124 @@
+"""
+Configuración de logging del servicio.
+
+Los registros se encolan sin bloquear y un hilo en segundo plano los formatea
+y escribe, de modo que los hilos que atienden peticiones nunca esperan a la
+E/S del log. Cada petición produce una única línea JSON estructurada (logger
+'access') con su id, ruta, estado, latencia y versión del modelo; el resto
+del detalle por petición se emite en DEBUG y no se construye si ese nivel
+está desactivado.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+
+access_logger = logging.getLogger('access')
+
+# Atributos estándar de LogRecord; el resto se considera un campo estructurado
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por registro, con los campos pasados en `extra`"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class BackgroundQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que nunca bloquea: si la cola está llena el registro se
+    descarta y se cuenta. El hilo que vacía la cola se (re)crea en cada proceso,
+    ya que los hilos del máster de gunicorn no sobreviven al fork.
+    """
+
+    def __init__(self, target, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.target = target
+        self.maxsize = maxsize
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_listener(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # Tras un fork la cola heredada puede tener registros del máster a medio consumir
+            self.queue = queue.Queue(self.maxsize)
+            self._listener = logging.handlers.QueueListener(self.queue, self.target, respect_handler_level=True)
+            self._listener.start()
+            self._pid = os.getpid()
+            atexit.register(self._listener.stop)
+
+    def prepare(self, record):
+        # El registro se formatea en el hilo del listener, no en el de la petición
+        return record
+
+    def enqueue(self, record):
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(level='INFO', log_format='json', queue_size=10000):
+    """Sustituye la configuración de logging raíz por el handler asíncrono"""
+    stream = logging.StreamHandler(sys.stderr)
+    if log_format == 'json':
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(BackgroundQueueHandler(stream, queue_size))
+    root.setLevel(getattr(logging, level))
+
+    # La línea por petición siempre es JSON, aunque el resto del log sea texto
+    if log_format != 'json':
+        access_stream = logging.StreamHandler(sys.stderr)
+        access_stream.setFormatter(JsonFormatter())
+        access_logger.handlers = [BackgroundQueueHandler(access_stream, queue_size)]
+        access_logger.propagate = False
+
+
+def log_request(sample_rate, request_id, method, path, status, latency_ms, model_version=None, **fields):
+    """Emite la línea estructurada de una petición; los errores del servidor nunca se muestrean"""
+    if not access_logger.isEnabledFor(logging.INFO):
+        return
+    if status < 500 and sample_rate < 1.0 and random.random() >= sample_rate:
+        return
+    access_logger.info('request', extra={
+        'request_id': request_id,
+        'method': method,
+        'path': path,
+        'status': status,
+        'latency_ms': round(latency_ms, 3),
+        'model_version': model_version,
+        **fields
+    })
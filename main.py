@@ -1,11 +1,26 @@
-from flask import Flask, request, jsonify, render_template
-import pickle
+from flask import Flask, request, jsonify, render_template, g
+import json
 import numpy as np
 # import pandas as pd
-from sklearn.base import BaseEstimator
 import os
 import logging
+import time
+import uuid
 from datetime import datetime
+import hmac
+from features import FEATURE_SCHEMA, FeatureValidationError, SchemaMismatchError
+from model_pool import ModelPool, discover_models, DEFAULT_MODEL_NAME
+from model_artifact import is_artifact
+from admission import AdmissionController, Rejected, DEFAULT_MAX_IN_FLIGHT, queued_seconds
+from audit import AuditSink
+from drift import DriftMonitor
+from shared_state import ModelVersions, state_directory
+from response_cache import (
+    ResponseCache, CachedResponse, ResponseTemplate, StaticResponses, compact_requested, etag_matches, make_etag,
+    query_flag, with_explanation
+)
+from logging_setup import configure_logging, log_request
+import metrics
 
 try:
     from config import Config
@@ -17,13 +32,48 @@ except ImportError:
         MODEL_PATH = os.environ.get('MODEL_PATH', 'best_model.pkl')
         PORT = int(os.environ.get('PORT', 5000))
         LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+        PREDICTION_TABLE = os.environ.get('PREDICTION_TABLE', 'True').lower() == 'true'
+        BATCH_MAX_ROWS = int(os.environ.get('BATCH_MAX_ROWS', 50000))
+        DECISION_THRESHOLD = float(os.environ.get('DECISION_THRESHOLD', 0.5))
+        COMPILE_MODEL = os.environ.get('COMPILE_MODEL', 'True').lower() == 'true'
+        MODEL_WATCH_INTERVAL = float(os.environ.get('MODEL_WATCH_INTERVAL', 0))
+        ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')
+        RELOAD_POLL_INTERVAL = float(os.environ.get('RELOAD_POLL_INTERVAL', 1.0))
+        RELOAD_WAIT_SECONDS = float(os.environ.get('RELOAD_WAIT_SECONDS', 10.0))
+        RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 1024))
+        RESPONSE_CACHE_TTL = float(os.environ.get('RESPONSE_CACHE_TTL', 300))
+        RESPONSE_ETAG = os.environ.get('RESPONSE_ETAG', 'False').lower() == 'true'
+        ASGI_BATCH_WINDOW_MS = float(os.environ.get('ASGI_BATCH_WINDOW_MS', 2))
+        ASGI_MAX_BATCH = int(os.environ.get('ASGI_MAX_BATCH', 64))
+        LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')
+        ACCESS_LOG = os.environ.get('ACCESS_LOG', 'True').lower() == 'true'
+        LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', 1.0))
+        LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+        MODEL_POOL = os.environ.get('MODEL_POOL', '')
+        DEFAULT_MODEL = os.environ.get('DEFAULT_MODEL', '')
+        SHADOW_MODELS = os.environ.get('SHADOW_MODELS', '')
+        MAX_IN_FLIGHT = int(os.environ.get('MAX_IN_FLIGHT', 0))
+        ADMISSION_QUEUE_SIZE = int(os.environ.get('ADMISSION_QUEUE_SIZE', 16))
+        ADMISSION_TIMEOUT_MS = float(os.environ.get('ADMISSION_TIMEOUT_MS', 1000))
+        QUEUE_START_HEADER = os.environ.get('QUEUE_START_HEADER', '')
+        AUDIT_LOG_DIR = os.environ.get('AUDIT_LOG_DIR', '')
+        AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', 1000))
+        AUDIT_FLUSH_INTERVAL = float(os.environ.get('AUDIT_FLUSH_INTERVAL', 1.0))
+        AUDIT_QUEUE_SIZE = int(os.environ.get('AUDIT_QUEUE_SIZE', 10000))
+        AUDIT_ROTATE_MB = float(os.environ.get('AUDIT_ROTATE_MB', 64))
+        AUDIT_BLOCK_MS = float(os.environ.get('AUDIT_BLOCK_MS', 1000))
+        DRIFT_MONITORING = os.environ.get('DRIFT_MONITORING', 'True').lower() == 'true'
+        DRIFT_BUCKET_SECONDS = float(os.environ.get('DRIFT_BUCKET_SECONDS', 60))
+        DRIFT_BUCKETS = int(os.environ.get('DRIFT_BUCKETS', 60))
+        SHARED_STATE_DIR = os.environ.get('SHARED_STATE_DIR', '')
+        SCORING_BUNDLE_MAX_AGE = int(os.environ.get('SCORING_BUNDLE_MAX_AGE', 31536000))
         
         @staticmethod
         def is_production():
             return Config.FLASK_ENV == 'production'
 
-# Configure logging
-logging.basicConfig(level=getattr(logging, Config.LOG_LEVEL))
+# Configure logging (records are written by a background thread, see logging_setup.py)
+configure_logging(Config.LOG_LEVEL, Config.LOG_FORMAT, Config.LOG_QUEUE_SIZE)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
@@ -32,254 +82,659 @@ app = Flask(__name__)
 app.config['ENV'] = Config.FLASK_ENV
 app.config['DEBUG'] = Config.DEBUG
 
-# Variable global para almacenar el modelo
-model = None
-model_loaded_at = None
-prediction_count = 0
+# Modelos en servicio (MODEL_POOL o, si no se define, solo MODEL_PATH); cada
+# petición toma el LoadedModel de su registro una sola vez
+if Config.MODEL_POOL:
+    pool_models, pool_default, pool_shadow = discover_models(Config.MODEL_POOL)
+else:
+    pool_models, pool_default, pool_shadow = {DEFAULT_MODEL_NAME: Config.MODEL_PATH}, None, []
+
+# Estado compartido entre workers: contadores de predicciones y versión de
+# cada modelo en cada worker (ver shared_state.py)
+shared_state_dir = state_directory(Config.SHARED_STATE_DIR)
+metrics.configure_shared_state(shared_state_dir)
+model_state = ModelVersions(pool_models, shared_state_dir)
+
+model_pool = ModelPool(
+    pool_models,
+    default=Config.DEFAULT_MODEL or pool_default,
+    shadow=[name.strip() for name in Config.SHADOW_MODELS.split(',') if name.strip()] or pool_shadow,
+    threshold=Config.DECISION_THRESHOLD,
+    compile=Config.COMPILE_MODEL,
+    use_table=Config.PREDICTION_TABLE,
+    on_publish=model_state.publish
+)
+# Registro del modelo por defecto
+registry = model_pool.default
+
+# Caché de respuestas de /predict por modelo (vacía si RESPONSE_CACHE_SIZE es 0)
+response_caches = {}
+if Config.RESPONSE_CACHE_SIZE > 0:
+    response_caches = {
+        name: ResponseCache(Config.RESPONSE_CACHE_SIZE, Config.RESPONSE_CACHE_TTL) for name in model_pool.names
+    }
+response_cache = response_caches.get(model_pool.default_name)
+
+# Cuerpos ya serializados de /health, /api/data y /model-info
+static_responses = StaticResponses()
+
+# Control de admisión del worker (los hilos de gunicorn que superan
+# MAX_IN_FLIGHT esperan en su cola). /health y /metrics no pasan por él
+admission = AdmissionController(
+    Config.MAX_IN_FLIGHT or DEFAULT_MAX_IN_FLIGHT,
+    Config.ADMISSION_QUEUE_SIZE,
+    Config.ADMISSION_TIMEOUT_MS / 1000.0
+)
+ADMISSION_EXEMPT = frozenset(['/health', '/metrics'])
+
+# Registro de auditoría de todas las predicciones (desactivado sin AUDIT_LOG_DIR)
+audit_sink = None
+if Config.AUDIT_LOG_DIR:
+    audit_sink = AuditSink(
+        Config.AUDIT_LOG_DIR,
+        batch_size=Config.AUDIT_BATCH_SIZE,
+        flush_interval=Config.AUDIT_FLUSH_INTERVAL,
+        max_pending=Config.AUDIT_QUEUE_SIZE,
+        rotate_bytes=int(Config.AUDIT_ROTATE_MB * 1024 * 1024),
+        block_timeout=Config.AUDIT_BLOCK_MS / 1000.0
+    )
+
+# Distribución de las entradas servidas, por cubos de tiempo y compartida entre workers
+drift_monitor = None
+if Config.DRIFT_MONITORING:
+    drift_monitor = DriftMonitor(
+        FEATURE_SCHEMA.input_domains,
+        bucket_seconds=Config.DRIFT_BUCKET_SECONDS,
+        buckets=Config.DRIFT_BUCKETS,
+        directory=shared_state_dir
+    )
 
-def load_model():
-    """Carga el modelo PKL al iniciar la aplicación"""
-    global model, model_loaded_at
-    model_path = 'best_model.pkl'  # Default model path, can be overridden by Config.MODEL_PATH
+def load_model(name=None):
+    """Carga (o recarga) un modelo del pool (el por defecto si no se indica) y lo publica en su registro"""
+    model_registry = model_pool.get(name)
+    model_path = model_registry.path
 
     if os.path.exists(model_path):
         try:
-            with open(model_path, 'rb') as file:
-                model = pickle.load(file)
-            model_loaded_at = datetime.now()
-            logger.info(f"Modelo cargado exitosamente desde {model_path}")
-            logger.info(f"Tipo de modelo: {type(model).__name__}")
+            loaded = model_registry.load()
+            logger.info(f"Modelo {model_registry.name} cargado exitosamente desde {model_path} (versión {loaded.version})")
+            logger.info(f"Tipo de modelo: {getattr(loaded.model, 'estimator_name', None) or type(loaded.model).__name__}")
             return True
+        except SchemaMismatchError as e:
+            logger.error(f"El modelo no es compatible con el esquema de features: {e}")
+            return False
         except Exception as e:
             logger.error(f"Error al cargar el modelo: {e}")
-            model = None
             return False
     else:
         logger.error(f"No se encontró el archivo del modelo en {model_path}")
-        model = None
         return False
 
-# Load the model at application startup
+def start_model_watcher():
+    """Arranca la recarga automática de los modelos y el seguimiento de las recargas pedidas a otros workers"""
+    model_pool.start_watchers(Config.MODEL_WATCH_INTERVAL)
+    model_state.follow_reloads(model_pool, Config.RELOAD_POLL_INTERVAL)
+
+def start_worker():
+    """Arranque de cada worker (post_fork de gunicorn, lifespan en ASGI): publica sus modelos y arranca la recarga"""
+    model_state.activate(model_pool)
+    start_model_watcher()
+
+def requested_model(data=None):
+    """Modelo pedido en el campo `model` del cuerpo o en la cabecera X-Model (None: el por defecto)"""
+    name = data.get('model') if isinstance(data, dict) else None
+    if not isinstance(name, str):
+        name = None
+    return name or request.headers.get('X-Model') or None
+
+def shadow_scorer(current):
+    """ShadowScorer que debe recibir los registros atendidos por `current`, o None"""
+    if current.name == model_pool.default_name:
+        return model_pool.shadow
+    return None
+
+def explanation_for(current, form_data):
+    """Explicación serializada de un registro, o None si el modelo no tiene explicaciones"""
+    if current.explanations is None:
+        return None
+    return current.explanations.explain(form_data)
+
+def model_not_found(name):
+    return jsonify({
+        'error': f"Modelo desconocido: {name}. Modelos disponibles: {', '.join(model_pool.names)}",
+        'status': 'error'
+    }), 400
+
+# Load the model once at application startup. With gunicorn's preload_app
+# (gunicorn.conf.py) this runs in the master and the forked workers share the
+# loaded model pages copy-on-write.
+logger.info("Iniciando aplicación...")
 try:
-    load_model_result = load_model()
-    if load_model_result:
-        logger.info("Modelo cargado correctamente al iniciar la aplicación")
-    else:
-        logger.warning("No se pudo cargar el modelo al iniciar la aplicación")
+    for pool_name in model_pool.names:
+        load_model_result = load_model(pool_name)
+        if load_model_result:
+            logger.info(f"Modelo {pool_name} cargado correctamente al iniciar la aplicación")
+        else:
+            logger.warning(f"No se pudo cargar el modelo {pool_name} al iniciar la aplicación")
+    if len(model_pool.names) > 1:
+        logger.info(f"Modelos en servicio: {', '.join(model_pool.names)} (por defecto: {model_pool.default_name}, "
+                    f"en sombra: {', '.join(model_pool.shadow_names) or 'ninguno'})")
 except Exception as e:
     logger.error(f"Error al cargar el modelo durante el inicio: {str(e)}")
 
+def request_id_from(header_value):
+    """Id de la petición: el recibido en X-Request-ID o uno nuevo"""
+    if header_value and len(header_value) <= 128:
+        return header_value
+    return uuid.uuid4().hex
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.request_id = request_id_from(request.headers.get('X-Request-ID'))
+
+@app.before_request
+def admit_request():
+    """Reserva un hueco del worker o responde 503 con Retry-After si no llegaría a tiempo"""
+    if request.path in ADMISSION_EXEMPT:
+        return None
+    queued = None
+    if Config.QUEUE_START_HEADER:
+        queued = queued_seconds(request.headers.get(Config.QUEUE_START_HEADER))
+    try:
+        g.admitted_at = admission.acquire(queued or 0.0)
+    except Rejected as e:
+        metrics.record_rejection(e.reason)
+        logger.debug("Petición rechazada por saturación (%s)", e.reason)
+        response = jsonify(overloaded_payload(e))
+        response.status_code = 503
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
+    return None
+
+@app.teardown_request
+def release_admission(error=None):
+    admitted_at = g.pop('admitted_at', None)
+    if admitted_at is not None:
+        admission.release(admitted_at)
+
+def overloaded_payload(rejected):
+    return {
+        'error': 'Servicio saturado; reintente más tarde',
+        'reason': rejected.reason,
+        'retry_after': rejected.retry_after,
+        'status': 'error'
+    }
+
+@app.after_request
+def record_request_metrics(response):
+    """Contador por ruta y estado e histograma de latencia de la petición"""
+    started = g.get('request_started')
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        metrics.record_request(route, request.method, response.status_code, time.perf_counter() - started)
+    return response
+
+@app.after_request
+def log_access(response):
+    """Una línea estructurada por petición (logger 'access')"""
+    request_id = g.get('request_id')
+    if request_id is not None:
+        response.headers['X-Request-ID'] = request_id
+        if Config.ACCESS_LOG:
+            current = g.get('model') or registry.current
+            log_request(
+                Config.LOG_SAMPLE_RATE, request_id, request.method, request.path, response.status_code,
+                (time.perf_counter() - g.request_started) * 1000.0,
+                current.version if current is not None else None
+            )
+    return response
+
 @app.route('/')
 def home():
     """Ruta principal que renderiza la aplicación"""
-    return render_template('app.html')
+    return render_template('app.html', scoring_bundle_url=scoring_bundle_url())
 
 @app.route('/index')
 def index():
     """Ruta alternativa que renderiza la aplicación"""
-    return render_template('app.html')
+    return render_template('app.html', scoring_bundle_url=scoring_bundle_url())
 
 @app.route('/api/data', methods=['GET'])
 def get_data():
     """API endpoint para obtener información básica del sistema"""
-    global model, model_loaded_at, prediction_count
+    return app.response_class(system_data_body(), mimetype='application/json')
+
+def system_data_body():
+    """Cuerpo de /api/data en bytes; solo se vuelve a serializar cuando cambia el modelo"""
+    template, _ = static_responses.get(
+        'api-data', registry.current, lambda: (system_data(), 200),
+        ('prediction_count', 'response_cache', 'audit', 'workers')
+    )
+    return template.render({
+        'prediction_count': metrics.prediction_total(),
+        'workers': model_state.summary(model_pool.default_name),
+        'response_cache': response_cache.stats() if response_cache is not None else {"enabled": False},
+        'audit': audit_sink.stats() if audit_sink is not None else {"enabled": False}
+    })
+
+def system_data():
+    """Cuerpo de /api/data"""
+    current = registry.current
     
     data = {
         "message": "Heart Attack Prediction API",
         "status": "success",
-        "model_loaded": model is not None,
-        "model_loaded_at": model_loaded_at.isoformat() if model_loaded_at else None,
-        "prediction_count": prediction_count,
+        "model_loaded": current is not None,
+        "model_loaded_at": current.loaded_at.isoformat() if current else None,
+        "model_version": current.version if current else None,
+        "prediction_count": metrics.prediction_total(),
+        "response_cache": response_cache.stats() if response_cache is not None else {"enabled": False},
+        "audit": audit_sink.stats() if audit_sink is not None else {"enabled": False},
+        "workers": model_state.summary(model_pool.default_name),
         "endpoints": {
             "predict": "/predict (POST)",
             "model_info": "/model-info (GET)",
             "health": "/health (GET)"
         }
     }
-    return jsonify(data)
+    return data
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Endpoint de verificación de salud del servicio"""
-    global model
+    body, status_code = health_body()
+    return app.response_class(body, status=status_code, mimetype='application/json')
+
+def health_body(controller=None):
+    """Cuerpo de /health en bytes y código de estado; `controller` es el control de admisión del servidor"""
+    controller = controller or admission
+    ready = controller.ready()
+    template, status_code = static_responses.get(
+        'health' if ready else 'health-saturated', registry.current,
+        lambda: health_status(ready), ('timestamp', 'admission')
+    )
+    return template.render({'timestamp': datetime.now().isoformat(), 'admission': controller.stats()}), status_code
+
+def health_status(ready=True):
+    """
+    Cuerpo y código de estado de /health. Un worker saturado responde 503
+    (no listo) para que el balanceador deje de enviarle tráfico.
+    """
+    current = registry.current
     
+    if current is None:
+        health = "unhealthy"
+    else:
+        health = "healthy" if ready else "saturated"
     status = {
-        "status": "healthy" if model is not None else "unhealthy",
-        "model_loaded": model is not None,
+        "status": health,
+        "model_loaded": current is not None,
+        "model_version": current.version if current else None,
+        "ready": current is not None and ready,
+        "admission": admission.stats(),
         "environment": Config.FLASK_ENV,
         "timestamp": datetime.now().isoformat(),
         "version": "1.0.0"
     }
     
-    status_code = 200 if model is not None else 503
-    return jsonify(status), status_code
+    status_code = 200 if current is not None and ready else 503
+    return status, status_code
 
 @app.route('/predict', methods=['POST'])
 def predict():
     """Endpoint para realizar predicciones"""
-    global model, prediction_count
-    
-    if model is None:
-        logger.error("Intento de predicción con modelo no cargado")
-        return jsonify({
-            'error': 'Modelo no disponible. Verifique que el archivo best_model.pkl exista.',
-            'status': 'error'
-        }), 503
-    
     try:
         # Obtener datos del formulario
+        started = time.perf_counter()
         if request.is_json:
             data = request.get_json()
-            logger.info("Datos recibidos (JSON)")
         else:
             data = request.form.to_dict()
-            logger.info("Datos recibidos (Form)")
-        
-        logger.info(f"Datos de entrada: {data}")
+        parsed = time.perf_counter()
+        metrics.observe_stage('parse', parsed - started)
         
-        # Campos esperados del formulario
-        form_features = [
-            'PhysicalActivities', 'AlcoholDrinkers', 'ageCategoryGrouped', 
-            'SmokerStatusGrouped', 'HadDiabetesGrouped', 'HadHeartAttack'
-        ]
-        
-        # Validar que todos los campos estén presentes
-        missing_fields = []
-        form_data = {}
+        # Elegir el modelo; la petición completa se atiende con la versión vigente al empezar
+        model_name = requested_model(data)
+        model_registry = model_pool.get(model_name)
+        if model_registry is None:
+            return model_not_found(model_name)
+        current = g.model = model_registry.current
+        if current is None:
+            logger.error("Intento de predicción con modelo no cargado")
+            return jsonify({
+                'error': 'Modelo no disponible. Verifique que el archivo best_model.pkl exista.',
+                'status': 'error'
+            }), 503
         
-        for feature in form_features:
-            if feature not in data or data[feature] == '':
-                missing_fields.append(feature)
-            else:
-                try:
-                    value = int(float(data[feature]))
-                    # Validar rangos básicos
-                    if feature == 'ageCategoryGrouped' and value not in [0, 1, 2]:
-                        raise ValueError(f"debe ser 0, 1 o 2")
-                    if feature == 'SmokerStatusGrouped' and value not in [0, 1, 2]:
-                        raise ValueError(f"debe ser 0, 1 o 2")
-                    if feature == 'HadDiabetesGrouped' and value not in [0, 1, 2]:
-                        raise ValueError(f"debe ser 0, 1 o 2")
-                    if feature in ['PhysicalActivities', 'AlcoholDrinkers', 'HadHeartAttack'] and value not in [0, 1]:
-                        raise ValueError(f"debe ser 0 o 1")
-                    
-                    form_data[feature] = value
-                except ValueError as e:
-                    logger.error(f"Error de validación: {e}")
-                    return jsonify({
-                        'error': f'Valor inválido para {feature}: {str(e)}',
-                        'status': 'error'
-                    }), 400
+        logger.debug("Datos de entrada (%s): %s", request.mimetype, data)
         
-        if missing_fields:
-            logger.error(f"Campos faltantes: {missing_fields}")
+        # Validar que todos los campos estén presentes y en rango
+        try:
+            form_data = FEATURE_SCHEMA.validate(data)
+            metrics.observe_stage('validate', time.perf_counter() - parsed)
+        except FeatureValidationError as e:
+            logger.debug("Error de validación: %s", e)
             return jsonify({
-                'error': f'Campos faltantes: {", ".join(missing_fields)}',
+                'error': str(e),
                 'status': 'error'
             }), 400
         
-        # Transformar datos del formulario a las features que espera el modelo
-        # El modelo espera estas 7 features en este orden específico:
-        model_features = [
-            'PhysicalActivities_Yes',           # 1 si PhysicalActivities == 1, 0 si no
-            'AlcoholDrinkers_Yes',              # 1 si AlcoholDrinkers == 1, 0 si no  
-            'ageCategoryGrouped_Older adult',   # 1 si ageCategoryGrouped == 2, 0 si no
-            'ageCategoryGrouped_Young',         # 1 si ageCategoryGrouped == 0, 0 si no
-            'SmokerStatusGrouped_Former smoker', # 1 si SmokerStatusGrouped == 1, 0 si no
-            'SmokerStatusGrouped_Never smoked', # 1 si SmokerStatusGrouped == 0, 0 si no
-            'HadDiabetesGrouped_Yes'            # 1 si HadDiabetesGrouped == 1, 0 si no
-        ]
+        # Buscar la respuesta ya construida para esta entrada y versión del modelo
+        cache_key = tuple(form_data[field] for field in FEATURE_SCHEMA.form_features)
+        cache = response_caches.get(current.name)
+        cached = None
+        if cache is not None:
+            cached = cache.get(current.loaded_at, cache_key)
+            metrics.record_cache_lookup(cached is not None)
+        from_cache = cached is not None
         
-        # Crear el array de entrada con las features transformadas
-        input_data = [
-            1 if form_data['PhysicalActivities'] == 1 else 0,          # PhysicalActivities_Yes
-            1 if form_data['AlcoholDrinkers'] == 1 else 0,             # AlcoholDrinkers_Yes
-            1 if form_data['ageCategoryGrouped'] == 2 else 0,          # ageCategoryGrouped_Older adult (65+)
-            1 if form_data['ageCategoryGrouped'] == 0 else 0,          # ageCategoryGrouped_Young (18-44)
-            1 if form_data['SmokerStatusGrouped'] == 1 else 0,         # SmokerStatusGrouped_Former smoker
-            1 if form_data['SmokerStatusGrouped'] == 0 else 0,         # SmokerStatusGrouped_Never smoked
-            1 if form_data['HadDiabetesGrouped'] == 1 else 0           # HadDiabetesGrouped_Yes
-        ]
+        if cached is None:
+            cached = build_prediction_response(current, form_data, cache_key)
+            if cache is not None:
+                cache.put(current.loaded_at, cache_key, cached)
+        else:
+            logger.debug("Respuesta servida desde la caché")
         
-        # Convertir a numpy array y hacer predicción
-        input_array = np.array(input_data).reshape(1, -1)
-        logger.info(f"Datos del formulario: {form_data}")
-        logger.info(f"Array transformado para el modelo: {input_array}")
-        logger.info(f"Features del modelo: {model_features}")
+        # Incrementar contador de predicciones
+        metrics.record_predictions('predict', model=current.name)
         
-        # Realizar predicción
-        prediction = model.predict(input_array)[0]
-        logger.info(f"Predicción: {prediction}")
+        # Comparar con los modelos en sombra en segundo plano
+        shadow = shadow_scorer(current)
+        if shadow is not None:
+            shadow.submit(
+                FEATURE_SCHEMA.input_values([form_data]), [cached.prediction],
+                None if cached.probabilities is None else [cached.probabilities]
+            )
+        if audit_sink is not None:
+            audit_sink.record(
+                'predict', current, g.request_id, [form_data], [cached.prediction],
+                None if cached.probabilities is None else [cached.probabilities]
+            )
+        if drift_monitor is not None:
+            drift_monitor.observe(form_data)
         
-        # Intentar obtener probabilidades si el modelo las soporta
-        prob_no_attack = None
-        prob_attack = None
+        logger.debug("Resultado exitoso: predicción=%s", cached.prediction)
         
-        try:
-            if hasattr(model, 'predict_proba'):
-                probabilities = model.predict_proba(input_array)[0]
-                prob_no_attack = float(probabilities[0])
-                prob_attack = float(probabilities[1])
-                logger.info(f"Probabilidades: No ataque={prob_no_attack:.3f}, Ataque={prob_attack:.3f}")
-        except Exception as prob_error:
-            logger.warning(f"No se pudieron obtener probabilidades: {prob_error}")
+        # Respuesta compacta (solo predicción y probabilidades): bytes ya construidos
+        compact = compact_requested(request.args.get('compact'), request.headers.get('Accept'))
+        # Con ?explain=1 se añade la explicación precalculada de esta entrada
+        explain = query_flag(request.args.get('explain'))
+        etag = cached.etag + ('-c' if compact else '') + ('-e' if explain else '')
         
-        # Incrementar contador de predicciones
-        prediction_count += 1
+        if Config.RESPONSE_ETAG and request.if_none_match.contains_weak(etag):
+            response = app.response_class(status=304)
+        else:
+            rendering = time.perf_counter()
+            body = cached.compact_body if compact else cached.render(datetime.now().isoformat())
+            if explain:
+                body = with_explanation(body, explanation_for(current, form_data))
+            if from_cache:
+                # En un fallo la serialización ya se midió al construir la respuesta
+                metrics.observe_stage('serialize', time.perf_counter() - rendering)
+            response = app.response_class(body, mimetype='application/json')
+        if Config.RESPONSE_ETAG:
+            response.set_etag(etag, weak=True)
+        return response
         
-        # Interpretar resultado
-        result = {
-            'prediction': int(prediction),
-            'result': 'Alto riesgo de ataque al corazón' if prediction == 1 else 'Bajo riesgo de ataque al corazón',
-            'probability_no_attack': prob_no_attack,
-            'probability_attack': prob_attack,
-            'status': 'success',
-            'timestamp': datetime.now().isoformat(),
-            'input_features': form_data,
-            'model_features': dict(zip(model_features, input_data))
-        }
+    except Exception as e:
+        logger.exception("Error en predicción: %s", e)
+        return jsonify({
+            'error': f'Error interno del servidor: {str(e)}',
+            'status': 'error',
+            'timestamp': datetime.now().isoformat()
+        }), 500
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """Endpoint para realizar predicciones sobre un lote de registros (JSON array o NDJSON)"""
+    # El modelo se elige con ?model= o la cabecera X-Model
+    model_name = request.args.get('model') or requested_model()
+    model_registry = model_pool.get(model_name)
+    if model_registry is None:
+        return model_not_found(model_name)
+    explain = query_flag(request.args.get('explain'))
+    current = g.model = model_registry.current
+    if current is None:
+        logger.error("Intento de predicción por lotes con modelo no cargado")
+        return jsonify({
+            'error': 'Modelo no disponible. Verifique que el archivo best_model.pkl exista.',
+            'status': 'error'
+        }), 503
+    
+    try:
+        records = parse_batch_body()
+    except ValueError as e:
+        logger.debug("Cuerpo de lote inválido: %s", e)
+        return jsonify({
+            'error': f'Cuerpo de lote inválido: {str(e)}',
+            'status': 'error'
+        }), 400
+    
+    if len(records) > Config.BATCH_MAX_ROWS:
+        return jsonify({
+            'error': f'El lote supera el máximo de {Config.BATCH_MAX_ROWS} registros',
+            'status': 'error'
+        }), 413
+    
+    try:
+        # Validar cada registro por separado: los errores se devuelven por fila
+        results = [None] * len(records)
+        valid_rows = []
+        valid_positions = []
+        
+        for position, record in enumerate(records):
+            try:
+                if not isinstance(record, dict):
+                    raise FeatureValidationError('El registro debe ser un objeto JSON')
+                valid_rows.append(FEATURE_SCHEMA.validate(record))
+                valid_positions.append(position)
+            except FeatureValidationError as e:
+                results[position] = {'index': position, 'status': 'error', 'error': str(e)}
+        
+        if valid_rows:
+            values = FEATURE_SCHEMA.input_values(valid_rows)
+            predictions, probabilities = score_values(current, values)
+            shadow = shadow_scorer(current)
+            if shadow is not None:
+                shadow.submit(values, predictions, probabilities)
+            if audit_sink is not None:
+                audit_sink.record('batch', current, g.request_id, valid_rows, predictions, probabilities)
+            if drift_monitor is not None:
+                drift_monitor.observe_values(values)
+            explanations = None
+            if explain and current.explanations is not None:
+                explanations = current.explanations.explain_values(FEATURE_SCHEMA.input_fields, values)
+            for i, position in enumerate(valid_positions):
+                prediction = predictions[i]
+                results[position] = {
+                    'index': position,
+                    'prediction': int(prediction),
+                    'result': describe_prediction(prediction),
+                    'probability_no_attack': float(probabilities[i, 0]) if probabilities is not None else None,
+                    'probability_attack': float(probabilities[i, 1]) if probabilities is not None else None,
+                    'status': 'success'
+                }
+                if explain:
+                    results[position]['explanation'] = explanations[i] if explanations is not None else None
         
-        logger.info(f"Resultado exitoso: predicción={prediction}")
-        return jsonify(result)
+        metrics.record_predictions('batch', len(valid_rows), model=current.name)
+        logger.debug("Lote procesado: %d predicciones, %d errores", len(valid_rows), len(records) - len(valid_rows))
+        
+        return jsonify({
+            'status': 'success',
+            'count': len(records),
+            'predicted': len(valid_rows),
+            'errors': len(records) - len(valid_rows),
+            'results': results,
+            'model': current.name,
+            'model_version': current.version,
+            'timestamp': datetime.now().isoformat()
+        })
         
     except Exception as e:
-        logger.error(f"Error en predicción: {str(e)}")
+        logger.exception("Error en predicción por lotes: %s", e)
         return jsonify({
             'error': f'Error interno del servidor: {str(e)}',
             'status': 'error',
             'timestamp': datetime.now().isoformat()
         }), 500
 
+def parse_batch_body():
+    """Lee los registros del lote como JSON array o como NDJSON (un objeto por línea)"""
+    body = request.get_data(as_text=True)
+    if not body.strip():
+        raise ValueError('el cuerpo está vacío')
+    
+    if request.mimetype != 'application/x-ndjson' and body.lstrip().startswith('['):
+        records = json.loads(body)
+        if not isinstance(records, list):
+            raise ValueError('se esperaba un array JSON')
+        return records
+    
+    records = []
+    for line_number, line in enumerate(body.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            raise ValueError(f'línea {line_number}: {e.msg}')
+    return records
+
+def score_values(current, values):
+    """Predice un lote a partir de la matriz de valores de input_values (ver LoadedModel.score_values)"""
+    return current.score_values(values)
+
+def build_prediction_response(current, form_data, cache_key):
+    """Calcula la predicción de un registro validado y serializa su respuesta"""
+    # Crear el array de entrada con las features transformadas (buffer reutilizado por hilo)
+    started = time.perf_counter()
+    input_array = FEATURE_SCHEMA.encode(form_data)
+    encoded = time.perf_counter()
+    metrics.observe_stage('encode', encoded - started)
+    debug = logger.isEnabledFor(logging.DEBUG)
+    
+    prob_no_attack = None
+    prob_attack = None
+    
+    # Buscar primero en la tabla precalculada; si la entrada no está cubierta
+    # (por ejemplo porque cambió algún dominio) se consulta el modelo
+    table_entry = current.table.lookup(form_data) if current.table is not None else None
+    
+    if table_entry is not None:
+        prediction, probabilities = table_entry
+        if debug:
+            logger.debug("Predicción (tabla): %s", prediction)
+        if probabilities is not None:
+            prob_no_attack = float(probabilities[0])
+            prob_attack = float(probabilities[1])
+    else:
+        if debug:
+            # input_array es un buffer reutilizado: se registra una copia
+            logger.debug(
+                "Array transformado para el modelo: %s",
+                dict(zip(FEATURE_SCHEMA.model_features, input_array[0].tolist()))
+            )
+        
+        # Realizar predicción: una sola llamada devuelve clase y probabilidades
+        predictions, probabilities = current.scorer.score(input_array)
+        prediction = predictions[0]
+        if debug:
+            logger.debug("Predicción: %s", prediction)
+        
+        if probabilities is not None:
+            prob_no_attack = float(probabilities[0, 0])
+            prob_attack = float(probabilities[0, 1])
+    
+    inferred = time.perf_counter()
+    metrics.observe_stage('infer', inferred - encoded)
+    
+    if debug and prob_attack is not None:
+        logger.debug("Probabilidades: No ataque=%.3f, Ataque=%.3f", prob_no_attack, prob_attack)
+    
+    response = prediction_response(
+        current, form_data, input_array[0].tolist(), prediction, prob_no_attack, prob_attack, cache_key
+    )
+    metrics.observe_stage('serialize', time.perf_counter() - inferred)
+    return response
+
+def prediction_response(current, form_data, encoded, prediction, prob_no_attack, prob_attack, cache_key):
+    """Serializa la respuesta de /predict de un registro ya puntuado"""
+    # Interpretar resultado (el timestamp se añade en cada respuesta)
+    result = {
+        'prediction': int(prediction),
+        'result': describe_prediction(prediction),
+        'probability_no_attack': prob_no_attack,
+        'probability_attack': prob_attack,
+        'status': 'success',
+        'input_features': form_data,
+        'model_features': dict(zip(FEATURE_SCHEMA.model_features, encoded)),
+        'model': current.name,
+        'model_version': current.version
+    }
+    probabilities = None if prob_attack is None else [prob_no_attack, prob_attack]
+    return CachedResponse(int(prediction), result, make_etag(current.version, cache_key), probabilities)
+
+def describe_prediction(prediction):
+    """Texto del resultado para el usuario"""
+    return 'Alto riesgo de ataque al corazón' if prediction == 1 else 'Bajo riesgo de ataque al corazón'
+
 @app.route('/model-info')
 def model_info():
-    """Endpoint para obtener información del modelo"""
-    global model, model_loaded_at, prediction_count
-    
-    if model is None:
-        return jsonify({
+    """Endpoint para obtener información del modelo (?model= para uno concreto del pool)"""
+    body, status_code = model_info_body(request.args.get('model'))
+    return app.response_class(body, status=status_code, mimetype='application/json')
+
+def model_info_body(name=None):
+    """Cuerpo de /model-info en bytes; la parte fija se serializa una vez por versión del modelo"""
+    model_registry = model_pool.get(name)
+    if model_registry is None:
+        info, status_code = model_info_payload(name)
+        return ResponseTemplate(info, ()).render({}), status_code
+    template, status_code = static_responses.get(
+        f'model-info:{model_registry.name}', model_registry.current,
+        lambda: model_info_payload(model_registry.name), ('prediction_count', 'models', 'workers')
+    )
+    return template.render({
+        'prediction_count': metrics.prediction_total(),
+        'models': pool_summary(),
+        'workers': model_state.summary(model_registry.name)
+    }), status_code
+
+def model_info_payload(name=None):
+    """Cuerpo y código de estado de /model-info"""
+    model_registry = model_pool.get(name)
+    if model_registry is None:
+        return ({
+            'error': f"Modelo desconocido: {name}. Modelos disponibles: {', '.join(model_pool.names)}",
+            'status': 'error'
+        }, 400)
+    current = model_registry.current
+    if current is None:
+        return ({
             'error': 'Modelo no disponible. Verifique que el archivo best_model.pkl exista.',
             'status': 'error'
-        }), 503
+        }, 503)
     
     try:
+        model = current.model
+        scorer = current.scorer
         info = {
-            'model_type': type(model).__name__,
-            'model_module': type(model).__module__,
+            'model': current.name,
+            'model_type': getattr(model, 'estimator_name', None) or type(model).__name__,
+            'model_module': getattr(model, 'estimator_module', None) or type(model).__module__,
+            'model_format': 'artifact' if is_artifact(current.path) else 'pickle',
             'status': 'loaded',
-            'loaded_at': model_loaded_at.isoformat() if model_loaded_at else None,
-            'prediction_count': prediction_count,
+            'loaded_at': current.loaded_at.isoformat(),
+            'model_version': current.version,
+            'model_path': current.path,
+            'prediction_count': metrics.prediction_total(),
+            'workers': model_state.summary(current.name),
             'environment': Config.FLASK_ENV,
             'debug_mode': Config.DEBUG,
-            'form_features': [
-                'PhysicalActivities', 'AlcoholDrinkers', 'ageCategoryGrouped', 
-                'SmokerStatusGrouped', 'HadDiabetesGrouped', 'HadHeartAttack'
-            ],
-            'model_features': [
-                'PhysicalActivities_Yes', 'AlcoholDrinkers_Yes',
-                'ageCategoryGrouped_Older adult', 'ageCategoryGrouped_Young',
-                'SmokerStatusGrouped_Former smoker', 'SmokerStatusGrouped_Never smoked',
-                'HadDiabetesGrouped_Yes'
-            ]
+            'form_features': FEATURE_SCHEMA.form_features,
+            'model_features': FEATURE_SCHEMA.model_features
         }
         
         # Información adicional si está disponible
@@ -297,15 +752,217 @@ def model_info():
         
         # Verificar si soporta probabilidades
         info['supports_probabilities'] = hasattr(model, 'predict_proba')
+        info['decision_threshold'] = scorer.threshold
+        info['single_pass_inference'] = scorer.single_pass
+        info['compiled_kernel'] = getattr(scorer.model, 'kernel', None)
+        info['per_instance_explanations'] = current.explanations is not None
+        info['explanation_scale'] = current.explanations.scale if current.explanations is not None else None
+        
+        # Resumen del pool: rol de cada modelo y, para los que están en sombra, cuánto discrepan
+        info['default_model'] = model_pool.default_name
+        info['models'] = pool_summary()
             
-        return jsonify(info)
+        return info, 200
         
     except Exception as e:
         logger.error(f"Error al obtener información del modelo: {e}")
-        return jsonify({
+        return ({
             'error': f'Error al obtener información del modelo: {str(e)}',
             'status': 'error'
+        }, 500)
+
+def pool_summary():
+    """Estado de cada modelo del pool para /model-info"""
+    summary = {}
+    for pool_name, model_registry in model_pool.registries.items():
+        current = model_registry.current
+        entry = {
+            'role': model_pool.role(pool_name),
+            'loaded': current is not None,
+            'model_path': model_registry.path,
+            'model_version': current.version if current else None,
+            'model_type': (getattr(current.model, 'estimator_name', None) or type(current.model).__name__)
+                          if current else None,
+            'loaded_at': current.loaded_at.isoformat() if current else None
+        }
+        if pool_name in model_pool.shadow_names:
+            entry['shadow'] = model_pool.shadow.summary(pool_name)
+        summary[pool_name] = entry
+    return summary
+
+@app.route('/monitoring/drift', methods=['GET'])
+def drift_report():
+    """Deriva de las entradas de la ventana (?window= en segundos) frente a la referencia del modelo (?model=)"""
+    payload, status_code = drift_payload(request.args.get('model'), request.args.get('window'))
+    return jsonify(payload), status_code
+
+def drift_payload(name=None, window=None):
+    """Cuerpo y código de estado de /monitoring/drift"""
+    if drift_monitor is None:
+        return ({
+            'error': 'Monitorización de deriva deshabilitada (DRIFT_MONITORING=false)',
+            'status': 'error'
+        }, 404)
+    try:
+        seconds = float(window) if window else None
+    except ValueError:
+        seconds = -1
+    if seconds is not None and not seconds > 0:
+        return ({'error': 'window debe ser un número de segundos positivo', 'status': 'error'}, 400)
+    model_registry = model_pool.get(name)
+    if model_registry is None:
+        return ({
+            'error': f"Modelo desconocido: {name}. Modelos disponibles: {', '.join(model_pool.names)}",
+            'status': 'error'
+        }, 400)
+    current = model_registry.current
+    reference = current.reference if current is not None else None
+    
+    report = drift_monitor.report(reference, seconds)
+    report.update({
+        'status': 'success',
+        'model': model_registry.name,
+        'model_version': current.version if current else None,
+        'reference_available': reference is not None,
+        'reference_rows': int(reference.sum()) if reference is not None else None,
+        'bucket_seconds': drift_monitor.bucket_seconds,
+        'shared_across_workers': drift_monitor.shared,
+        'timestamp': datetime.now().isoformat()
+    })
+    return report, 200
+
+@app.route('/scoring-bundle', methods=['GET'])
+def scoring_bundle():
+    """Tabla de puntuación completa de un modelo (?model=) para puntuar en el navegador"""
+    body, status_code, headers = scoring_bundle_response(
+        request.args.get('model'), request.args.get('v'), request.headers.get('If-None-Match')
+    )
+    return app.response_class(body, status=status_code, headers=headers, mimetype='application/json')
+
+def scoring_bundle_response(name=None, requested_etag=None, if_none_match=None):
+    """
+    Cuerpo, código y cabeceras de /scoring-bundle. Pedido con ?v=<etag> (la
+    URL versionada que usa la página) se puede cachear sin revalidar; la URL
+    sin versión se revalida siempre con el ETag.
+    """
+    model_registry = model_pool.get(name)
+    if model_registry is None:
+        payload = {
+            'error': f"Modelo desconocido: {name}. Modelos disponibles: {', '.join(model_pool.names)}",
+            'status': 'error'
+        }
+        return ResponseTemplate(payload, ()).render({}), 400, {}
+    bundle = scoring_bundle_body(model_registry)
+    if bundle is None:
+        payload = {'error': 'Modelo no disponible. Verifique que el archivo best_model.pkl exista.', 'status': 'error'}
+        return ResponseTemplate(payload, ()).render({}), 503, {}
+    body, etag = bundle
+    if requested_etag == etag:
+        cache_control = f'public, max-age={Config.SCORING_BUNDLE_MAX_AGE}, immutable'
+    else:
+        cache_control = 'no-cache'
+    headers = {'ETag': f'"{etag}"', 'Cache-Control': cache_control}
+    if etag_matches(if_none_match, etag):
+        return b'', 304, headers
+    return body, 200, headers
+
+def scoring_bundle_body(model_registry):
+    """(cuerpo, ETag) del bundle del modelo en servicio, o None si no está cargado"""
+    current = model_registry.current
+    if current is None:
+        return None
+    template, _ = static_responses.get(
+        f'scoring-bundle:{model_registry.name}', current, lambda: (scoring_bundle_payload(current), 200)
+    )
+    body = template.render({})
+    # El ETag cubre la versión del modelo y el contenido (p. ej. el umbral de decisión)
+    return body, make_etag(current.version, body)
+
+def scoring_bundle_url():
+    """URL versionada del bundle del modelo por defecto para la página, o None sin modelo"""
+    bundle = scoring_bundle_body(registry)
+    return f'/scoring-bundle?v={bundle[1]}' if bundle is not None else None
+
+def scoring_bundle_payload(current):
+    """
+    Predicción y probabilidades de todas las combinaciones de entrada, en el
+    orden del índice mixto de prediction_table (el primer campo es el más
+    significativo), más lo necesario para mostrarlas como /predict.
+    """
+    predictions, probabilities = current.score_values(FEATURE_SCHEMA.input_grid())
+    return {
+        'format': 'heart-scoring-bundle',
+        'format_version': 1,
+        'model': current.name,
+        'model_version': current.version,
+        'decision_threshold': current.scorer.threshold,
+        'fields': FEATURE_SCHEMA.input_fields,
+        'domains': [list(values) for _, values in FEATURE_SCHEMA.input_domains],
+        'predictions': [int(prediction) for prediction in predictions],
+        'probability_no_attack': probabilities[:, 0].tolist() if probabilities is not None else None,
+        'probability_attack': probabilities[:, 1].tolist() if probabilities is not None else None,
+        'results': {'0': describe_prediction(0), '1': describe_prediction(1)}
+    }
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Métricas en formato Prometheus, agregadas entre los workers de gunicorn"""
+    if not metrics.PROMETHEUS_AVAILABLE:
+        return jsonify({
+            'error': 'Métricas no disponibles: instale prometheus_client',
+            'status': 'error'
+        }), 503
+    return app.response_class(metrics.render_metrics(), content_type=metrics.CONTENT_TYPE_LATEST)
+
+@app.route('/admin/reload', methods=['POST'])
+def reload_model():
+    """
+    Recarga un modelo desde su ruta sin reiniciar el servicio (requiere
+    ADMIN_TOKEN; ?model= elige cuál). El worker que atiende la petición recarga
+    y la propaga a los demás a través del estado compartido; la respuesta
+    espera hasta RELOAD_WAIT_SECONDS a que todos sirvan la nueva versión.
+    """
+    if not Config.ADMIN_TOKEN:
+        return jsonify({
+            'error': 'Recarga de modelo deshabilitada. Configure ADMIN_TOKEN para habilitarla.',
+            'status': 'error'
+        }), 403
+    
+    token = request.headers.get('X-Admin-Token', '')
+    if not hmac.compare_digest(token.encode(), Config.ADMIN_TOKEN.encode()):
+        return jsonify({
+            'error': 'Token de administración inválido',
+            'status': 'error'
+        }), 401
+    
+    model_name = request.args.get('model')
+    model_registry = model_pool.get(model_name)
+    if model_registry is None:
+        return model_not_found(model_name)
+    
+    previous = model_registry.current
+    if not load_model(model_registry.name):
+        return jsonify({
+            'error': 'No se pudo recargar el modelo; se mantiene la versión anterior',
+            'model': model_registry.name,
+            'model_version': previous.version if previous else None,
+            'status': 'error'
         }), 500
+    
+    current = model_registry.current
+    generation = model_state.request_reload(model_registry.name)
+    workers = model_state.wait_for_version(model_registry.name, current.version, Config.RELOAD_WAIT_SECONDS)
+    updated = workers['model_versions'].get(current.version, 0)
+    return jsonify({
+        'status': 'success',
+        'model': model_registry.name,
+        'previous_version': previous.version if previous else None,
+        'model_version': current.version,
+        'loaded_at': current.loaded_at.isoformat(),
+        'reload_generation': generation,
+        'workers_updated': updated,
+        'workers': workers
+    }), 200 if updated == workers['workers'] else 202
 
 @app.errorhandler(404)
 def not_found(error):
@@ -331,11 +988,8 @@ def internal_error(error):
         'status': 'error'
     }), 500
 
-logger.info("Iniciando aplicación...")
-if not load_model():
-    logger.warning("No se pudo cargar el modelo real. Usando modelo dummy para testing.")
-
 if __name__ == '__main__':
+    start_worker()
     logger.info("Aplicación iniciada correctamente")
     logger.info(f"Modo: {Config.FLASK_ENV}")
     # For production deployment
@@ -343,7 +997,5 @@ if __name__ == '__main__':
         app.run(host='0.0.0.0', port=Config.PORT)
     else:
         app.run(debug=Config.DEBUG, host='0.0.0.0', port=Config.PORT) 
-else:
-    logger.error("No se pudo cargar el modelo. Verificar archivo best_model.pkl")
-    print("ERROR: No se pudo cargar el modelo. La aplicación no se iniciará.")
-    print("Verificar que el archivo 'best_model.pkl' existe en el directorio actual.")
\ No newline at end of file
+elif registry.current is None:
+    logger.error(f"No se pudo cargar el modelo. Verificar archivo {Config.MODEL_PATH}")
\ No newline at end of file
@@ -0,0 +1,161 @@
+"""
+Métricas del servicio en formato Prometheus (GET /metrics).
+
+Usa prometheus_client si está instalado. Con varios workers de gunicorn las
+métricas de cada proceso se escriben en archivos mmap dentro de
+PROMETHEUS_MULTIPROC_DIR (gunicorn.conf.py lo configura) y se agregan al
+leerlas, de modo que /metrics refleja a todos los workers y no solo al que
+atiende la petición.
+
+El contador de predicciones de /api/data y /model-info no depende de
+prometheus_client: vive en shared_state, cuya lectura es una suma de arrays
+en lugar de recorrer y decodificar todos los archivos de métricas.
+"""
+
+import os
+
+from shared_state import SharedCounters
+
+try:
+    from prometheus_client import (
+        CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, CONTENT_TYPE_LATEST, generate_latest
+    )
+    from prometheus_client import multiprocess
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+    CONTENT_TYPE_LATEST = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Etapas de /predict cuya latencia se mide por separado
+STAGES = ('parse', 'validate', 'encode', 'infer', 'serialize')
+
+# La mayoría de las etapas duran microsegundos
+STAGE_BUCKETS = (
+    0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0
+)
+REQUEST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def multiprocess_mode():
+    """True si las métricas se comparten entre procesos a través de PROMETHEUS_MULTIPROC_DIR"""
+    return PROMETHEUS_AVAILABLE and bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+
+if PROMETHEUS_AVAILABLE:
+    REQUESTS = Counter(
+        'heart_api_requests_total', 'Peticiones HTTP atendidas', ['route', 'method', 'status']
+    )
+    REQUEST_LATENCY = Histogram(
+        'heart_api_request_duration_seconds', 'Latencia total de la petición', ['route'],
+        buckets=REQUEST_BUCKETS
+    )
+    STAGE_LATENCY = Histogram(
+        'heart_api_stage_duration_seconds', 'Latencia de cada etapa de /predict', ['stage'],
+        buckets=STAGE_BUCKETS
+    )
+    PREDICTIONS = Counter(
+        'heart_api_predictions_total', 'Registros puntuados', ['endpoint', 'model']
+    )
+    CACHE_LOOKUPS = Counter(
+        'heart_api_response_cache_lookups_total', 'Consultas a la caché de respuestas de /predict', ['result']
+    )
+    MODEL_LOADS = Counter(
+        'heart_api_model_loads_total', 'Cargas del modelo', ['model', 'result']
+    )
+    MODEL_LOAD_SECONDS = Gauge(
+        'heart_api_model_load_seconds', 'Duración de la última carga del modelo (lectura, validación y preparación)',
+        ['model'], multiprocess_mode='mostrecent'
+    )
+    REJECTIONS = Counter(
+        'heart_api_admission_rejections_total', 'Peticiones rechazadas con 503 por el control de admisión', ['reason']
+    )
+    AUDIT_RECORDS = Counter(
+        'heart_api_audit_records_total', 'Registros de auditoría escritos o descartados', ['result']
+    )
+    SHADOW_COMPARISONS = Counter(
+        'heart_api_shadow_comparisons_total', 'Registros puntuados en sombra por un modelo candidato', ['model']
+    )
+    SHADOW_DISAGREEMENTS = Counter(
+        'heart_api_shadow_disagreements_total', 'Registros en que el candidato predice otra clase que el principal',
+        ['model']
+    )
+
+    # Hijos con etiquetas resueltos una sola vez para no pagar labels() en cada petición
+    _stage_children = {stage: STAGE_LATENCY.labels(stage) for stage in STAGES}
+    _cache_children = {True: CACHE_LOOKUPS.labels('hit'), False: CACHE_LOOKUPS.labels('miss')}
+
+# Registros puntuados por endpoint; en memoria del proceso hasta configure_shared_state
+PREDICTION_ENDPOINTS = ('predict', 'batch')
+prediction_counts = SharedCounters('predictions', PREDICTION_ENDPOINTS)
+
+
+def configure_shared_state(directory):
+    """Comparte los contadores entre workers a través de `directory` (None: solo este proceso)"""
+    global prediction_counts
+    prediction_counts = SharedCounters('predictions', PREDICTION_ENDPOINTS, directory)
+
+
+def observe_stage(stage, seconds):
+    if PROMETHEUS_AVAILABLE:
+        _stage_children[stage].observe(seconds)
+
+
+def record_request(route, method, status, seconds):
+    if PROMETHEUS_AVAILABLE:
+        REQUESTS.labels(route, method, str(status)).inc()
+        REQUEST_LATENCY.labels(route).observe(seconds)
+
+
+def record_cache_lookup(hit):
+    if PROMETHEUS_AVAILABLE:
+        _cache_children[hit].inc()
+
+
+def record_predictions(endpoint, count=1, model='default'):
+    """Cuenta registros puntuados (endpoint 'predict' o 'batch')"""
+    prediction_counts.add(endpoint, count)
+    if PROMETHEUS_AVAILABLE:
+        PREDICTIONS.labels(endpoint, model).inc(count)
+
+
+def record_model_load(model, seconds, ok):
+    if PROMETHEUS_AVAILABLE:
+        MODEL_LOADS.labels(model, 'success' if ok else 'error').inc()
+        if ok:
+            MODEL_LOAD_SECONDS.labels(model).set(seconds)
+
+
+def record_rejection(reason):
+    if PROMETHEUS_AVAILABLE:
+        REJECTIONS.labels(reason).inc()
+
+
+def record_audit(count, written):
+    if PROMETHEUS_AVAILABLE:
+        AUDIT_RECORDS.labels('written' if written else 'dropped').inc(count)
+
+
+def record_shadow(model, compared, disagreements):
+    if PROMETHEUS_AVAILABLE:
+        SHADOW_COMPARISONS.labels(model).inc(compared)
+        SHADOW_DISAGREEMENTS.labels(model).inc(disagreements)
+
+
+def collector_registry():
+    """Registro del que leer: el global o, en modo multiproceso, el agregado de todos los workers"""
+    if not multiprocess_mode():
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def prediction_total():
+    """Predicciones realizadas por todos los procesos (por este si no hay directorio compartido)"""
+    return sum(prediction_counts.values().values())
+
+
+def render_metrics():
+    """Cuerpo de GET /metrics en el formato de exposición de Prometheus"""
+    return generate_latest(collector_registry())
@@ -0,0 +1,263 @@
+"""
+Formato de artefacto del modelo: manifiesto JSON y arrays .npy mapeados en memoria.
+
+Un artefacto es un directorio con manifest.json y un archivo .npy por array
+de parámetros del kernel compilado (model_compiler). El manifiesto guarda los
+nombres de las features, las clases, las versiones de scikit-learn y NumPy
+con que se exportó, el sha256 de cada array y un hash de contenido que cubre
+todo lo anterior; la versión del modelo son sus 12 primeros caracteres.
+
+Cargar un artefacto no ejecuta código (np.load con allow_pickle=False) y los
+arrays se abren con mmap_mode='r', así que los workers comparten una sola
+copia física de los parámetros a través de la caché de páginas. Los
+estimadores sin kernel compilado siguen sirviéndose desde un pickle.
+
+El manifiesto puede llevar además la distribución de referencia de las
+entradas (input_reference, ver drift.py) contra la que se mide la deriva.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+from datetime import datetime
+
+import numpy as np
+
+from model_compiler import CompiledLinear, CompiledTreeEnsemble, TreeKernel, compile_model
+
+MANIFEST_NAME = 'manifest.json'
+FORMAT_NAME = 'heart-model-artifact'
+FORMAT_VERSION = 1
+
+# Campos del manifiesto que no forman parte del hash de contenido
+_UNHASHED_FIELDS = ('content_hash', 'created_at')
+
+
+class ArtifactError(ValueError):
+    """Artefacto ilegible, incompleto o cuyo contenido no coincide con el manifiesto"""
+
+
+def is_artifact(path):
+    """True si `path` es un directorio de artefacto o su manifest.json"""
+    if os.path.isdir(path):
+        return os.path.exists(os.path.join(path, MANIFEST_NAME))
+    return os.path.basename(path) == MANIFEST_NAME
+
+
+def artifact_directory(path):
+    return path if os.path.isdir(path) else os.path.dirname(os.path.abspath(path))
+
+
+def watched_file(path):
+    """Archivo cuyo cambio indica un modelo nuevo (el manifiesto se escribe el último)"""
+    if os.path.isdir(path):
+        return os.path.join(path, MANIFEST_NAME)
+    return path
+
+
+def _sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def content_hash(manifest):
+    """Hash del manifiesto canónico (sin content_hash ni created_at)"""
+    hashed = {key: value for key, value in manifest.items() if key not in _UNHASHED_FIELDS}
+    canonical = json.dumps(hashed, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _kernel_arrays(compiled):
+    """Arrays de parámetros del kernel compilado y sus parámetros escalares"""
+    if isinstance(compiled, CompiledTreeEnsemble):
+        # Todos los árboles concatenados; node_offsets marca dónde empieza cada uno
+        trees = compiled.trees
+        offsets = np.cumsum([0] + [len(tree.children_left) for tree in trees]).astype(np.int64)
+        arrays = {
+            'node_offsets': offsets,
+            'children_left': np.concatenate([tree.children_left for tree in trees]).astype(np.int64),
+            'children_right': np.concatenate([tree.children_right for tree in trees]).astype(np.int64),
+            'feature': np.concatenate([tree.feature for tree in trees]).astype(np.int64),
+            'threshold': np.concatenate([tree.threshold for tree in trees]).astype(np.float64),
+            'value': np.concatenate([tree.value for tree in trees]).astype(np.float64),
+        }
+        return arrays, {}
+    if isinstance(compiled, CompiledLinear):
+        arrays = {
+            'coef': compiled.coef.astype(np.float64),
+            'intercept': compiled.intercept.astype(np.float64),
+        }
+        return arrays, {'ovr': bool(compiled.ovr)}
+    raise ArtifactError(f'Kernel no soportado: {type(compiled).__name__}')
+
+
+def _build_kernel(kernel, arrays, params, classes, n_features, feature_names):
+    if kernel == 'tree_ensemble':
+        offsets = arrays['node_offsets']
+        trees = []
+        for start, end in zip(offsets[:-1], offsets[1:]):
+            # Vistas del mmap: ningún árbol copia sus arrays
+            trees.append(TreeKernel(
+                arrays['children_left'][start:end], arrays['children_right'][start:end],
+                arrays['feature'][start:end], arrays['threshold'][start:end], arrays['value'][start:end]
+            ))
+        return CompiledTreeEnsemble(trees, classes, n_features, feature_names)
+    if kernel == 'linear':
+        return CompiledLinear(arrays['coef'], arrays['intercept'], classes, params.get('ovr', False), feature_names)
+    raise ArtifactError(f'Kernel desconocido en el manifiesto: {kernel}')
+
+
+def export_artifact(model, directory, grid, reference=None):
+    """
+    Compila `model`, escribe su artefacto en `directory` y lo verifica contra el
+    original sobre `grid`. Devuelve el manifiesto. El directorio se sustituye de
+    forma atómica, de modo que un servidor que lo vigila nunca ve uno a medias.
+    `reference` es la distribución de entrada de drift.build_reference.
+    """
+    compiled = compile_model(model, grid)
+    if compiled is None:
+        raise ArtifactError(
+            f'{type(model).__name__} no tiene kernel compilado o no se pudo verificar; siga usando el pickle'
+        )
+
+    import sklearn
+    arrays, params = _kernel_arrays(compiled)
+    manifest = {
+        'format': FORMAT_NAME,
+        'format_version': FORMAT_VERSION,
+        'kernel': compiled.kernel,
+        'estimator': type(model).__name__,
+        'estimator_module': type(model).__module__,
+        'sklearn_version': sklearn.__version__,
+        'numpy_version': np.__version__,
+        'feature_names': [str(name) for name in getattr(model, 'feature_names_in_', [])],
+        'n_features': int(model.n_features_in_),
+        'classes': np.asarray(model.classes_).tolist(),
+        'params': params,
+        'arrays': {},
+    }
+    if reference is not None:
+        manifest['input_reference'] = reference
+
+    directory = os.path.abspath(directory)
+    parent = os.path.dirname(directory)
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix='.' + os.path.basename(directory) + '.', dir=parent)
+    try:
+        os.chmod(staging, 0o755)
+        for name, array in arrays.items():
+            file_name = f'{name}.npy'
+            np.save(os.path.join(staging, file_name), np.ascontiguousarray(array), allow_pickle=False)
+            manifest['arrays'][name] = {
+                'file': file_name,
+                'dtype': array.dtype.str,
+                'shape': list(array.shape),
+                'sha256': _sha256_file(os.path.join(staging, file_name)),
+            }
+        manifest['content_hash'] = content_hash(manifest)
+        manifest['created_at'] = datetime.now().isoformat()
+        with open(os.path.join(staging, MANIFEST_NAME), 'w', encoding='utf-8') as file:
+            json.dump(manifest, file, indent=2, sort_keys=True)
+            file.write('\n')
+
+        # Comprobar que el artefacto escrito reproduce al modelo original
+        loaded, _ = load_artifact(staging)
+        if not (np.array_equal(loaded.predict_proba(grid), compiled.predict_proba(grid))
+                and np.array_equal(loaded.predict(grid), compiled.predict(grid))):
+            raise ArtifactError('El artefacto escrito no reproduce las predicciones del modelo')
+
+        previous = None
+        if os.path.exists(directory):
+            previous = tempfile.mkdtemp(prefix='.' + os.path.basename(directory) + '.old.', dir=parent)
+            os.rmdir(previous)
+            os.rename(directory, previous)
+        os.rename(staging, directory)
+        if previous is not None:
+            shutil.rmtree(previous, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return manifest
+
+
+def read_manifest(path):
+    """Lee y valida la estructura de manifest.json"""
+    manifest_path = os.path.join(artifact_directory(path), MANIFEST_NAME)
+    try:
+        with open(manifest_path, encoding='utf-8') as file:
+            manifest = json.load(file)
+    except (OSError, ValueError) as e:
+        raise ArtifactError(f'No se pudo leer {manifest_path}: {e}')
+
+    if not isinstance(manifest, dict) or manifest.get('format') != FORMAT_NAME:
+        raise ArtifactError(f'{manifest_path} no es un manifiesto de {FORMAT_NAME}')
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise ArtifactError(f"Versión de formato no soportada: {manifest.get('format_version')}")
+    missing = [key for key in ('kernel', 'feature_names', 'n_features', 'classes', 'arrays', 'content_hash')
+               if key not in manifest]
+    if missing:
+        raise ArtifactError(f"Faltan campos en el manifiesto: {', '.join(missing)}")
+    return manifest
+
+
+def verify_artifact(path, manifest=None):
+    """
+    Comprueba el hash de contenido del manifiesto y el sha256, dtype y forma de
+    cada array. Lanza ArtifactError con el primer problema encontrado.
+    """
+    manifest = manifest or read_manifest(path)
+    if content_hash(manifest) != manifest['content_hash']:
+        raise ArtifactError('El hash de contenido no coincide con el manifiesto')
+
+    directory = artifact_directory(path)
+    for name, entry in manifest['arrays'].items():
+        if os.path.basename(entry['file']) != entry['file']:
+            raise ArtifactError(f'Ruta de array no permitida: {entry["file"]}')
+        try:
+            digest = _sha256_file(os.path.join(directory, entry['file']))
+        except OSError as e:
+            raise ArtifactError(f'No se pudo leer el array {name}: {e}')
+        if digest != entry['sha256']:
+            raise ArtifactError(f'El array {name} está corrupto o fue modificado (sha256 distinto)')
+    return manifest
+
+
+def load_artifact(path, mmap=True):
+    """Verifica y carga un artefacto; devuelve (modelo compilado, versión)"""
+    manifest = verify_artifact(path)
+    directory = artifact_directory(path)
+
+    arrays = {}
+    for name, entry in manifest['arrays'].items():
+        array = np.load(os.path.join(directory, entry['file']), mmap_mode='r' if mmap else None, allow_pickle=False)
+        if array.dtype.str != entry['dtype'] or list(array.shape) != entry['shape']:
+            raise ArtifactError(f'El array {name} no tiene el dtype o la forma del manifiesto')
+        arrays[name] = array
+
+    try:
+        model = _build_kernel(
+            manifest['kernel'], arrays, manifest.get('params', {}), manifest['classes'],
+            manifest['n_features'], manifest['feature_names'] or None
+        )
+    except KeyError as e:
+        raise ArtifactError(f'Falta el array {e} para el kernel {manifest["kernel"]}')
+    model.estimator_name = manifest.get('estimator') or model.estimator_name
+    model.estimator_module = manifest.get('estimator_module') or model.estimator_module
+    model.input_reference = manifest.get('input_reference')
+    return model, manifest['content_hash'][:12]
+
+
+def read_model_file(path):
+    """Carga un artefacto o, como alternativa, un pickle; devuelve (modelo, versión)"""
+    if is_artifact(path):
+        return load_artifact(path)
+    with open(path, 'rb') as file:
+        content = file.read()
+    version = hashlib.sha256(content).hexdigest()[:12]
+    return pickle.loads(content), version
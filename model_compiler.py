@@ -0,0 +1,195 @@
+"""
+Compilación del modelo de scikit-learn a un kernel de NumPy puro.
+
+Para un modelo de 7 features la validación de entrada y el despacho interno de
+scikit-learn cuestan bastante más que el cálculo en sí. compile_model extrae
+los parámetros de los estimadores soportados (árboles de decisión, bosques
+aleatorios y regresión logística) a arrays de NumPy y devuelve un objeto con
+la misma interfaz (predict, predict_proba, classes_) que calcula directamente
+sobre esos arrays. Para cualquier otro estimador devuelve None y se sigue
+usando el objeto original.
+"""
+
+import logging
+import warnings
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class TreeKernel:
+    """Un árbol de decisión recorrido de forma vectorizada, nivel a nivel"""
+
+    def __init__(self, children_left, children_right, feature, threshold, value):
+        self.children_left = np.asarray(children_left, dtype=np.intp)
+        self.children_right = np.asarray(children_right, dtype=np.intp)
+        self.is_leaf = self.children_left == -1
+        # Las hojas tienen feature negativo; se indexa la columna 0 y se ignora.
+        # Si ya vienen a 0 (artefacto exportado) se usa el array tal cual, sin copiarlo
+        feature = np.asarray(feature, dtype=np.intp)
+        self.feature = np.where(self.is_leaf, 0, feature) if (feature < 0).any() else feature
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        # Probabilidades por nodo. sklearn >= 1.4 guarda fracciones y las devuelve
+        # tal cual; las versiones anteriores guardan conteos y los normalizan
+        value = np.asarray(value, dtype=np.float64)
+        if value.ndim == 3:
+            value = value[:, 0, :]
+        totals = value.sum(axis=1, keepdims=True)
+        if not np.allclose(totals[totals != 0], 1.0):
+            totals[totals == 0] = 1.0
+            value = value / totals
+        self.value = value
+        self.max_depth = self._depth()
+
+    def _depth(self):
+        # Recorrido por niveles desde la raíz
+        depth = 0
+        frontier = np.zeros(1 if len(self.children_left) else 0, dtype=np.intp)
+        while True:
+            internal = frontier[~self.is_leaf[frontier]]
+            if not len(internal):
+                return depth
+            frontier = np.concatenate([self.children_left[internal], self.children_right[internal]])
+            depth += 1
+
+    @classmethod
+    def from_sklearn(cls, tree):
+        return cls(tree.children_left, tree.children_right, tree.feature, tree.threshold, tree.value)
+
+    def leaves(self, X):
+        """Índice de la hoja a la que llega cada fila de X (float32, como en sklearn)"""
+        rows = np.arange(len(X))
+        node = np.zeros(len(X), dtype=np.intp)
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            child = np.where(go_left, self.children_left[node], self.children_right[node])
+            node = np.where(self.is_leaf[node], node, child)
+        return node
+
+    def predict_proba(self, X):
+        return self.value[self.leaves(X)]
+
+
+class CompiledModel(ABC):
+    """Interfaz común de los modelos compilados; imita a un clasificador de sklearn"""
+
+    kernel = None
+    # Clase y módulo del estimador de sklearn del que se obtuvo el kernel
+    estimator_name = None
+    estimator_module = None
+    # Distribución de entrada de referencia exportada con el artefacto (drift.py)
+    input_reference = None
+
+    def __init__(self, classes, feature_names=None):
+        self.classes_ = np.asarray(classes)
+        if feature_names is not None:
+            self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+
+    @abstractmethod
+    def predict_proba(self, X):
+        """Probabilidad de cada clase por fila, como predict_proba de sklearn"""
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+class CompiledTreeEnsemble(CompiledModel):
+    """Árbol de decisión o promedio de árboles (RandomForest / ExtraTrees)"""
+
+    kernel = 'tree_ensemble'
+
+    def __init__(self, trees, classes, n_features, feature_names=None):
+        super().__init__(classes, feature_names)
+        self.trees = list(trees)
+        self.n_features_in_ = n_features
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if len(self.trees) == 1:
+            return self.trees[0].predict_proba(X)
+        proba = self.trees[0].predict_proba(X)
+        for tree in self.trees[1:]:
+            proba = proba + tree.predict_proba(X)
+        return proba / len(self.trees)
+
+
+class CompiledLinear(CompiledModel):
+    """Regresión logística: sigmoide (binaria / one-vs-rest) o softmax (multinomial)"""
+
+    kernel = 'linear'
+
+    def __init__(self, coef, intercept, classes, ovr=False, feature_names=None):
+        super().__init__(classes, feature_names)
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercept = np.asarray(intercept, dtype=np.float64)
+        self.ovr = ovr
+        self.n_features_in_ = self.coef.shape[1]
+
+    def decision_function(self, X):
+        return np.asarray(X, dtype=np.float64) @ self.coef.T + self.intercept
+
+    def predict_proba(self, X):
+        scores = self.decision_function(X)
+        if scores.shape[1] == 1:
+            positive = 1.0 / (1.0 + np.exp(-scores[:, 0]))
+            return np.column_stack([1.0 - positive, positive])
+        if self.ovr:
+            proba = 1.0 / (1.0 + np.exp(-scores))
+            return proba / proba.sum(axis=1, keepdims=True)
+        scores = scores - scores.max(axis=1, keepdims=True)
+        proba = np.exp(scores)
+        return proba / proba.sum(axis=1, keepdims=True)
+
+
+def _compile_trees(model, estimators):
+    trees = [TreeKernel.from_sklearn(estimator.tree_) for estimator in estimators]
+    return CompiledTreeEnsemble(
+        trees, model.classes_, model.n_features_in_, getattr(model, 'feature_names_in_', None)
+    )
+
+
+def _compile_logistic(model):
+    ovr = getattr(model, 'multi_class', 'auto') == 'ovr' or getattr(model, 'solver', None) == 'liblinear'
+    return CompiledLinear(
+        model.coef_, model.intercept_, model.classes_, ovr, getattr(model, 'feature_names_in_', None)
+    )
+
+
+# Estimadores soportados, por nombre de clase para no importar sklearn aquí
+_COMPILERS = {
+    'DecisionTreeClassifier': lambda model: _compile_trees(model, [model]),
+    'ExtraTreeClassifier': lambda model: _compile_trees(model, [model]),
+    'RandomForestClassifier': lambda model: _compile_trees(model, model.estimators_),
+    'ExtraTreesClassifier': lambda model: _compile_trees(model, model.estimators_),
+    'LogisticRegression': _compile_logistic,
+}
+
+
+def compile_model(model, grid):
+    """
+    Devuelve el modelo compilado o None si el estimador no está soportado o si
+    el kernel no reproduce predict_proba y predict del original sobre `grid`.
+    """
+    compiler = _COMPILERS.get(type(model).__name__)
+    if compiler is None:
+        logger.info(f"Sin kernel compilado para {type(model).__name__}; se usará el modelo original")
+        return None
+
+    try:
+        compiled = compiler(model)
+        compiled.estimator_name = type(model).__name__
+        compiled.estimator_module = type(model).__module__
+        with warnings.catch_warnings():
+            warnings.filterwarnings('ignore', message='X does not have valid feature names')
+            proba_ok = np.allclose(compiled.predict_proba(grid), model.predict_proba(grid), rtol=0, atol=1e-12)
+            labels_ok = np.array_equal(compiled.predict(grid), model.predict(grid))
+    except Exception as e:
+        logger.warning(f"No se pudo compilar el modelo {type(model).__name__}: {e}")
+        return None
+
+    if not (proba_ok and labels_ok):
+        logger.warning(f"El kernel compilado no reproduce el modelo {type(model).__name__}; se usará el original")
+        return None
+    return compiled
@@ -0,0 +1,208 @@
+"""
+Conjunto de modelos servidos a la vez, con selección por petición y modo sombra.
+
+Cada modelo del pool tiene nombre y su propio ModelRegistry (carga, versión y
+recarga en caliente independientes). Las peticiones eligen modelo con el
+campo `model` del cuerpo o la cabecera X-Model; sin ninguno se usa el modelo
+por defecto. Los modelos en sombra puntúan en segundo plano, fuera del camino
+de la respuesta, los mismos registros que atiende el modelo por defecto y se
+cuenta con qué frecuencia predicen otra clase.
+
+El pool se describe con Config.MODEL_POOL:
+  - un directorio: cada archivo .pkl y cada subdirectorio de artefacto es un
+    modelo, con el nombre del archivo sin extensión o del subdirectorio;
+  - un manifiesto JSON:
+        {"default": "v1", "shadow": ["v2"],
+         "models": {"v1": "best_model.pkl", "v2": "artifacts/v2"}}
+    con rutas relativas al manifiesto.
+Sin MODEL_POOL el pool tiene un solo modelo, 'default', en Config.MODEL_PATH.
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+
+import numpy as np
+
+import metrics
+from model_artifact import is_artifact
+from model_registry import ModelRegistry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_NAME = 'default'
+
+
+class PoolConfigError(ValueError):
+    """MODEL_POOL no describe un conjunto de modelos válido"""
+
+
+def discover_models(pool_path):
+    """Lee un directorio o manifiesto de pool; devuelve (modelos {nombre: ruta}, defecto, sombras)"""
+    if os.path.isdir(pool_path) and not is_artifact(pool_path):
+        models = {}
+        for entry in sorted(os.listdir(pool_path)):
+            path = os.path.join(pool_path, entry)
+            if entry.endswith('.pkl') and os.path.isfile(path):
+                models[entry[:-len('.pkl')]] = path
+            elif os.path.isdir(path) and is_artifact(path):
+                models[entry] = path
+        default, shadow = None, []
+    else:
+        try:
+            with open(pool_path, encoding='utf-8') as file:
+                manifest = json.load(file)
+            base = os.path.dirname(os.path.abspath(pool_path))
+            models = {str(name): os.path.join(base, path) for name, path in manifest['models'].items()}
+            default, shadow = manifest.get('default'), list(manifest.get('shadow', []))
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            raise PoolConfigError(f'No se pudo leer el manifiesto del pool {pool_path}: {e}')
+    if not models:
+        raise PoolConfigError(f'No hay modelos en {pool_path}')
+    return models, default, shadow
+
+
+class ShadowScorer:
+    """
+    Puntúa en segundo plano con los modelos candidatos los registros ya
+    atendidos por el modelo por defecto y compara las predicciones.
+
+    submit() nunca bloquea: si la cola está llena el lote se descarta y se
+    cuenta. El hilo se (re)crea en cada proceso, ya que los hilos del máster de
+    gunicorn no sobreviven al fork.
+    """
+
+    def __init__(self, pool, names, max_pending=1000, batch_rows=4096):
+        self.pool = pool
+        self.names = list(names)
+        self.max_pending = max_pending
+        self.batch_rows = batch_rows
+        self.stats = {name: {'compared': 0, 'disagreements': 0, 'probability_delta': 0.0, 'errors': 0}
+                      for name in self.names}
+        self.dropped = 0
+        self._queue = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+    def _ensure_thread(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(self.max_pending)
+            threading.Thread(target=self._run, name='shadow-scorer', daemon=True).start()
+            self._pid = os.getpid()
+
+    def submit(self, values, predictions, probabilities):
+        """Encola un lote (valores de entrada y resultado del modelo por defecto) para compararlo"""
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait((values, predictions, probabilities))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            rows = len(batch[0][0])
+            # Juntar lo pendiente para puntuar el lote entero con una sola llamada
+            while rows < self.batch_rows:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(item)
+                rows += len(item[0])
+            try:
+                self._compare(batch)
+            except Exception as e:
+                logger.error(f"Error en el scoring en sombra: {e}")
+
+    def _compare(self, batch):
+        values = np.concatenate([item[0] for item in batch])
+        predictions = np.concatenate([np.asarray(item[1]) for item in batch])
+        with_probabilities = all(item[2] is not None for item in batch)
+        probabilities = np.concatenate([item[2] for item in batch]) if with_probabilities else None
+
+        for name in self.names:
+            current = self.pool.get(name).current
+            if current is None:
+                continue
+            try:
+                shadow_predictions, shadow_probabilities = current.score_values(values)
+            except Exception as e:
+                with self._stats_lock:
+                    self.stats[name]['errors'] += len(values)
+                logger.warning(f"El modelo en sombra {name} no pudo puntuar el lote: {e}")
+                continue
+            disagreements = int(np.count_nonzero(np.asarray(shadow_predictions) != predictions))
+            delta = 0.0
+            if probabilities is not None and shadow_probabilities is not None:
+                delta = float(np.abs(shadow_probabilities[:, -1] - probabilities[:, -1]).sum())
+            with self._stats_lock:
+                stats = self.stats[name]
+                stats['compared'] += len(values)
+                stats['disagreements'] += disagreements
+                stats['probability_delta'] += delta
+            metrics.record_shadow(name, len(values), disagreements)
+
+    def summary(self, name):
+        """Estadísticas de comparación de un modelo en sombra (de este proceso)"""
+        with self._stats_lock:
+            stats = dict(self.stats[name])
+        compared = stats['compared']
+        return {
+            'compared': compared,
+            'disagreements': stats['disagreements'],
+            'disagreement_rate': stats['disagreements'] / compared if compared else None,
+            'mean_probability_delta': stats['probability_delta'] / compared if compared else None,
+            'errors': stats['errors'],
+            'dropped_batches': self.dropped,
+        }
+
+
+class ModelPool:
+    """Modelos por nombre, el modelo por defecto y los modelos en sombra"""
+
+    def __init__(self, models, default=None, shadow=(), threshold=0.5, compile=True, use_table=True,
+                 on_publish=None):
+        self.registries = {
+            name: ModelRegistry(path, threshold=threshold, compile=compile, use_table=use_table, name=name,
+                                on_publish=on_publish)
+            for name, path in models.items()
+        }
+        self.default_name = default or next(iter(models))
+        if self.default_name not in self.registries:
+            raise PoolConfigError(f'El modelo por defecto {self.default_name} no está en el pool')
+        unknown = [name for name in shadow if name not in self.registries]
+        if unknown:
+            raise PoolConfigError(f"Modelos en sombra desconocidos: {', '.join(unknown)}")
+        self.shadow_names = [name for name in shadow if name != self.default_name]
+        self.shadow = ShadowScorer(self, self.shadow_names) if self.shadow_names else None
+
+    @property
+    def names(self):
+        return list(self.registries)
+
+    @property
+    def default(self):
+        return self.registries[self.default_name]
+
+    def get(self, name=None):
+        """Registro del modelo `name` (el por defecto si es None); None si no existe"""
+        if name is None:
+            return self.registries[self.default_name]
+        return self.registries.get(name)
+
+    def role(self, name):
+        if name == self.default_name:
+            return 'default'
+        return 'shadow' if name in self.shadow_names else 'available'
+
+    def start_watchers(self, interval):
+        for registry in self.registries.values():
+            registry.start_watcher(interval)
@@ -0,0 +1,202 @@
+"""
+Registro del modelo en servicio con recarga en caliente.
+
+Cada versión cargada se guarda en un LoadedModel que no cambia tras
+construirse: el estimador, el Scorer, la tabla precalculada, las
+explicaciones por predicción, la distribución de entrada de referencia, el
+hash del archivo y la hora de carga. Una recarga construye, valida y calienta
+el nuevo LoadedModel aparte y después lo publica con una única asignación, de
+modo que las peticiones en curso terminan con la versión que tomaron al empezar.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+import metrics
+from features import FEATURE_SCHEMA
+from inference import Scorer, DEFAULT_THRESHOLD
+from model_artifact import read_model_file, watched_file
+from drift import reference_counts
+from explanations import ExplanationTable
+from model_compiler import CompiledModel, compile_model
+from prediction_table import PredictionTable
+
+logger = logging.getLogger(__name__)
+
+
+class LoadedModel:
+    """Un modelo cargado y todo lo que se deriva de él"""
+
+    def __init__(self, model, scorer, table, version, path, loaded_at, name='default', explanations=None,
+                 reference=None):
+        self.name = name
+        self.model = model
+        self.scorer = scorer
+        self.table = table
+        self.explanations = explanations
+        # Recuentos de referencia por combinación de entrada (drift.reference_counts) o None
+        self.reference = reference
+        self.version = version
+        self.path = path
+        self.loaded_at = loaded_at
+
+    def score_values(self, values):
+        """
+        Predice un lote a partir de la matriz de valores de input_values.
+        
+        Usa la tabla precalculada si cubre todas las filas; si no, codifica el lote
+        en una sola matriz y hace una única llamada al modelo.
+        """
+        if self.table is not None:
+            table_result = self.table.lookup_values(FEATURE_SCHEMA.input_fields, values)
+            if table_result is not None:
+                return table_result
+        return self.scorer.score(FEATURE_SCHEMA.encode_values(values))
+
+
+def prepare_model(model, version, path, threshold=DEFAULT_THRESHOLD, compile=True, use_table=True, name='default'):
+    """Valida el modelo contra el esquema y construye su Scorer y su tabla de predicciones"""
+    # Verificar que el modelo espera exactamente las features del esquema
+    FEATURE_SCHEMA.check_model(model)
+    grid = FEATURE_SCHEMA.encode_values(FEATURE_SCHEMA.input_grid())
+
+    # Servir desde un kernel de NumPy si el estimador está soportado y
+    # reproduce exactamente al original sobre todo el dominio de entrada
+    estimator = model
+    if compile and not isinstance(model, CompiledModel):
+        compiled = compile_model(model, grid)
+        if compiled is not None:
+            estimator = compiled
+            logger.info(f"Modelo compilado a kernel NumPy ({compiled.kernel}) y verificado")
+
+    scorer = Scorer(estimator, threshold)
+    if scorer.self_check(grid):
+        logger.info(f"Inferencia en una sola pasada verificada (umbral de decisión {scorer.threshold})")
+
+    table = None
+    if use_table:
+        try:
+            # Se verifica contra el estimador original (predict + predict_proba), no
+            # contra el Scorer con el que se construye, para detectar fallos del
+            # kernel compilado o de la inferencia en una sola pasada
+            reference = Scorer(model, threshold, single_pass=False)
+            table = PredictionTable.build(
+                scorer.score, FEATURE_SCHEMA.input_domains, FEATURE_SCHEMA.encode_values, reference.score
+            )
+        except Exception as e:
+            logger.warning(f"No se pudo construir la tabla de predicciones: {e}")
+        if table is not None:
+            logger.info(f"Tabla de predicciones construida y verificada ({len(table)} combinaciones)")
+        else:
+            logger.warning("Tabla de predicciones no disponible; se usará el modelo en cada petición")
+
+    # Contribuciones por feature de cada entrada posible, a partir del kernel
+    # compilado (si se sirve el modelo original se compila solo para esto)
+    explanations = None
+    kernel = estimator if isinstance(estimator, CompiledModel) else None
+    if kernel is None and not compile:
+        kernel = compile_model(model, grid)
+    if kernel is not None:
+        try:
+            explanations = ExplanationTable.build(
+                kernel, FEATURE_SCHEMA.input_domains, grid, FEATURE_SCHEMA.model_features
+            )
+        except Exception as e:
+            logger.warning(f"No se pudieron calcular las explicaciones: {e}")
+        if explanations is not None:
+            logger.info(f"Explicaciones precalculadas ({len(explanations)} combinaciones, escala {explanations.scale})")
+
+    # Distribución de entrada contra la que se mide la deriva (solo artefactos que la incluyan)
+    input_reference = getattr(model, 'input_reference', None)
+    reference = reference_counts(input_reference, FEATURE_SCHEMA.input_domains)
+    if input_reference and reference is None:
+        logger.warning("La distribución de referencia del artefacto no coincide con el esquema; se ignora")
+
+    # Calentar el camino de inferencia antes de publicar el modelo
+    scorer.score(grid[:1])
+
+    return LoadedModel(model, scorer, table, version, path, datetime.now(), name, explanations, reference)
+
+
+class ModelRegistry:
+    """Mantiene el modelo en servicio y lo sustituye de forma atómica"""
+
+    def __init__(self, path, threshold=DEFAULT_THRESHOLD, compile=True, use_table=True, name='default',
+                 on_publish=None):
+        self.name = name
+        self.path = path
+        self.threshold = threshold
+        self.compile = compile
+        self.use_table = use_table
+        # Se llama con cada LoadedModel publicado (estado compartido entre workers)
+        self.on_publish = on_publish
+        self.current = None
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self._watched_stat = None
+
+    def load(self):
+        """
+        Carga el archivo del modelo y, si es válido, lo publica como versión actual.
+
+        Devuelve el LoadedModel publicado. Si la carga o la validación fallan se
+        lanza la excepción y el modelo anterior sigue en servicio.
+        """
+        with self._reload_lock:
+            started = time.perf_counter()
+            stat = self._stat()
+            try:
+                model, version = read_model_file(self.path)
+                current = self.current
+                if current is not None and current.version == version:
+                    self._watched_stat = stat
+                    logger.info(f"El modelo {version} ya está en servicio; no se recarga")
+                    return current
+
+                loaded = prepare_model(
+                    model, version, self.path, self.threshold, self.compile, self.use_table, self.name
+                )
+            except Exception:
+                metrics.record_model_load(self.name, time.perf_counter() - started, ok=False)
+                raise
+            metrics.record_model_load(self.name, time.perf_counter() - started, ok=True)
+            self.current = loaded
+            self._watched_stat = stat
+            if self.on_publish is not None:
+                self.on_publish(loaded)
+            if current is not None:
+                logger.info(f"Modelo actualizado en caliente: {current.version} -> {loaded.version}")
+            return loaded
+
+    def _stat(self):
+        try:
+            stat = os.stat(watched_file(self.path))
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def start_watcher(self, interval):
+        """Recarga el modelo cuando cambia el archivo, comprobándolo cada `interval` segundos"""
+        if interval <= 0 or (self._watcher is not None and self._watcher.is_alive()):
+            return
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval,), name=f'model-watcher-{self.name}', daemon=True
+        )
+        self._watcher.start()
+        logger.info(f"Vigilando cambios en {self.path} cada {interval}s")
+
+    def _watch(self, interval):
+        while True:
+            time.sleep(interval)
+            stat = self._stat()
+            if stat is None or stat == self._watched_stat:
+                continue
+            try:
+                self.load()
+            except Exception as e:
+                # No reintentar hasta que el archivo vuelva a cambiar
+                self._watched_stat = stat
+                logger.error(f"Error al recargar el modelo desde {self.path}: {e}")
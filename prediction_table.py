@@ -0,0 +1,137 @@
+"""
+Tabla precomputada de predicciones para el espacio finito de entradas del modelo.
+
+Todas las entradas de /predict son categóricas con pocos valores, por lo que el
+producto cartesiano completo tiene apenas unos cientos de combinaciones. La tabla
+se construye una sola vez al cargar el modelo y cada petición se resuelve con una
+búsqueda por índice, sin llamar a scikit-learn.
+"""
+
+import itertools
+import logging
+import warnings
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class CombinationIndex:
+    """Índice mixto de cada combinación de valores de entrada dentro del producto cartesiano"""
+
+    def __init__(self, domains):
+        self.domains = tuple((name, tuple(values)) for name, values in domains)
+        # Posición de cada valor dentro de su dominio y paso del índice mixto
+        self._positions = [
+            (name, {value: pos for pos, value in enumerate(values)})
+            for name, values in self.domains
+        ]
+        self._strides = []
+        stride = 1
+        for _, values in reversed(self.domains):
+            self._strides.append(stride)
+            stride *= len(values)
+        self._strides.reverse()
+
+    def index_of(self, form_data):
+        """Devuelve el índice de la combinación o None si algún valor está fuera del dominio"""
+        index = 0
+        for (name, positions), stride in zip(self._positions, self._strides):
+            pos = positions.get(form_data.get(name))
+            if pos is None:
+                return None
+            index += pos * stride
+        return index
+
+    def index_values(self, fields, values):
+        """
+        Versión vectorizada de index_of.
+
+        `values` es una matriz (n, campos) cuyas columnas siguen el orden de
+        `fields`. Devuelve None si las columnas no coinciden con los dominios o
+        algún valor está fuera de ellos.
+        """
+        if tuple(fields) != tuple(name for name, _ in self.domains):
+            return None
+        index = np.zeros(len(values), dtype=np.intp)
+        for column, ((_, domain), stride) in enumerate(zip(self.domains, self._strides)):
+            domain = np.asarray(domain)
+            order = np.argsort(domain)
+            pos = order[np.minimum(np.searchsorted(domain, values[:, column], sorter=order), len(domain) - 1)]
+            if not np.array_equal(domain[pos], values[:, column]):
+                return None
+            index += pos * stride
+        return index
+
+
+class PredictionTable(CombinationIndex):
+    """Predicciones y probabilidades indexadas por combinación de valores de entrada"""
+
+    def __init__(self, domains, predictions, probabilities):
+        super().__init__(domains)
+        self.predictions = predictions
+        self.probabilities = probabilities
+
+    def __len__(self):
+        return len(self.predictions)
+
+    def lookup(self, form_data):
+        """Devuelve (predicción, probabilidades) o None si la entrada no está en la tabla"""
+        index = self.index_of(form_data)
+        if index is None:
+            return None
+        probabilities = self.probabilities[index] if self.probabilities is not None else None
+        return self.predictions[index], probabilities
+
+    def lookup_values(self, fields, values):
+        """
+        Versión vectorizada de lookup.
+
+        `values` es una matriz (n, campos) cuyas columnas siguen el orden de
+        `fields`. Devuelve (predicciones, probabilidades) o None si las columnas
+        no coinciden con los dominios de la tabla o algún valor está fuera de ellos.
+        """
+        index = self.index_values(fields, values)
+        if index is None:
+            return None
+        probabilities = self.probabilities[index] if self.probabilities is not None else None
+        return self.predictions[index], probabilities
+
+    @classmethod
+    def build(cls, score, domains, encode_values, reference_score=None):
+        """
+        Evalúa el modelo sobre el producto cartesiano de los dominios.
+
+        `score` recibe una matriz de features y devuelve (clases, probabilidades),
+        como Scorer.score. `encode_values` recibe una matriz (n, campos) de valores
+        en el orden de `domains` y devuelve la matriz de features que espera el
+        modelo. La tabla se verifica contra `reference_score` (por defecto `score`),
+        que debería ser un camino independiente, p. ej. el estimador original con
+        predict y predict_proba. Devuelve None si la tabla no supera la verificación.
+        """
+        names = [name for name, _ in domains]
+        products = list(itertools.product(*(values for _, values in domains)))
+        combinations = [dict(zip(names, values)) for values in products]
+        grid = encode_values(np.array(products, dtype=np.int64))
+
+        predictions, probabilities = score(grid)
+        table = cls(domains, np.asarray(predictions), probabilities)
+        with warnings.catch_warnings():
+            # La verificación llama al modelo fila a fila con arrays sin nombres de columna
+            warnings.filterwarnings('ignore', message='X does not have valid feature names')
+            if not table.verify(reference_score or score, combinations, grid):
+                return None
+        return table
+
+    def verify(self, score, combinations, grid):
+        """Comprueba fila a fila que la tabla coincide con el modelo en vivo"""
+        for combination, row in zip(combinations, grid):
+            index = self.index_of(combination)
+            predictions, probabilities = score(row.reshape(1, -1))
+            if predictions[0] != self.predictions[index]:
+                logger.warning(f"Tabla de predicciones inconsistente con el modelo para {combination}")
+                return False
+            if self.probabilities is not None and not np.allclose(probabilities[0], self.probabilities[index]):
+                logger.warning(f"Probabilidades de la tabla inconsistentes con el modelo para {combination}")
+                return False
+        return True
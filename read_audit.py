@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Read the prediction audit log written by the service (AUDIT_LOG_DIR, see audit.py).
+
+Records from every worker file are merged in timestamp order and can be
+filtered by time range, model, model version and endpoint. They can then be:
+  - printed as NDJSON (default);
+  - aggregated per model version with --summary (volume, share of high-risk
+    predictions, mean attack probability, time span);
+  - turned into replayable traffic: --format inputs writes one flat input row
+    per line for score_file.py, --format load writes a benchmarks.load replay file.
+
+Usage:
+    python read_audit.py audit/ --since 2025-01-14T00:00 --summary
+    python read_audit.py audit/ --model default --format inputs -o inputs.ndjson
+    python score_file.py inputs.ndjson -o rescored.ndjson --id-field request_id
+    python read_audit.py audit/ --format load -o traffic.jsonl
+    python -m benchmarks.load --replay traffic.jsonl
+"""
+
+import argparse
+import glob
+import heapq
+import json
+import logging
+import os
+import sys
+from collections import defaultdict
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Records buffered per file to put back in order the ones that reached the writer late
+REORDER_WINDOW = 10000
+
+
+def audit_files(paths):
+    """Audit files under the given files or directories, in name order"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, 'audit-*.ndjson'))))
+        else:
+            files.append(path)
+    return files
+
+
+def read_file(path):
+    """Records of one file; a truncated last line (worker killed mid-write) is skipped"""
+    with open(path, encoding='utf-8') as file:
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                logger.warning(f"{path}:{line_number}: skipping unreadable record")
+
+
+def read_sorted(path, window=REORDER_WINDOW):
+    """
+    Records of one file in timestamp order. The service sorts each batch it
+    writes, but a record stamped just before a flush can land in the next
+    batch, so records up to `window` lines out of place are reordered.
+    """
+    heap = []
+    for index, record in enumerate(read_file(path)):
+        heapq.heappush(heap, (record['ts'], index, record))
+        if len(heap) > window:
+            yield heapq.heappop(heap)[2]
+    while heap:
+        yield heapq.heappop(heap)[2]
+
+
+def read_records(paths, since=None, until=None, model=None, version=None, endpoint=None):
+    """All matching records, merged across files in timestamp order"""
+    merged = heapq.merge(*(read_sorted(path) for path in audit_files(paths)), key=lambda record: record['ts'])
+    for record in merged:
+        if since and record['ts'] < since:
+            continue
+        if until and record['ts'] >= until:
+            continue
+        if model and record.get('model') != model:
+            continue
+        if version and record.get('model_version') != version:
+            continue
+        if endpoint and record.get('endpoint') != endpoint:
+            continue
+        yield record
+
+
+def summarize(records):
+    """Per (model, model_version) volume, high-risk share and mean attack probability"""
+    groups = defaultdict(lambda: {'count': 0, 'high_risk': 0, 'probability_sum': 0.0, 'with_probability': 0,
+                                  'first': None, 'last': None, 'endpoints': defaultdict(int)})
+    for record in records:
+        group = groups[(record.get('model'), record.get('model_version'))]
+        group['count'] += 1
+        group['high_risk'] += record.get('prediction') == 1
+        if record.get('probability_attack') is not None:
+            group['probability_sum'] += record['probability_attack']
+            group['with_probability'] += 1
+        group['first'] = group['first'] or record['ts']
+        group['last'] = record['ts']
+        group['endpoints'][record.get('endpoint')] += 1
+
+    summary = []
+    for (model, version), group in sorted(groups.items(), key=lambda item: item[1]['first']):
+        summary.append({
+            'model': model,
+            'model_version': version,
+            'predictions': group['count'],
+            'high_risk_rate': group['high_risk'] / group['count'],
+            'mean_probability_attack': (group['probability_sum'] / group['with_probability']
+                                        if group['with_probability'] else None),
+            'endpoints': dict(group['endpoints']),
+            'first': group['first'],
+            'last': group['last'],
+        })
+    return summary
+
+
+def format_record(record, output_format):
+    if output_format == 'inputs':
+        return dict(record['input'], request_id=record.get('request_id'))
+    if output_format == 'load':
+        return {'method': 'POST', 'path': '/predict', 'json': record['input'], 'name': 'audit'}
+    return record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='*', default=[os.environ.get('AUDIT_LOG_DIR') or 'audit'],
+                        help='audit directories or files (default: $AUDIT_LOG_DIR or ./audit)')
+    parser.add_argument('--since', help='only records at or after this ISO timestamp')
+    parser.add_argument('--until', help='only records before this ISO timestamp')
+    parser.add_argument('--model', help='only records served by this model')
+    parser.add_argument('--model-version', help='only records served by this model version')
+    parser.add_argument('--endpoint', choices=['predict', 'batch'], help='only records from this endpoint')
+    parser.add_argument('--summary', action='store_true', help='print per model version aggregates instead of records')
+    parser.add_argument('--format', choices=['records', 'inputs', 'load'], default='records',
+                        help='records (default), inputs (rows for score_file.py) or load (benchmarks.load replay)')
+    parser.add_argument('-o', '--output', help='output file (default: stdout)')
+    args = parser.parse_args(argv)
+
+    files = audit_files(args.paths)
+    if not files:
+        logger.error(f"❌ No audit files found in {', '.join(args.paths)}")
+        return 1
+
+    records = read_records(files, args.since, args.until, args.model, args.model_version, args.endpoint)
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        if args.summary:
+            json.dump(summarize(records), output, indent=2)
+            output.write('\n')
+        else:
+            count = 0
+            for record in records:
+                output.write(json.dumps(format_record(record, args.format)) + '\n')
+                count += 1
+            if args.output:
+                logger.info(f"✅ Wrote {count} records to {args.output}")
+    finally:
+        if args.output:
+            output.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""
+Caché LRU en proceso de respuestas de /predict.
+
+La clave es la tupla de valores normalizados del formulario, cuyo espacio es
+muy pequeño. Cada entrada guarda la predicción y el cuerpo JSON ya
+serializado salvo el timestamp, de modo que un acierto evita la inferencia y
+casi todo el armado de la respuesta. La caché se vacía cuando cambia la hora
+de carga del modelo en servicio.
+
+También contiene las piezas para armar respuestas sin pasar por jsonify: la
+respuesta compacta de /predict (solo predicción y probabilidades) y las
+plantillas en bytes de /health, /api/data, /model-info y /scoring-bundle, que
+solo se reconstruyen cuando cambia el modelo.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Tipo de contenido con el que el cliente pide la respuesta compacta (Accept)
+COMPACT_MEDIA_TYPE = 'application/vnd.heart-api.compact+json'
+
+
+def dumps(value):
+    """Serializa a bytes con claves ordenadas y sin espacios (orjson si está instalado)"""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(value, sort_keys=True, separators=(',', ':')).encode()
+
+
+def query_flag(value):
+    """Valor booleano de un parámetro de consulta (?explain=1, ?compact=true...)"""
+    return value is not None and value.lower() in ('1', 'true', 'yes')
+
+
+def compact_requested(flag, accept):
+    """True si la petición pide la respuesta compacta (?compact=1 o Accept con COMPACT_MEDIA_TYPE)"""
+    if flag is not None:
+        return query_flag(flag)
+    return bool(accept) and COMPACT_MEDIA_TYPE in accept
+
+
+def with_explanation(body, explanation):
+    """
+    Añade "explanation" (JSON ya serializado o None) a un cuerpo de /predict.
+    Es la primera clave en orden alfabético, así que va justo tras la llave.
+    """
+    return b'{"explanation":' + (explanation if explanation is not None else b'null') + b',' + body[1:]
+
+
+class CachedResponse:
+    """Cuerpo de /predict serializado una sola vez; solo falta insertar el timestamp"""
+
+    __slots__ = ('prediction', 'probabilities', 'body_prefix', 'compact_body', 'etag', 'expires_at')
+
+    def __init__(self, prediction, body, etag, probabilities=None):
+        self.prediction = prediction
+        self.probabilities = probabilities
+        # 'timestamp' es la última clave en orden alfabético (jsonify ordena las
+        # claves), así que el cuerpo termina con ,"timestamp":"<valor>"}
+        serialized = json.dumps(body, sort_keys=True, separators=(',', ':'))
+        self.body_prefix = (serialized[:-1] + ',"timestamp":"').encode()
+        # La respuesta compacta no lleva timestamp: queda completa desde el principio
+        self.compact_body = dumps({
+            'prediction': prediction,
+            'probability_no_attack': probabilities[0] if probabilities is not None else None,
+            'probability_attack': probabilities[1] if probabilities is not None else None,
+        }) + b'\n'
+        self.etag = etag
+        self.expires_at = None
+
+    def render(self, timestamp):
+        return self.body_prefix + timestamp.encode() + b'"}\n'
+
+
+class ResponseTemplate:
+    """
+    Cuerpo JSON serializado una sola vez, con huecos para los campos de primer
+    nivel que cambian en cada petición (timestamp, contadores).
+    """
+
+    __slots__ = ('segments', 'fields')
+
+    def __init__(self, payload, dynamic_fields):
+        # Se serializa con marcadores en lugar de los campos variables y se
+        # corta el resultado por ellos; mismo formato de salida que jsonify
+        markers = {}
+        payload = dict(payload)
+        for field in dynamic_fields:
+            if field in payload:
+                markers[field] = f'@@{field}@@'
+                payload[field] = markers[field]
+        serialized = json.dumps(payload, sort_keys=True, separators=(',', ':')) + '\n'
+        positions = sorted((serialized.index(json.dumps(marker)), field) for field, marker in markers.items())
+        self.segments = []
+        self.fields = []
+        start = 0
+        for position, field in positions:
+            self.segments.append(serialized[start:position].encode())
+            self.fields.append(field)
+            start = position + len(json.dumps(markers[field]))
+        self.segments.append(serialized[start:].encode())
+
+    def render(self, values):
+        """Cuerpo con los valores actuales de los campos variables"""
+        parts = [self.segments[0]]
+        for field, segment in zip(self.fields, self.segments[1:]):
+            parts.append(dumps(values[field]))
+            parts.append(segment)
+        return b''.join(parts)
+
+
+class StaticResponses:
+    """Plantillas de los endpoints informativos, reconstruidas cuando cambia su modelo"""
+
+    def __init__(self):
+        self._entries = {}
+
+    def get(self, key, generation, build, dynamic_fields=()):
+        """
+        (plantilla, código) para `key`. `build` devuelve (payload, código) y
+        solo se llama cuando cambia `generation` (el LoadedModel en servicio).
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry[0] is not generation:
+            # Dos hilos pueden reconstruirla a la vez: el resultado es el mismo
+            payload, status_code = build()
+            entry = (generation, ResponseTemplate(payload, dynamic_fields), status_code)
+            self._entries[key] = entry
+        return entry[1], entry[2]
+
+
+def make_etag(version, key):
+    """Valor del ETag (débil) que identifica la respuesta para una versión del modelo y una entrada"""
+    digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+    return f'{version}-{digest}'
+
+
+def etag_matches(if_none_match, etag):
+    """True si la cabecera If-None-Match incluye `etag` (comparación débil) o es '*'"""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag == '*' or tag.removeprefix('W/').strip('"') == etag:
+            return True
+    return False
+
+
+class ResponseCache:
+    """LRU con límite de tamaño y TTL, con contadores de aciertos y fallos"""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._generation = None
+        self._lock = threading.Lock()
+
+    def get(self, generation, key):
+        """Devuelve la entrada o None; `generation` invalida la caché cuando cambia"""
+        with self._lock:
+            if generation != self._generation:
+                if self._generation is not None and generation < self._generation:
+                    # Petición en curso con un modelo ya sustituido: no usa la caché
+                    self.misses += 1
+                    return None
+                self._entries.clear()
+                self._generation = generation
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, generation, key, entry):
+        with self._lock:
+            if generation != self._generation:
+                # La entrada se calculó con un modelo que ya no está en servicio
+                return
+            entry.expires_at = time.monotonic() + self.ttl
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': True,
+                'size': len(self._entries),
+                'max_size': self.maxsize,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else None
+            }
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Offline bulk scoring of CSV or NDJSON files without starting the Flask server.
+
+Rows are validated and one-hot encoded with the same rules as /predict
+(features.FEATURE_SCHEMA) and scored in fixed-size chunks with one vectorized call per
+chunk. Results are streamed to the output file as they are produced, so memory
+stays flat regardless of the input size.
+
+Usage:
+    python score_file.py input.csv -o scores.ndjson
+    python score_file.py replay.jsonl -o scores.csv --chunk-size 20000 --workers 4
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import logging
+import os
+import sys
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+from features import FEATURE_SCHEMA, FeatureValidationError
+from prediction_table import PredictionTable
+from inference import Scorer
+from model_compiler import CompiledModel, compile_model
+from model_artifact import read_model_file
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+OUTPUT_FIELDS = ['index', 'id', 'status', 'prediction', 'probability_no_attack', 'probability_attack', 'error']
+
+# Per-process scoring state, set up once by init_scorer
+_scorer = None
+_table = None
+
+
+def init_scorer(model_path, use_table=True, threshold=0.5):
+    """Load the model (and its prediction table) once per process"""
+    global _scorer, _table
+    # Columns are always encoded in the model's feature order (features.FEATURE_SCHEMA)
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+    # Either an exported artifact directory (already compiled) or a pickle
+    original, _ = read_model_file(model_path)
+    FEATURE_SCHEMA.check_model(original)
+    grid = FEATURE_SCHEMA.encode_values(FEATURE_SCHEMA.input_grid())
+    model = original
+    if not isinstance(model, CompiledModel):
+        model = compile_model(model, grid) or model
+    _scorer = Scorer(model, threshold)
+    _scorer.self_check(grid)
+    _table = None
+    if use_table:
+        # Verified against the original estimator's predict/predict_proba, not the scorer itself
+        reference = Scorer(original, threshold, single_pass=False)
+        _table = PredictionTable.build(_scorer.score, FEATURE_SCHEMA.input_domains, FEATURE_SCHEMA.encode_values,
+                                       reference.score)
+
+
+def score_values(values):
+    """Score a matrix of validated input values with one vectorized call"""
+    if _table is not None:
+        table_result = _table.lookup_values(FEATURE_SCHEMA.input_fields, values)
+        if table_result is not None:
+            return table_result
+    return _scorer.score(FEATURE_SCHEMA.encode_values(values))
+
+
+def score_chunk(start, records, id_field=None):
+    """Validate, encode and score one chunk; returns the output rows in input order"""
+    rows = [None] * len(records)
+    valid_rows = []
+    valid_positions = []
+
+    for position, record in enumerate(records):
+        row = {'index': start + position}
+        if id_field and isinstance(record, dict):
+            row['id'] = record.get(id_field)
+        try:
+            if not isinstance(record, dict):
+                raise FeatureValidationError('record must be a JSON object')
+            valid_rows.append(FEATURE_SCHEMA.validate(record))
+            valid_positions.append(position)
+        except FeatureValidationError as e:
+            row.update(status='error', error=str(e))
+        rows[position] = row
+
+    if valid_rows:
+        predictions, probabilities = score_values(FEATURE_SCHEMA.input_values(valid_rows))
+        for i, position in enumerate(valid_positions):
+            rows[position].update(
+                status='success',
+                prediction=int(predictions[i]),
+                probability_no_attack=float(probabilities[i, 0]) if probabilities is not None else None,
+                probability_attack=float(probabilities[i, 1]) if probabilities is not None else None,
+            )
+    return rows
+
+
+def read_records(file, input_format):
+    """Yield input records one at a time from a CSV or NDJSON stream"""
+    if input_format == 'csv':
+        yield from csv.DictReader(file)
+        return
+    for line in file:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            yield None
+
+
+def iter_chunks(records, chunk_size):
+    """Group records into (start index, list) chunks of at most chunk_size"""
+    start = 0
+    while True:
+        chunk = list(itertools.islice(records, chunk_size))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+class ResultWriter:
+    """Streams scored rows as NDJSON or CSV"""
+
+    def __init__(self, file, output_format):
+        self.file = file
+        self.output_format = output_format
+        self.scored = 0
+        self.errors = 0
+        if output_format == 'csv':
+            self.writer = csv.DictWriter(file, fieldnames=OUTPUT_FIELDS, extrasaction='ignore')
+            self.writer.writeheader()
+
+    def write(self, rows):
+        for row in rows:
+            if row['status'] == 'success':
+                self.scored += 1
+            else:
+                self.errors += 1
+        if self.output_format == 'csv':
+            self.writer.writerows(rows)
+        else:
+            self.file.write(''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in rows))
+
+
+def score_serial(chunks, writer, id_field):
+    for start, records in chunks:
+        writer.write(score_chunk(start, records, id_field))
+
+
+def score_parallel(chunks, writer, id_field, workers, model_path, use_table, threshold):
+    """Score chunks in a process pool, keeping at most 2 chunks per worker in flight"""
+    max_pending = 2 * workers
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_scorer,
+                             initargs=(model_path, use_table, threshold)) as executor:
+        pending = []
+        for start, records in chunks:
+            pending.append(executor.submit(score_chunk, start, records, id_field))
+            if len(pending) >= max_pending:
+                writer.write(pending.pop(0).result())
+        for future in pending:
+            writer.write(future.result())
+
+
+def detect_format(path, default):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.json', '.jsonl', '.ndjson'):
+        return 'ndjson'
+    return default
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Score a CSV or NDJSON file with the heart attack model')
+    parser.add_argument('input', help="input file ('-' for stdin)")
+    parser.add_argument('-o', '--output', default='-', help="output file ('-' for stdout)")
+    parser.add_argument('--model', default=os.environ.get('MODEL_PATH', 'best_model.pkl'), help='path to the model file or artifact directory')
+    parser.add_argument('--input-format', choices=['csv', 'ndjson'], help='default: detected from the extension')
+    parser.add_argument('--output-format', choices=['csv', 'ndjson'], help='default: detected from the extension')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='rows scored per vectorized call')
+    parser.add_argument('--workers', type=int, default=1, help='number of scoring processes')
+    parser.add_argument('--id-field', help='input field copied to the output to identify each row')
+    parser.add_argument('--threshold', type=float, default=float(os.environ.get('DECISION_THRESHOLD', 0.5)),
+                        help='decision threshold on the positive class probability')
+    parser.add_argument('--no-table', action='store_true', help='always call the model instead of the prediction table')
+    args = parser.parse_args(argv)
+
+    if args.chunk_size < 1 or args.workers < 1:
+        parser.error('--chunk-size and --workers must be positive')
+    if not os.path.exists(args.model):
+        logger.error(f"❌ Model file NOT found at {os.path.abspath(args.model)}")
+        return 1
+
+    input_format = args.input_format or detect_format(args.input, 'ndjson')
+    output_format = args.output_format or detect_format(args.output, 'ndjson')
+
+    infile = sys.stdin if args.input == '-' else open(args.input, newline='', encoding='utf-8')
+    outfile = sys.stdout if args.output == '-' else open(args.output, 'w', newline='', encoding='utf-8')
+    try:
+        writer = ResultWriter(outfile, output_format)
+        chunks = iter_chunks(read_records(infile, input_format), args.chunk_size)
+        if args.workers > 1:
+            score_parallel(chunks, writer, args.id_field, args.workers, args.model, not args.no_table,
+                           args.threshold)
+        else:
+            init_scorer(args.model, not args.no_table, args.threshold)
+            score_serial(chunks, writer, args.id_field)
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+
+    logger.info(f"✅ Scored {writer.scored} rows ({writer.errors} errors)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
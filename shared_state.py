@@ -0,0 +1,307 @@
+"""
+Estado compartido entre los workers de gunicorn con arrays mapeados en memoria.
+
+Cada proceso escribe solo en su propia copia del array (un archivo .npy por
+pid dentro del directorio compartido), así que las actualizaciones no
+necesitan bloqueos entre procesos; quien lee suma las copias de todos los
+procesos, igual que hace prometheus_client con PROMETHEUS_MULTIPROC_DIR.
+Dentro de un proceso cada actualización toma un lock sin contención real.
+
+Sobre SharedArray se construyen:
+  - SharedCounters: contadores con nombre (p. ej. predicciones servidas);
+  - ModelVersions: versión y hora de carga de cada modelo en cada worker,
+    para ver si todos sirven la misma versión, y las peticiones de recarga
+    (POST /admin/reload) que cada worker sigue desde un hilo.
+
+Sin directorio compartido los arrays viven en la memoria del proceso y solo
+reflejan a ese proceso.
+"""
+
+import glob
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def state_directory(configured=''):
+    """Directorio compartido: el configurado o, si no hay, 'shared' dentro de PROMETHEUS_MULTIPROC_DIR"""
+    if configured:
+        return configured
+    metrics_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    return os.path.join(metrics_dir, 'shared') if metrics_dir else None
+
+
+class SharedArray:
+    """Array int64 de forma fija con una copia por proceso; total() suma las de todos"""
+
+    def __init__(self, name, shape, directory=None):
+        self.name = name
+        self.shape = tuple(shape)
+        self.directory = directory
+        self._local = None
+        self._pid = None
+        self._lock = threading.Lock()
+        # Copias de los demás procesos ya abiertas (solo lectura), por ruta
+        self._peers = {}
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def shared(self):
+        return self.directory is not None
+
+    def _path(self, pid):
+        return os.path.join(self.directory, f'{self.name}-{pid}.npy')
+
+    def local(self):
+        """Copia de este proceso como ndarray (se crea en el primer uso tras cada fork)"""
+        pid = os.getpid()
+        if self._pid == pid:
+            return self._local
+        with self._lock:
+            if self._pid != pid:
+                self._local = self._open_local(pid)
+                self._pid = pid
+        return self._local
+
+    def _open_local(self, pid):
+        if not self.shared:
+            return np.zeros(self.shape, dtype=np.int64)
+        path = self._path(pid)
+        if os.path.exists(path):
+            # Archivo de un proceso anterior con el mismo pid: se continúa sobre él
+            array = np.load(path, mmap_mode='r+')
+            if array.shape == self.shape and array.dtype == np.int64:
+                return np.asarray(array)
+        # Se crea aparte y se renombra para que nadie lea una cabecera a medias
+        staging = f'{path}.{threading.get_ident()}.tmp'
+        array = np.lib.format.open_memmap(staging, mode='w+', dtype=np.int64, shape=self.shape)
+        os.replace(staging, path)
+        # Vista ndarray del mismo mapa: indexar un np.memmap es bastante más lento
+        return np.asarray(array)
+
+    def by_process(self):
+        """Copia de cada proceso por pid (la propia incluida)"""
+        own = os.getpid()
+        copies = {own: self.local()}
+        if not self.shared:
+            return copies
+        own_path = self._path(own)
+        paths = set(glob.glob(os.path.join(self.directory, f'{self.name}-*.npy'))) - {own_path}
+        with self._lock:
+            for path in paths:
+                array = self._peers.get(path)
+                if array is None:
+                    try:
+                        array = np.load(path, mmap_mode='r')
+                    except (OSError, ValueError) as e:
+                        logger.debug("No se pudo abrir %s: %s", path, e)
+                        continue
+                    if array.shape != self.shape:
+                        continue
+                    array = self._peers[path] = np.asarray(array)
+                pid = os.path.basename(path)[len(self.name) + 1:-len('.npy')]
+                if pid.isdigit():
+                    copies[int(pid)] = array
+            # Olvidar archivos que ya no existen
+            for path in set(self._peers) - paths:
+                del self._peers[path]
+        return copies
+
+    def copies(self):
+        """Copias de todos los procesos (la propia incluida)"""
+        return list(self.by_process().values())
+
+    def total(self):
+        """Suma de las copias de todos los procesos"""
+        return np.sum(self.copies(), axis=0)
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SharedCounters:
+    """Contadores con nombre sumados entre procesos"""
+
+    def __init__(self, name, keys, directory=None):
+        self.keys = list(keys)
+        self._slots = {key: slot for slot, key in enumerate(self.keys)}
+        self._array = SharedArray(name, (len(self.keys),), directory)
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return self._array.shared
+
+    def add(self, key, amount=1):
+        """Suma `amount` al contador `key` de este proceso"""
+        slot = self._slots[key]
+        counts = self._array.local()
+        # += sobre un elemento de numpy no es atómico entre hilos
+        with self._lock:
+            counts[slot] += amount
+
+    def values(self):
+        """Valor de cada contador sumado entre todos los procesos (también los que ya terminaron)"""
+        return dict(zip(self.keys, self._array.total().tolist()))
+
+    def value(self, key):
+        return self.values()[key]
+
+
+class ModelVersions:
+    """
+    Versión en servicio y hora de carga de cada modelo en cada worker.
+
+    Cada proceso publica en su fila (número de secuencia, versión, hora de
+    carga en µs) con un seqlock: la secuencia es impar mientras se escribe,
+    y quien lee reintenta si la ve impar o cambia durante la lectura. Solo
+    publican los procesos activados con activate() (los workers), de modo
+    que el máster de gunicorn, que carga el modelo antes del fork, no
+    aparece como un worker más.
+
+    Las recargas se propagan con un número de generación por modelo: quien
+    pide una recarga escribe en su copia el máximo de todas más uno, y cada
+    worker recarga el modelo cuando ve una generación mayor que la última
+    que atendió (follow_reloads).
+    """
+
+    def __init__(self, names, directory=None):
+        self.names = list(names)
+        self._rows = {name: row for row, name in enumerate(self.names)}
+        self._array = SharedArray('models', (len(self.names), 3), directory)
+        self._reloads = SharedArray('reloads', (len(self.names),), directory)
+        self._lock = threading.Lock()
+        self._active_pid = None
+        # Última generación de recarga atendida por este proceso, por modelo
+        self._seen = {}
+        self._follower = None
+
+    def activate(self, pool):
+        """Empieza a publicar desde este proceso, con los modelos que ya tiene cargados"""
+        self._active_pid = os.getpid()
+        for name in self.names:
+            current = pool.get(name).current
+            if current is not None:
+                self.publish(current)
+
+    def publish(self, loaded):
+        """Registra la versión publicada de un modelo (callback de ModelRegistry)"""
+        if self._array.shared and self._active_pid != os.getpid():
+            return
+        row = self._rows.get(loaded.name)
+        if row is None:
+            return
+        try:
+            version = int(loaded.version, 16)
+        except (TypeError, ValueError):
+            version = -1
+        state = self._array.local()[row]
+        with self._lock:
+            state[0] += 1
+            state[1] = version
+            state[2] = int(loaded.loaded_at.timestamp() * 1e6)
+            state[0] += 1
+
+    def reload_generation(self, name):
+        """Última generación de recarga pedida para `name` en cualquier proceso"""
+        row = self._rows[name]
+        return max(int(copy[row]) for copy in self._reloads.copies())
+
+    def request_reload(self, name):
+        """Pide a todos los workers que recarguen `name` (este proceso ya lo ha recargado)"""
+        row = self._rows[name]
+        with self._lock:
+            generation = self.reload_generation(name) + 1
+            self._reloads.local()[row] = generation
+            self._seen[name] = generation
+        return generation
+
+    def follow_reloads(self, pool, interval):
+        """Recarga en este proceso los modelos cuya recarga se pida en otro, comprobándolo cada `interval` s"""
+        if not self._array.shared or interval <= 0 or (self._follower is not None and self._follower.is_alive()):
+            return
+        self._follower = threading.Thread(
+            target=self._follow, args=(pool, interval), name='model-reload-follower', daemon=True
+        )
+        self._follower.start()
+
+    def _follow(self, pool, interval):
+        # Empieza en 0: un worker nuevo (p. ej. tras reiniciarse uno caído) hereda el
+        # modelo que el máster cargó al arrancar y recoge las recargas pedidas desde entonces
+        while True:
+            for name in self.names:
+                try:
+                    generation = self.reload_generation(name)
+                    if generation <= self._seen.get(name, 0):
+                        continue
+                    self._seen[name] = generation
+                    loaded = pool.get(name).load()
+                    logger.info(f"Recarga de {name} propagada (generación {generation}, versión {loaded.version})")
+                except Exception as e:
+                    logger.error(f"Error al recargar {name} a petición de otro worker: {e}")
+            time.sleep(interval)
+
+    def wait_for_version(self, name, version, timeout):
+        """Espera hasta `timeout` s a que todos los workers vivos sirvan `version`; devuelve summary()"""
+        deadline = time.monotonic() + timeout
+        while True:
+            summary = self.summary(name)
+            if set(summary['model_versions']) <= {version} or time.monotonic() >= deadline:
+                return summary
+            time.sleep(0.05)
+
+    @staticmethod
+    def _read(state):
+        for _ in range(100):
+            sequence = int(state[0])
+            if sequence % 2 == 0:
+                version, loaded_at = int(state[1]), int(state[2])
+                if int(state[0]) == sequence:
+                    return sequence, version, loaded_at
+        return None
+
+    def workers(self, name):
+        """[(pid, versión, hora de carga en s)] de los procesos vivos que sirven `name`"""
+        row = self._rows.get(name)
+        if row is None:
+            return []
+        own = os.getpid()
+        result = []
+        for pid, array in sorted(self._array.by_process().items()):
+            if pid != own and not process_alive(pid):
+                continue
+            state = self._read(array[row])
+            if state is None or state[0] == 0:
+                continue
+            _, version, loaded_at = state
+            result.append((pid, f'{version:012x}' if version >= 0 else None, loaded_at / 1e6))
+        return result
+
+    def summary(self, name):
+        """Versiones de `name` en servicio en los workers y si coinciden todas"""
+        workers = self.workers(name)
+        versions = {}
+        for _, version, _ in workers:
+            versions[version] = versions.get(version, 0) + 1
+        return {
+            'workers': len(workers),
+            'model_versions': versions,
+            'consistent': len(versions) <= 1,
+            'oldest_loaded_at': datetime.fromtimestamp(min(loaded_at for _, _, loaded_at in workers)).isoformat()
+                                if workers else None,
+            'shared': self._array.shared
+        }
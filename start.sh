@@ -1,3 +1,3 @@
 #!/bin/bash
-gunicorn main:app -b 0.0.0.0:$PORT
+gunicorn -c gunicorn.conf.py main:app
 
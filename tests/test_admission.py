@@ -0,0 +1,154 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from admission import AdmissionController, AsyncAdmissionController, Rejected
+
+
+def test_cancelled_waiter_gives_back_a_slot_it_was_handed():
+    async def scenario():
+        admission = AsyncAdmissionController(max_in_flight=1, max_queue=4, timeout=5.0)
+        first = await admission.acquire()
+        waiting = asyncio.ensure_future(admission.acquire())
+        behind = asyncio.ensure_future(admission.acquire())
+        await asyncio.sleep(0)
+        assert admission.state.waiting == 2
+
+        # The slot is handed to the first waiter, which is cancelled (client gone) before it runs
+        admission.release(first)
+        waiting.cancel()
+        await asyncio.sleep(0)
+        assert waiting.cancelled()
+
+        # The slot goes on to the next waiter instead of leaking
+        started = await asyncio.wait_for(behind, 1.0)
+        assert admission.state.in_flight == 1
+        admission.release(started)
+        assert admission.state.in_flight == 0
+        assert admission.state.waiting == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiters_never_leak_slots():
+    async def scenario():
+        admission = AsyncAdmissionController(max_in_flight=2, max_queue=16, timeout=5.0)
+        for round_ in range(20):
+            held = [await admission.acquire() for _ in range(2)]
+            waiters = [asyncio.ensure_future(admission.acquire()) for _ in range(3)]
+            await asyncio.sleep(0)
+            # Cancel some waiters before the slots are freed and some after
+            for waiter in waiters[:round_ % 4]:
+                waiter.cancel()
+            for started in held:
+                admission.release(started)
+            for waiter in waiters:
+                waiter.cancel()
+            results = await asyncio.gather(*waiters, return_exceptions=True)
+            assert all(isinstance(result, asyncio.CancelledError) for result in results)
+            assert admission.state.in_flight == 0
+            assert admission.state.waiting == 0
+        # Still admitting immediately
+        await asyncio.wait_for(admission.acquire(), 0.1)
+
+    asyncio.run(scenario())
+
+
+def test_waiter_past_its_deadline_is_rejected_with_timeout():
+    async def scenario():
+        admission = AsyncAdmissionController(max_in_flight=1, max_queue=4, timeout=0.05)
+        first = await admission.acquire()
+        with pytest.raises(Rejected) as rejected:
+            await admission.acquire()
+        assert rejected.value.reason == 'timeout'
+        assert admission.state.waiting == 0
+        admission.release(first)
+        assert admission.state.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_async_controller_sheds_before_queueing():
+    async def scenario():
+        admission = AsyncAdmissionController(max_in_flight=1, max_queue=1, timeout=1.0)
+        with pytest.raises(Rejected) as expired:
+            await admission.acquire(queued=2.0)
+        assert expired.value.reason == 'expired'
+
+        first = await admission.acquire()
+        waiting = asyncio.ensure_future(admission.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(Rejected) as full:
+            await admission.acquire()
+        assert full.value.reason == 'queue_full'
+
+        admission.release(first)
+        admission.release(await waiting)
+        assert admission.stats()['rejected'] == {'expired': 1, 'queue_full': 1}
+        assert admission.stats()['admitted'] == 2
+
+    asyncio.run(scenario())
+
+
+def test_rejects_expired_requests():
+    admission = AdmissionController(max_in_flight=1, max_queue=4, timeout=1.0)
+    with pytest.raises(Rejected) as rejected:
+        admission.acquire(queued=1.5)
+    assert rejected.value.reason == 'expired'
+    assert rejected.value.retry_after >= 1
+    assert admission.state.in_flight == 0
+
+
+def test_rejects_when_the_queue_is_full():
+    admission = AdmissionController(max_in_flight=1, max_queue=0, timeout=1.0)
+    started = admission.acquire()
+    with pytest.raises(Rejected) as rejected:
+        admission.acquire()
+    assert rejected.value.reason == 'queue_full'
+    assert not admission.ready()
+    admission.release(started)
+    assert admission.state.in_flight == 0
+
+
+def test_rejects_when_the_estimated_wait_misses_the_deadline():
+    admission = AdmissionController(max_in_flight=1, max_queue=4, timeout=0.5)
+    # One request ahead that takes 2 s on average: waiting would overshoot the 0.5 s deadline
+    admission.state.service_time = 2.0
+    started = admission.acquire()
+    with pytest.raises(Rejected) as rejected:
+        admission.acquire()
+    assert rejected.value.reason == 'deadline'
+    assert rejected.value.retry_after == 2
+    admission.release(started)
+
+
+def test_queued_request_times_out():
+    admission = AdmissionController(max_in_flight=1, max_queue=4, timeout=0.05)
+    started = admission.acquire()
+    with pytest.raises(Rejected) as rejected:
+        admission.acquire()
+    assert rejected.value.reason == 'timeout'
+    assert admission.state.waiting == 0
+    admission.release(started)
+
+
+def test_queued_request_gets_the_released_slot():
+    admission = AdmissionController(max_in_flight=1, max_queue=4, timeout=5.0)
+    started = admission.acquire()
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(admission.acquire()))
+    waiter.start()
+    while admission.stats()['waiting'] == 0:
+        time.sleep(0.001)
+    admission.release(started)
+    waiter.join(timeout=5.0)
+
+    assert len(results) == 1
+    assert admission.state.in_flight == 1
+    admission.release(results[0])
+    stats = admission.stats()
+    assert (stats['in_flight'], stats['waiting'], stats['admitted']) == (0, 0, 2)
+    assert stats['mean_service_ms'] is not None
+    assert admission.ready()
@@ -0,0 +1,32 @@
+import os
+
+import pytest
+
+os.environ.setdefault('ACCESS_LOG', 'false')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+os.environ.setdefault('MODEL_PATH', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'best_model.pkl'))
+
+import main  # noqa: E402
+
+VALID = {
+    'PhysicalActivities': 1, 'AlcoholDrinkers': 0, 'ageCategoryGrouped': 2,
+    'SmokerStatusGrouped': 2, 'HadDiabetesGrouped': 1, 'HadHeartAttack': 0,
+}
+
+
+@pytest.fixture(scope='module')
+def client():
+    return main.app.test_client()
+
+
+def test_predict_accepts_a_valid_record(client):
+    response = client.post('/predict', json=VALID)
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'success'
+
+
+@pytest.mark.parametrize('body', [[VALID], 'x', 1])
+def test_predict_rejects_json_that_is_not_an_object(client, body):
+    response = client.post('/predict', json=body)
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'El cuerpo debe ser un objeto JSON', 'status': 'error'}
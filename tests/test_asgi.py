@@ -0,0 +1,77 @@
+import asyncio
+import json
+import os
+
+import numpy as np
+import pytest
+from sklearn.tree import DecisionTreeClassifier
+
+os.environ.setdefault('ACCESS_LOG', 'false')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+os.environ.setdefault('MODEL_PATH', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'best_model.pkl'))
+
+import asgi  # noqa: E402
+import main  # noqa: E402
+from features import FEATURE_SCHEMA  # noqa: E402
+from model_registry import prepare_model  # noqa: E402
+
+VALID = {
+    'PhysicalActivities': 1, 'AlcoholDrinkers': 0, 'ageCategoryGrouped': 2,
+    'SmokerStatusGrouped': 2, 'HadDiabetesGrouped': 1, 'HadHeartAttack': 0,
+}
+
+
+def call(method, path, body=b'', headers=()):
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': b'', 'headers': list(headers)}
+    asyncio.run(asgi.app(scope, receive, send))
+    return messages[0]['status'], messages[1]['body']
+
+
+@pytest.mark.parametrize('content_type', [
+    b'application/json', b'application/json; charset=utf-8', b'Application/JSON', b'application/problem+json'
+])
+def test_json_is_detected_by_media_type(content_type):
+    status, body = call('POST', '/predict', json.dumps(VALID).encode(), [(b'content-type', content_type)])
+    assert status == 200
+    assert json.loads(body)['status'] == 'success'
+
+
+def test_non_object_json_body_is_a_400_like_flask():
+    status, body = call('POST', '/predict', b'[1, 2]', [(b'content-type', b'application/json')])
+    assert status == 400
+    assert json.loads(body) == main.app.test_client().post('/predict', json=[1, 2]).get_json()
+
+
+def test_unhandled_errors_get_the_json_500_envelope(monkeypatch):
+    monkeypatch.setattr(main, 'health_body', lambda admission: 1 / 0)
+    status, body = call('GET', '/health')
+    assert status == 500
+    assert json.loads(body) == {'error': 'Error interno del servidor', 'status': 'error'}
+
+
+def test_batch_scores_each_record_with_the_model_its_request_took():
+    current = main.registry.current
+    grid = FEATURE_SCHEMA.encode_values(FEATURE_SCHEMA.input_grid())
+    served = current.score_values(FEATURE_SCHEMA.input_grid())[0]
+    # Another version of the model, e.g. one published by a reload while the batch was waiting,
+    # that predicts the opposite class for every input
+    inverse = DecisionTreeClassifier().fit(grid, 1 - served)
+    inverse.feature_names_in_ = np.asarray(FEATURE_SCHEMA.model_features, dtype=object)
+    other = prepare_model(inverse, 'f' * 12, 'other.pkl', use_table=False)
+    form_data = FEATURE_SCHEMA.validate(VALID)
+    key = tuple(form_data[field] for field in FEATURE_SCHEMA.form_features)
+
+    responses = asgi.score_batch([(current, form_data, key), (other, form_data, key), (current, form_data, key)])
+
+    payloads = [json.loads(response.render('t')) for response in responses]
+    assert [payload['model_version'] for payload in payloads] == [current.version, other.version, current.version]
+    predictions = [payload['prediction'] for payload in payloads]
+    assert predictions[0] == predictions[2] == 1 - predictions[1]
@@ -0,0 +1,57 @@
+import glob
+import json
+import os
+from types import SimpleNamespace
+
+import audit
+import read_audit
+from audit import AuditSink
+
+CURRENT = SimpleNamespace(name='default', version='abc123')
+ROW = {'PhysicalActivities': 1, 'AlcoholDrinkers': 0}
+
+
+def written_lines(directory):
+    lines = []
+    for path in sorted(glob.glob(os.path.join(directory, 'audit-*.ndjson'))):
+        with open(path) as file:
+            lines.extend(json.loads(line) for line in file)
+    return lines
+
+
+def test_unserializable_batch_is_dropped_and_the_writer_keeps_running(tmp_path):
+    sink = AuditSink(str(tmp_path), batch_size=1, flush_interval=0.01, block_timeout=0.1)
+    sink.record('predict', CURRENT, 'before', [ROW], [0], [[0.9, 0.1]])
+    sink.record('predict', CURRENT, 'bad', [dict(ROW, extra=object())], [1], [[0.2, 0.8]])
+    sink.record('predict', CURRENT, 'after', [ROW, ROW], [1, 0], [[0.3, 0.7], [0.6, 0.4]])
+    sink.close()
+
+    assert sink.dropped == 1
+    assert sink.written == 3
+    assert [line['request_id'] for line in written_lines(str(tmp_path))] == ['before', 'after', 'after']
+
+
+def test_batch_is_written_in_timestamp_order(tmp_path, monkeypatch):
+    sink = AuditSink(str(tmp_path), batch_size=3, flush_interval=10.0)
+    # Items reach the queue in a different order from the one they were stamped in
+    for request_id, stamp in [('second', 2.0), ('third', 3.0), ('first', 1.0)]:
+        monkeypatch.setattr(audit.time, 'time', lambda stamp=stamp: 1700000000.0 + stamp)
+        sink.record('predict', CURRENT, request_id, [ROW], [0], [[0.9, 0.1]])
+    monkeypatch.undo()
+    sink.close()
+
+    assert [line['request_id'] for line in written_lines(str(tmp_path))] == ['first', 'second', 'third']
+
+
+def test_read_records_merges_files_in_timestamp_order(tmp_path):
+    def write(name, stamps):
+        with open(tmp_path / name, 'w') as file:
+            for stamp in stamps:
+                file.write(json.dumps({'ts': f'2025-01-14T10:00:0{stamp}', 'request_id': f'{name}-{stamp}'}) + '\n')
+
+    # A record stamped before a flush can land in the next batch of the same file
+    write('audit-a.ndjson', [1, 4, 3, 6])
+    write('audit-b.ndjson', [2, 5])
+    records = read_audit.read_records([str(tmp_path)])
+
+    assert [record['ts'][-1] for record in records] == ['1', '2', '3', '4', '5', '6']
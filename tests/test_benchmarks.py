@@ -0,0 +1,84 @@
+import argparse
+import json
+
+import pytest
+
+from benchmarks import load, report
+
+
+def result(throughput, p50, p95=None, p99=None):
+    return {'throughput_per_s': throughput,
+            'latency_ms': {'p50': p50, 'p95': p95 or p50 * 2, 'p99': p99 or p50 * 3}}
+
+
+def test_compare_flags_only_changes_beyond_the_tolerance():
+    baseline = {'results': {'predict': result(1000.0, 1.0), 'health': result(5000.0, 0.2)}}
+    current = {'results': {'predict': result(850.0, 1.05), 'health': result(5100.0, 0.3), 'new': result(1.0, 1.0)}}
+    rows = report.compare(current, baseline, tolerance=0.10)
+
+    regressed = {(name, metric) for name, metric, _, _, _, is_regression in rows if is_regression}
+    assert regressed == {('predict', 'throughput_per_s'), ('health', 'latency_ms.p50'),
+                         ('health', 'latency_ms.p95'), ('health', 'latency_ms.p99')}
+    # Benchmarks missing from the baseline are skipped
+    assert {name for name, *_ in rows} == {'predict', 'health'}
+    by_metric = {(name, metric): (base_value, current_value, change)
+                 for name, metric, base_value, current_value, change, _ in rows}
+    base_value, current_value, change = by_metric['predict', 'throughput_per_s']
+    assert (base_value, current_value) == (1000.0, 850.0)
+    assert change == pytest.approx(-0.15)
+
+
+def test_compare_skips_metrics_missing_from_either_report():
+    baseline = {'results': {'predict': {'throughput_per_s': 100.0, 'latency_ms': None}}}
+    current = {'results': {'predict': result(50.0, 1.0)}}
+    assert [row[1] for row in report.compare(current, baseline)] == ['throughput_per_s']
+
+
+def test_summarize_latencies():
+    summary = report.summarize([0.001, 0.002, 0.003, 0.004], duration_s=2.0, errors=1)
+    assert summary['count'] == 4
+    assert summary['errors'] == 1
+    assert summary['throughput_per_s'] == 2.0
+    assert summary['latency_ms']['mean'] == pytest.approx(2.5)
+    assert summary['latency_ms']['max'] == pytest.approx(4.0)
+    assert summary['latency_ms']['p50'] == pytest.approx(2.5)
+    # Without a wall-clock duration the throughput is the serial one
+    assert report.summarize([0.5, 0.5])['throughput_per_s'] == 2.0
+    assert report.summarize([], duration_s=1.0)['latency_ms'] is None
+
+
+def test_parse_mix():
+    assert load.parse_mix('predict=80, health=20') == {'predict': 80.0, 'health': 20.0}
+    assert load.parse_mix('predict') == {'predict': 1.0}
+    with pytest.raises(argparse.ArgumentTypeError):
+        load.parse_mix('predict=1,unknown=2')
+
+
+def test_read_replay(tmp_path):
+    path = tmp_path / 'traffic.jsonl'
+    path.write_text('\n'.join([
+        json.dumps({'method': 'POST', 'path': '/predict', 'json': {'a': 1}, 'name': 'audit'}),
+        '',
+        json.dumps({'path': '/predict', 'body': 'a=1', 'headers': {'Content-Type': 'application/x-www-form-urlencoded'}}),
+        json.dumps({'path': '/health'}),
+    ]) + '\n')
+    first, second, third = load.read_replay(str(path))
+
+    assert (first.name, first.method, first.path) == ('audit', 'POST', '/predict')
+    assert json.loads(first.body) == {'a': 1}
+    assert first.headers == {'Content-Type': 'application/json'}
+    assert (second.name, second.method, second.body) == ('POST /predict', 'POST', b'a=1')
+    assert second.headers['Content-Type'] == 'application/x-www-form-urlencoded'
+    assert (third.name, third.method, third.body) == ('GET /health', 'GET', None)
+
+
+def test_read_replay_rejects_bad_files(tmp_path):
+    bad = tmp_path / 'bad.jsonl'
+    bad.write_text(json.dumps({'path': '/health'}) + '\n' + json.dumps({'method': 'GET'}) + '\n')
+    with pytest.raises(ValueError, match=':2: invalid replay entry'):
+        load.read_replay(str(bad))
+
+    empty = tmp_path / 'empty.jsonl'
+    empty.write_text('\n')
+    with pytest.raises(ValueError, match='no requests to replay'):
+        load.read_replay(str(empty))
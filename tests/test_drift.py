@@ -0,0 +1,77 @@
+import time
+
+import numpy as np
+
+import drift
+from drift import DriftMonitor
+
+DOMAINS = [('a', ['0', '1']), ('b', ['x', 'y', 'z'])]
+
+
+def observe(monitor, counts):
+    for (a, b), count in counts.items():
+        for _ in range(count):
+            monitor.observe({'a': a, 'b': b})
+
+
+def test_psi_levels():
+    assert drift.psi_level(0.05) == 'stable'
+    assert drift.psi_level(0.1) == 'moderate'
+    assert drift.psi_level(0.3) == 'significant'
+
+
+def test_compare_is_zero_for_the_reference_distribution():
+    reference = np.array([10.0, 20.0, 30.0, 40.0])
+    same = drift.compare(reference * 3, reference)
+    assert same['psi'] == 0.0
+    assert same['chi2'] == 0.0
+    assert same['dof'] == 3
+    shifted = drift.compare(np.array([40.0, 30.0, 20.0, 10.0]), reference)
+    assert shifted['psi'] > drift.PSI_SIGNIFICANT
+
+
+def test_report_flags_the_feature_that_drifted():
+    monitor = DriftMonitor(DOMAINS)
+    reference = np.full(6, 100.0)
+    # 'a' keeps its 50/50 split while 'b' moves almost all its mass to 'z'
+    observe(monitor, {('0', 'z'): 90, ('1', 'z'): 90, ('0', 'x'): 10, ('1', 'y'): 10})
+    result = monitor.report(reference)
+
+    assert result['observations'] == 200
+    assert result['drift'] == 'significant'
+    assert result['drifted_features'] == ['b']
+    assert result['features']['a']['level'] == 'stable'
+    assert result['features']['b']['live'] == {'x': 0.05, 'y': 0.05, 'z': 0.9}
+
+
+def test_report_needs_a_reference_and_enough_data():
+    monitor = DriftMonitor(DOMAINS)
+    observe(monitor, {('0', 'x'): 10})
+    assert monitor.report(None)['drift'] == 'no_reference'
+    assert monitor.report(np.full(6, 1.0))['drift'] == 'insufficient_data'
+
+
+def test_observe_values_matches_observe():
+    one_by_one = DriftMonitor(DOMAINS)
+    observe(one_by_one, {('0', 'x'): 2, ('1', 'z'): 1})
+    vectorized = DriftMonitor(DOMAINS)
+    vectorized.observe_values(np.array([['0', 'x'], ['1', 'z'], ['0', 'x']]))
+    assert vectorized.window_counts().tolist() == one_by_one.window_counts().tolist() == [2, 0, 0, 0, 0, 1]
+
+
+def test_window_skips_buckets_outside_it():
+    monitor = DriftMonitor(DOMAINS, bucket_seconds=10, buckets=6)
+    observe(monitor, {('0', 'x'): 5})
+    now = time.time()
+    # Two buckets, so the test does not depend on where the current one started
+    assert monitor.window_counts(20, now=now).sum() == 5
+    assert monitor.window_counts(20, now=now + 40).sum() == 0
+    assert monitor.window_counts(60, now=now + 40).sum() == 5
+
+
+def test_reference_round_trip():
+    values = np.array([['0', 'x'], ['0', 'x'], ['1', 'y']])
+    reference = drift.build_reference(DOMAINS, values, source='train.csv')
+    assert reference['rows'] == 3
+    assert drift.reference_counts(reference, DOMAINS).tolist() == [2, 0, 0, 0, 1, 0]
+    assert drift.reference_counts(reference, [('a', ['0', '1']), ('b', ['x', 'y'])]) is None
@@ -0,0 +1,32 @@
+import pytest
+
+from features import FEATURE_SCHEMA, FeatureValidationError
+
+VALID = {
+    'PhysicalActivities': 1, 'AlcoholDrinkers': 0, 'ageCategoryGrouped': 2,
+    'SmokerStatusGrouped': 2, 'HadDiabetesGrouped': 1, 'HadHeartAttack': 0,
+}
+
+
+def test_validate_normalizes_common_formats():
+    record = dict(VALID, PhysicalActivities='1', ageCategoryGrouped='2.0', SmokerStatusGrouped=2.0)
+    assert FEATURE_SCHEMA.validate(record) == VALID
+
+
+@pytest.mark.parametrize('raw', ['inf', '-inf', 'nan', float('inf'), float('nan'), 1e400, '1e400'])
+def test_non_finite_values_are_validation_errors(raw):
+    with pytest.raises(FeatureValidationError):
+        FEATURE_SCHEMA.validate(dict(VALID, PhysicalActivities=raw))
+
+
+@pytest.mark.parametrize('raw', ['abc', 5, -1, [1], {'value': 1}])
+def test_invalid_values_are_validation_errors(raw):
+    with pytest.raises(FeatureValidationError):
+        FEATURE_SCHEMA.validate(dict(VALID, PhysicalActivities=raw))
+
+
+def test_missing_fields_are_listed():
+    record = dict(VALID)
+    del record['HadDiabetesGrouped']
+    with pytest.raises(FeatureValidationError, match='HadDiabetesGrouped'):
+        FEATURE_SCHEMA.validate(record)
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import ExtraTreesClassifier, GradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier, ExtraTreeClassifier
+
+from features import FEATURE_SCHEMA
+from inference import Scorer
+from model_compiler import CompiledModel, compile_model
+
+# Full input domain (108 rows) encoded as the model expects it
+GRID = FEATURE_SCHEMA.encode_values(FEATURE_SCHEMA.input_grid())
+
+
+def training_data(n_classes=2):
+    rng = np.random.default_rng(0)
+    X = GRID[rng.integers(0, len(GRID), 400)]
+    # Labels that depend on the features, plus noise so trees are not pure
+    score = X @ rng.normal(size=X.shape[1]) + rng.normal(scale=0.5, size=len(X))
+    y = np.digitize(score, np.quantile(score, np.linspace(0, 1, n_classes + 1)[1:-1]))
+    return X, y
+
+
+SUPPORTED = [
+    ('tree', lambda: DecisionTreeClassifier(max_depth=5, random_state=0), 2),
+    ('extra_tree', lambda: ExtraTreeClassifier(max_depth=5, random_state=0), 2),
+    ('random_forest', lambda: RandomForestClassifier(n_estimators=15, max_depth=6, random_state=0), 2),
+    ('extra_trees', lambda: ExtraTreesClassifier(n_estimators=15, max_depth=6, random_state=0), 2),
+    ('logistic_lbfgs', lambda: LogisticRegression(max_iter=1000), 2),
+    ('logistic_liblinear', lambda: LogisticRegression(solver='liblinear'), 2),
+    ('logistic_multinomial', lambda: LogisticRegression(max_iter=1000), 3),
+    ('logistic_liblinear_ovr', lambda: LogisticRegression(solver='liblinear'), 3),
+]
+
+
+@pytest.mark.parametrize('name,make,n_classes', SUPPORTED, ids=[case[0] for case in SUPPORTED])
+def test_compiled_kernel_matches_sklearn(name, make, n_classes):
+    model = make().fit(*training_data(n_classes))
+    compiled = compile_model(model, GRID)
+
+    assert isinstance(compiled, CompiledModel)
+    assert np.array_equal(compiled.classes_, model.classes_)
+    assert np.array_equal(compiled.predict(GRID), model.predict(GRID))
+    assert np.abs(compiled.predict_proba(GRID) - model.predict_proba(GRID)).max() <= 1e-12
+
+
+def test_unsupported_estimator_falls_back_to_the_original():
+    model = GradientBoostingClassifier(n_estimators=10, random_state=0).fit(*training_data())
+    assert compile_model(model, GRID) is None
+
+    scorer = Scorer(model)
+    assert scorer.self_check(GRID)
+    predictions, probabilities = scorer.score(GRID)
+    assert np.array_equal(predictions, model.predict(GRID))
+    assert np.abs(probabilities - model.predict_proba(GRID)).max() <= 1e-12
+
+
+def test_compiled_model_is_abstract():
+    with pytest.raises(TypeError):
+        CompiledModel([0, 1])
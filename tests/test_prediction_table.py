@@ -0,0 +1,46 @@
+import os
+import pickle
+
+import numpy as np
+
+from features import FEATURE_SCHEMA
+from inference import Scorer
+from prediction_table import PredictionTable
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'best_model.pkl')
+
+
+def load_model():
+    with open(MODEL_PATH, 'rb') as file:
+        return pickle.load(file)
+
+
+def build(score, reference_score=None):
+    return PredictionTable.build(score, FEATURE_SCHEMA.input_domains, FEATURE_SCHEMA.encode_values, reference_score)
+
+
+def test_table_matches_the_original_estimator():
+    model = load_model()
+    reference = Scorer(model, single_pass=False)
+    table = build(Scorer(model).score, reference.score)
+    assert table is not None and len(table) == 108
+
+    grid = FEATURE_SCHEMA.input_grid()
+    predictions, probabilities = table.lookup_values(FEATURE_SCHEMA.input_fields, grid)
+    encoded = FEATURE_SCHEMA.encode_values(grid)
+    assert np.array_equal(predictions, model.predict(encoded))
+    assert np.allclose(probabilities, model.predict_proba(encoded), rtol=0, atol=1e-12)
+
+
+def test_a_faulty_scorer_fails_verification_against_the_reference():
+    model = load_model()
+    scorer = Scorer(model)
+
+    def faulty(features):
+        # Consistent with itself row by row and in batch, but wrong for one combination
+        predictions, probabilities = scorer.score(features)
+        flip = np.all(features == FEATURE_SCHEMA.encode_values(FEATURE_SCHEMA.input_grid()[:1]), axis=1)
+        return np.where(flip, 1 - predictions, predictions), probabilities
+
+    assert build(faulty) is not None
+    assert build(faulty, Scorer(model, single_pass=False).score) is None
@@ -0,0 +1,38 @@
+import json
+import os
+
+import pytest
+
+import score_file
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'best_model.pkl')
+
+VALID = {
+    'PhysicalActivities': '1', 'AlcoholDrinkers': '0', 'ageCategoryGrouped': '2',
+    'SmokerStatusGrouped': '2', 'HadDiabetesGrouped': '1', 'HadHeartAttack': '0',
+}
+
+
+@pytest.fixture(scope='module', autouse=True)
+def scorer():
+    score_file.init_scorer(MODEL_PATH)
+
+
+def test_bad_rows_are_reported_and_skipped():
+    records = [VALID, dict(VALID, PhysicalActivities='inf'), dict(VALID, AlcoholDrinkers='nan'), 'not a record', VALID]
+    rows = score_file.score_chunk(10, records)
+    assert [row['status'] for row in rows] == ['success', 'error', 'error', 'error', 'success']
+    assert [row['index'] for row in rows] == [10, 11, 12, 13, 14]
+    assert rows[0]['prediction'] == rows[4]['prediction']
+
+
+def test_csv_run_survives_non_finite_rows(tmp_path):
+    source = tmp_path / 'input.csv'
+    lines = [','.join(VALID)] + [','.join(VALID.values())] * 3
+    lines.insert(2, ','.join('-inf' if field == 'SmokerStatusGrouped' else value for field, value in VALID.items()))
+    source.write_text('\n'.join(lines) + '\n')
+    output = tmp_path / 'scores.ndjson'
+
+    assert score_file.main([str(source), '-o', str(output), '--model', MODEL_PATH]) == 0
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [row['status'] for row in rows] == ['success', 'error', 'success', 'success']
@@ -0,0 +1,113 @@
+import multiprocessing
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+from shared_state import ModelVersions, SharedCounters
+
+
+class FakeModel:
+    """Stands in for a ModelRegistry entry: counts loads and publishes each new version"""
+
+    def __init__(self, name, versions):
+        self.name = name
+        self.versions = versions
+        self.loads = 0
+        self.current = None
+
+    def load(self):
+        self.loads += 1
+        self.current = SimpleNamespace(name=self.name, version=f'{self.loads:012x}', loaded_at=datetime.now())
+        self.versions.publish(self.current)
+        return self.current
+
+
+class FakePool:
+    def __init__(self, names, versions):
+        self.models = {name: FakeModel(name, versions) for name in names}
+
+    def get(self, name):
+        return self.models[name]
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def request_reload_elsewhere(directory, name):
+    ModelVersions(['default', 'other'], directory).request_reload(name)
+
+
+def test_reload_requested_in_another_process_is_followed(tmp_path):
+    versions = ModelVersions(['default', 'other'], str(tmp_path))
+    pool = FakePool(versions.names, versions)
+    versions.activate(pool)
+    versions.follow_reloads(pool, 0.01)
+
+    process = multiprocessing.get_context('fork').Process(
+        target=request_reload_elsewhere, args=(str(tmp_path), 'default')
+    )
+    process.start()
+    process.join(timeout=10)
+    assert process.exitcode == 0
+
+    assert versions.reload_generation('default') == 1
+    assert wait_until(lambda: pool.get('default').loads == 1)
+    assert pool.get('other').loads == 0
+    assert versions.summary('default')['model_versions'] == {'000000000001': 1}
+
+
+def test_own_reload_request_is_not_followed_again(tmp_path):
+    versions = ModelVersions(['default'], str(tmp_path))
+    pool = FakePool(versions.names, versions)
+    versions.activate(pool)
+    versions.follow_reloads(pool, 0.01)
+
+    pool.get('default').load()
+    assert versions.request_reload('default') == 1
+    assert versions.request_reload('default') == 2
+    time.sleep(0.1)
+    assert pool.get('default').loads == 1
+
+
+def test_summary_reports_the_published_version(tmp_path):
+    versions = ModelVersions(['default'], str(tmp_path))
+    pool = FakePool(versions.names, versions)
+    # Before activate() the process (the gunicorn master) does not publish
+    pool.get('default').load()
+    assert versions.summary('default')['workers'] == 0
+
+    versions.activate(pool)
+    summary = versions.summary('default')
+    assert summary['workers'] == 1
+    assert summary['model_versions'] == {'000000000001': 1}
+    assert summary['consistent'] and summary['shared']
+
+    pool.get('default').load()
+    assert versions.wait_for_version('default', '000000000002', timeout=1.0)['model_versions'] == {'000000000002': 1}
+
+
+def test_follow_reloads_needs_a_shared_directory():
+    versions = ModelVersions(['default'])
+    versions.follow_reloads(FakePool(versions.names, versions), 0.01)
+    assert versions._follower is None
+
+
+def add_elsewhere(directory):
+    SharedCounters('counts', ['a', 'b'], directory).add('a', 3)
+
+
+def test_counters_add_up_across_processes(tmp_path):
+    counters = SharedCounters('counts', ['a', 'b'], str(tmp_path))
+    counters.add('a')
+    counters.add('b', 2)
+    process = multiprocessing.get_context('fork').Process(target=add_elsewhere, args=(str(tmp_path),))
+    process.start()
+    process.join(timeout=10)
+
+    assert counters.values() == {'a': 4, 'b': 2}
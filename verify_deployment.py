@@ -60,6 +60,7 @@ def main():
     print("\n📄 Optional Files:")
     optional_files = [
         'config.py',
+        'gunicorn.conf.py',
         '.env.example',
         '.gitignore',
         'RENDER_DEPLOYMENT.md',
@@ -138,7 +139,7 @@ def main():
         print("   - FLASK_DEBUG=false")
         print("   - MODEL_PATH=best_model.pkl")
         print("3. Build Command: pip install -r requirements.txt")
-        print("4. Start Command: gunicorn main:app --host=0.0.0.0 --port=$PORT")
+        print("4. Start Command: gunicorn -c gunicorn.conf.py main:app")
         print("\n📖 For detailed instructions, see RENDER_DEPLOYMENT.md")
     else:
         print("\n🔧 Fix the issues above, then run this script again.")